@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare checkpoint bytes written and load time for the default and delta savers.
+
+Replays the evaluation conversations (evaluations/results/*/*.json) turn by
+turn and, after every turn, serializes the `messages` channel the way each
+saver would write it to checkpoint_blobs. Load time covers deserializing the
+latest checkpoint's messages (what get_state does after the SQL query); the
+delta saver's extra query for message blobs is not included since no database
+is used.
+
+Usage:
+    uv run python benchmarks/bench_checkpoint_serializer.py
+"""
+
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from agent_service.langgraph.checkpoint_serde import (
+    MESSAGE_BLOB_CHANNEL,
+    MESSAGES_CHANNEL,
+)
+from agent_service.langgraph.postgres_checkpoint import (
+    DeltaPostgresSaver,
+    PooledPostgresSaver,
+)
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from psycopg_pool import ConnectionPool
+
+RESULTS_DIR = Path(__file__).resolve().parents[2] / "evaluations" / "results"
+LOAD_ITERATIONS = 20
+
+
+def load_conversations() -> dict[str, list[BaseMessage]]:
+    conversations = {}
+    for path in sorted(RESULTS_DIR.glob("*/*.json")):
+        turns = json.loads(path.read_text()).get("conversation", [])
+        messages: list[BaseMessage] = []
+        for turn in turns:
+            cls = HumanMessage if turn.get("role") == "user" else AIMessage
+            messages.append(cls(content=turn.get("content", ""), id=str(uuid.uuid4())))
+        if messages:
+            conversations[path.name] = messages
+    return conversations
+
+
+def replay(saver: Any, messages: list[BaseMessage]) -> tuple[int, list[Any]]:
+    """Write a checkpoint after every message; return total bytes and last rows."""
+    thread_id = str(uuid.uuid4())
+    total_bytes = 0
+    rows: list[Any] = []
+    for count in range(1, len(messages) + 1):
+        version = saver.get_next_version(None, None)
+        rows = saver._dump_blobs(
+            thread_id,
+            "",
+            {MESSAGES_CHANNEL: messages[:count]},
+            {MESSAGES_CHANNEL: version},
+        )
+        total_bytes += sum(len(row[5] or b"") for row in rows)
+    return total_bytes, rows
+
+
+def time_load(saver: Any, messages: list[BaseMessage]) -> float:
+    """Average ms to deserialize the full history as stored by the saver."""
+    thread_id = str(uuid.uuid4())
+    rows = saver._dump_blobs(
+        thread_id,
+        "",
+        {MESSAGES_CHANNEL: messages},
+        {MESSAGES_CHANNEL: saver.get_next_version(None, None)},
+    )
+    channel_rows = [
+        (row[2].encode(), row[4].encode(), row[5])
+        for row in rows
+        if row[2] != MESSAGE_BLOB_CHANNEL
+    ]
+    message_rows = {
+        row[3]: (row[4], row[5]) for row in rows if row[2] == MESSAGE_BLOB_CHANNEL
+    }
+
+    start = time.perf_counter()
+    for _ in range(LOAD_ITERATIONS):
+        values = saver._load_blobs(channel_rows)
+        if message_rows:
+            loaded = {k: saver.serde.loads_typed(v) for k, v in message_rows.items()}
+            values[MESSAGES_CHANNEL] = [loaded[k] for k in values[MESSAGES_CHANNEL]]
+    return (time.perf_counter() - start) / LOAD_ITERATIONS * 1000
+
+
+def main() -> None:
+    pool = ConnectionPool("postgresql://benchmark", open=False)
+    savers = {
+        "default": PooledPostgresSaver(pool),
+        "delta": DeltaPostgresSaver(pool),
+    }
+
+    conversations = load_conversations()
+    if not conversations:
+        print(f"No conversations found under {RESULTS_DIR}")
+        return
+
+    print(
+        f"{'conversation':<40} {'saver':<8} {'msgs':>5} {'bytes/turn':>11} "
+        f"{'last turn':>10} {'load ms':>8}"
+    )
+    for name, messages in conversations.items():
+        for label, saver in savers.items():
+            total_bytes, last_rows = replay(saver, messages)
+            last_bytes = sum(len(row[5] or b"") for row in last_rows)
+            print(
+                f"{name[:40]:<40} {label:<8} {len(messages):>5} "
+                f"{total_bytes / len(messages):>11.0f} {last_bytes:>10} "
+                f"{time_load(saver, messages):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark checkpoint write statements per conversation turn.
+
+Replays a scripted conversation through the real state machine configs with a
+fake agent (no LlamaStack needed) and counts what PostgresSaver would write:
+one checkpoint upsert plus one blob upsert per changed channel for every
+checkpoint, and one row per pending write. Each config is run with
+checkpoint_durability "step" (every node) and "exit" (waiting/terminal only).
+
+Usage:
+    uv run python benchmarks/bench_checkpoint_writes.py
+"""
+
+from typing import Any, Sequence
+from unittest.mock import patch
+
+from agent_service.langgraph import lg_flow_state_machine
+from agent_service.langgraph.config_compiler import CHECKPOINT_DURABILITY_MODES
+from agent_service.langgraph.lg_flow_state_machine import (
+    ConversationSession,
+    clear_graph_cache,
+)
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.memory import InMemorySaver
+
+CONVERSATIONS = {
+    "config/lg-prompts/routing.yaml": ["hi", "I need a new laptop"],
+    "config/lg-prompts/lg-prompt-small.yaml": [
+        "I need help with laptop refresh",
+        "yes, proceed",
+        "option 1",
+        "yes, create the ticket",
+        "thanks",
+    ],
+}
+
+# Canned responses chosen to move the flows forward through their classifiers
+RESPONSES = {
+    "classify_lookup_result": "EMPLOYEE_FOUND",
+    "classify_eligibility_result": "ELIGIBLE",
+    "validate_laptop_options": "VALID_OPTIONS",
+    "classify_user_intent": "LAPTOP_REFRESH",
+}
+
+
+class CountingSaver(InMemorySaver):
+    """In-memory saver that counts the statements PostgresSaver would issue."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        # InMemorySaver keeps its storage in self.blobs and self.writes
+        self.n_checkpoints = 0
+        self.n_blobs = 0
+        self.n_writes = 0
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self.n_checkpoints += 1
+        self.n_blobs += len(new_versions)
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.n_writes += len(writes)
+        super().put_writes(config, writes, task_id, task_path)
+
+    @property
+    def statements(self) -> int:
+        return self.n_checkpoints + self.n_blobs + self.n_writes
+
+
+class _FakeAgent:
+    """Stand-in for Agent that returns canned text per state."""
+
+    def __init__(self, lg_config: str) -> None:
+        self.config = {"name": "benchmark-agent", "lg_state_machine_config": lg_config}
+
+    def create_response_with_retry(
+        self, messages: list[Any], max_retries: int = 3, **kwargs: Any
+    ) -> str:
+        state_name = kwargs.get("current_state_name") or ""
+        return RESPONSES.get(state_name, "YES - acknowledged, moving on.")
+
+
+def run(lg_config: str, messages: list[str], mode: str) -> tuple[int, CountingSaver]:
+    saver = CountingSaver()
+    try:
+        with patch.object(
+            lg_flow_state_machine, "get_postgres_checkpointer", return_value=saver
+        ):
+            session = ConversationSession(_FakeAgent(lg_config))
+        session.state_machine.checkpoint_durability = CHECKPOINT_DURABILITY_MODES[mode]
+        for message in messages:
+            reply = session.send_message(message)
+            # send_message reports failures as text; a failed turn writes less
+            if reply.startswith("Error processing message"):
+                raise RuntimeError(f"Turn {message!r} failed: {reply}")
+    finally:
+        # Graphs are cached per checkpointer; don't keep one per run
+        clear_graph_cache()
+    return len(messages), saver
+
+
+def main() -> None:
+    print(
+        f"{'config':<24} {'durability':<10} {'turns':>5} {'checkpoints':>11} "
+        f"{'blobs':>6} {'writes':>6} {'stmts/turn':>10}"
+    )
+    for lg_config, messages in CONVERSATIONS.items():
+        for mode in CHECKPOINT_DURABILITY_MODES:
+            turns, saver = run(lg_config, messages, mode)
+            print(
+                f"{lg_config.rsplit('/', 1)[-1]:<24} {mode:<10} {turns:>5} "
+                f"{saver.n_checkpoints:>11} {saver.n_blobs:>6} {saver.n_writes:>6} "
+                f"{saver.statements / turns:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for building a StateMachine from an lg-prompt config.
+
+Compares constructing a StateMachine when its config has to be parsed,
+validated and compiled (the first time a YAML file's contents are seen)
+against one whose compiled config is memoized by file hash, as for every later
+session, agent or graph rebuild using the same file. Also times the per-node
+state lookups that now read the compiled state table.
+
+Usage:
+    uv run python benchmarks/bench_config_compile.py [--iterations N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable
+
+from agent_service.langgraph import config_compiler
+from agent_service.langgraph.lg_flow_state_machine import StateMachine
+from agent_service.langgraph.util import resolve_agent_service_path
+
+CONFIGS = [
+    "config/lg-prompts/routing.yaml",
+    "config/lg-prompts/lg-prompt-small.yaml",
+    "config/lg-prompts/lg-prompt-big.yaml",
+]
+
+
+def _time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'config':<24} {'compile us':>11} {'memoized us':>12} {'speedup':>8} "
+        f"{'lookups us':>11}"
+    )
+    for config in CONFIGS:
+        path = str(resolve_agent_service_path(config))
+
+        def cold() -> None:
+            config_compiler._compiled_configs.clear()
+            StateMachine(path)
+
+        compile_us = _time_per_call(cold, args.iterations)
+        memoized_us = _time_per_call(lambda: StateMachine(path), args.iterations)
+
+        state_machine = StateMachine(path)
+        state_names = list(state_machine.compiled.states)
+
+        def lookups() -> None:
+            for name in state_names:
+                state_machine.is_waiting_state(name)
+                state_machine.is_terminal_state(name)
+                state_machine.compiled.state(name)
+
+        lookups_us = _time_per_call(lookups, args.iterations * 10)
+        print(
+            f"{config.rsplit('/', 1)[-1]:<24} {compile_us:>11.1f} "
+            f"{memoized_us:>12.1f} {compile_us / memoized_us:>7.1f}x "
+            f"{lookups_us:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for rendering prompt placeholders against conversation length.
+
+Compares the previous StateMachine._format_text (copy the state, rebuild
+last_user_message and conversation_history from every message, compile the
+placeholder regex, substitute) against the precompiled templates it uses now,
+for a prompt that only reads state fields and one that includes the
+conversation history.
+
+Usage:
+    uv run python benchmarks/bench_format_text.py [--iterations N]
+"""
+
+import argparse
+import re
+import time
+from typing import Any, Callable
+
+from agent_service.langgraph.lg_flow_state_machine import StateMachine
+from agent_service.langgraph.util import resolve_agent_service_path
+from langchain_core.messages import AIMessage, HumanMessage
+
+CONVERSATION_LENGTHS = [2, 20, 200, 1000]
+
+TEMPLATES = {
+    "state fields": (
+        "Employee {authoritative_user_id} has a {laptop.model} bought on "
+        "{laptop.purchase_date}. Ticket: {ticket_number}. Reply with {{json}}."
+    ),
+    "history": (
+        "Classify the last message '{last_user_message}' given the "
+        "conversation so far:\n{conversation_history}"
+    ),
+}
+
+
+def _legacy_format_text(
+    text: str, state_data: dict[str, Any], authoritative_user_id: str | None = None
+) -> str:
+    """_format_text as it was before precompiled templates."""
+    format_data = dict(state_data)
+    if authoritative_user_id:
+        format_data["authoritative_user_id"] = authoritative_user_id
+
+    messages = state_data.get("messages", [])
+    last_user_message = ""
+    for msg in reversed(messages):
+        if msg.__class__.__name__ == "HumanMessage":
+            last_user_message = msg.content
+            break
+    format_data["last_user_message"] = last_user_message
+
+    conversation_history = ""
+    for msg in messages:
+        msg_type = msg.__class__.__name__
+        if msg_type == "HumanMessage":
+            conversation_history += f"User: {msg.content}\n"
+        elif msg_type == "AIMessage":
+            conversation_history += f"Assistant: {msg.content}\n"
+    format_data["conversation_history"] = conversation_history.strip()
+
+    text = text.replace("{{", "\x00ESCAPED_OPEN\x00")
+    text = text.replace("}}", "\x00ESCAPED_CLOSE\x00")
+
+    def replacer(match: re.Match[str]) -> str:
+        value: Any = format_data
+        try:
+            for part in match.group(1).split("."):
+                value = value[part] if isinstance(value, dict) else getattr(value, part)
+            return str(value)
+        except (KeyError, AttributeError, TypeError):
+            return match.group(0)
+
+    text = re.sub(r"\{([^}]+)\}", replacer, text)
+    text = text.replace("\x00ESCAPED_OPEN\x00", "{")
+    return text.replace("\x00ESCAPED_CLOSE\x00", "}")
+
+
+def _make_state(messages: int) -> dict[str, Any]:
+    return {
+        "messages": [
+            (
+                HumanMessage(content=f"user message {i} about my laptop")
+                if i % 2 == 0
+                else AIMessage(content=f"assistant reply {i} with some details")
+            )
+            for i in range(messages)
+        ],
+        "laptop": {"model": "ThinkPad X1", "purchase_date": "2021-03-01"},
+        "ticket_number": "INC0012345",
+    }
+
+
+def _time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    state_machine = StateMachine(
+        str(resolve_agent_service_path("config/lg-prompts/lg-prompt-small.yaml"))
+    )
+
+    print(
+        f"{'template':<14} {'messages':>8} {'legacy us':>10} "
+        f"{'compiled us':>12} {'speedup':>8}"
+    )
+    for name, template in TEMPLATES.items():
+        for length in CONVERSATION_LENGTHS:
+            state = _make_state(length)
+            assert _legacy_format_text(
+                template, state, "user@example.com"
+            ) == state_machine._format_text(template, state, "user@example.com")
+
+            legacy_us = _time_per_call(
+                lambda: _legacy_format_text(template, state, "user@example.com"),
+                args.iterations,
+            )
+            compiled_us = _time_per_call(
+                lambda: state_machine._format_text(template, state, "user@example.com"),
+                args.iterations,
+            )
+            print(
+                f"{name:<14} {length:>8} {legacy_us:>10.2f} {compiled_us:>12.2f} "
+                f"{legacy_us / compiled_us:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for per-node message lookups against conversation length.
+
+Compares scanning `messages` (human message count for waiting nodes, last user
+message, last assistant message) against the incremental message index in the
+agent state, for one new message per turn as in a running conversation.
+
+Usage:
+    uv run python benchmarks/bench_message_index.py [--iterations N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable
+
+from agent_service.langgraph.message_index import (
+    human_message_count,
+    last_ai_message,
+    last_human_message,
+)
+from langchain_core.messages import AIMessage, HumanMessage
+
+CONVERSATION_LENGTHS = [2, 20, 200, 1000]
+
+
+def _scan_lookups(state: dict[str, Any]) -> tuple[int, Any, Any]:
+    """The lookups as they were done before the index."""
+    messages = state["messages"]
+    human_count = sum(1 for msg in messages if isinstance(msg, HumanMessage))
+    last_user = next(
+        (m for m in reversed(messages) if m.__class__.__name__ == "HumanMessage"),
+        None,
+    )
+    last_ai = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+    return human_count, last_user, last_ai
+
+
+def _index_lookups(state: dict[str, Any]) -> tuple[int, Any, Any]:
+    return (
+        human_message_count(state),
+        last_human_message(state),
+        last_ai_message(state),
+    )
+
+
+def _make_state(messages: int) -> dict[str, Any]:
+    return {
+        "messages": [
+            (
+                HumanMessage(content=f"user message {i}")
+                if i % 2 == 0
+                else AIMessage(content=f"assistant reply {i}")
+            )
+            for i in range(messages)
+        ]
+    }
+
+
+def _time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'messages':>8} {'scan us':>10} {'index us':>10} {'speedup':>8}")
+    for length in CONVERSATION_LENGTHS:
+        state = _make_state(length)
+        _index_lookups(state)  # index built on an earlier turn
+
+        def next_turn() -> None:
+            # A new user message since the index was last updated
+            state["messages"].append(HumanMessage(content="next"))
+            _index_lookups(state)
+            state["messages"].pop()
+
+        assert _scan_lookups(state) == _index_lookups(state)
+        scan_us = _time_per_call(lambda: _scan_lookups(state), args.iterations)
+        index_us = _time_per_call(lambda: _index_lookups(state), args.iterations)
+        turn_us = _time_per_call(next_turn, args.iterations)
+        print(
+            f"{length:>8} {scan_us:>10.2f} {index_us:>10.2f} {scan_us / index_us:>7.1f}x"
+            f"   (with one new message: {turn_us:.2f} us)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for response analysis phrase tests against phrase count.
+
+Compares lower-casing and testing every configured phrase with `in` (as
+response_analysis, check_correction and check_phrases did before) against the
+precompiled PhraseMatcher, on an LLM-sized response that contains none of the
+phrases (the common case for exclude lists and non-matching conditions).
+
+Usage:
+    uv run python benchmarks/bench_phrase_matching.py [--iterations N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable
+
+from agent_service.langgraph.phrase_matcher import get_phrase_matcher
+
+PHRASE_COUNTS = [5, 20, 100, 400]
+
+RESPONSE = (
+    "Thanks for the details. Based on the purchase date your current laptop "
+    "is covered by the refresh policy, and I can show you the models that are "
+    "available for your location. Let me know which one you would like. "
+) * 4
+
+
+def _time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    response_lower = RESPONSE.lower()
+    print(f"{'phrases':>8} {'any(in) us':>11} {'matcher us':>11} {'speedup':>8}")
+    for count in PHRASE_COUNTS:
+        phrases = [f"Trigger Phrase Number {i}" for i in range(count)]
+        matcher = get_phrase_matcher(tuple(phrases))
+
+        def scan() -> bool:
+            return any(phrase.lower() in response_lower for phrase in phrases)
+
+        assert scan() == matcher.search(response_lower)
+        scan_us = _time_per_call(scan, args.iterations)
+        matcher_us = _time_per_call(
+            lambda: matcher.search(response_lower), args.iterations
+        )
+        print(
+            f"{count:>8} {scan_us:>11.2f} {matcher_us:>11.2f} "
+            f"{scan_us / matcher_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
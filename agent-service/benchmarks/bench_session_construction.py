@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for ConversationSession construction cost.
+
+Compares building a session the old way (parse the state machine YAML and
+compile a new StateGraph per session) against the cached compiled graph used
+by ConversationSession. An in-memory checkpointer is used so no database or
+LlamaStack server is needed.
+
+Usage:
+    uv run python benchmarks/bench_session_construction.py [--iterations N]
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Callable
+from unittest.mock import patch
+
+from agent_service.langgraph import lg_flow_state_machine
+from agent_service.langgraph.lg_flow_state_machine import (
+    ConversationSession,
+    StateMachine,
+    _create_graph,
+    clear_graph_cache,
+)
+from agent_service.langgraph.util import resolve_agent_service_path
+from langgraph.checkpoint.memory import MemorySaver
+
+CONFIGS = [
+    "config/lg-prompts/routing.yaml",
+    "config/lg-prompts/lg-prompt-big.yaml",
+]
+
+
+class _FakeAgent:
+    """Minimal stand-in for Agent; construction never calls the LLM."""
+
+    def __init__(self, lg_config: str) -> None:
+        self.config = {"name": "benchmark-agent", "lg_state_machine_config": lg_config}
+
+
+def _time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def _run_config(lg_config: str, checkpointer: MemorySaver, iterations: int) -> None:
+    config_path: Path = resolve_agent_service_path(lg_config)
+    agent = _FakeAgent(lg_config)
+
+    def uncached() -> None:
+        _create_graph(StateMachine(str(config_path)), checkpointer)
+
+    def cached() -> None:
+        ConversationSession(agent)
+
+    clear_graph_cache()
+    ConversationSession(agent)  # warm the cache
+
+    uncached_ms = _time_per_call(uncached, iterations)
+    cached_ms = _time_per_call(cached, iterations)
+    print(
+        f"{Path(lg_config).name:<40} {uncached_ms:>12.3f} {cached_ms:>10.3f} "
+        f"{uncached_ms / cached_ms:>7.0f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    checkpointer = MemorySaver()
+
+    print(f"{'config':<40} {'uncached ms':>12} {'cached ms':>10} {'speedup':>8}")
+    # ConversationSession gets its checkpointer from get_postgres_checkpointer
+    with patch.object(
+        lg_flow_state_machine, "get_postgres_checkpointer", return_value=checkpointer
+    ):
+        for lg_config in CONFIGS:
+            _run_config(lg_config, checkpointer, args.iterations)
+    clear_graph_cache()
+
+
+if __name__ == "__main__":
+    main()
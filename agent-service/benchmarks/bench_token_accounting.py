@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for per-session token accounting on the LLM call path.
+
+Compares scheduling one UPDATE per LLM call (a task per call, as
+count_tokens_from_response did before) against recording into the
+write-behind TokenAccumulator, for LLM calls made from turn worker threads
+across a number of concurrent sessions. The database is replaced by a stub
+that counts statements and waits a fixed round-trip time.
+
+Usage:
+    uv run python benchmarks/bench_token_accounting.py [--calls N] [--rtt-ms MS]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import threading
+import time
+from typing import Any, AsyncIterator
+
+import shared_models.database
+from agent_service.langgraph.token_accounting import TokenAccumulator
+from shared_models.session_token_service import SessionTokenService
+
+SESSION_COUNTS = [1, 10, 100]
+WORKER_THREADS = 8
+
+
+class _StubDatabase:
+    def __init__(self, rtt_ms: float) -> None:
+        self.rtt = rtt_ms / 1000
+        self.statements = 0
+
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[None]:
+        yield None
+
+    async def execute(self, *args: Any) -> bool:
+        self.statements += 1
+        await asyncio.sleep(self.rtt)
+        return True
+
+
+def _run_workers(calls: int, sessions: int, record: Any) -> float:
+    """Make `calls` LLM-call records from worker threads; returns us per call."""
+    per_thread = calls // WORKER_THREADS
+
+    def worker(offset: int) -> None:
+        for i in range(per_thread):
+            record(f"session-{(offset + i) % sessions}", 1200, 150)
+
+    threads = [
+        threading.Thread(target=worker, args=(n,)) for n in range(WORKER_THREADS)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter() - start) / (per_thread * WORKER_THREADS) * 1_000_000
+
+
+async def _per_call(calls: int, sessions: int, db: _StubDatabase) -> float:
+    loop = asyncio.get_running_loop()
+    tasks: list[Any] = []
+
+    def record(session_id: str, input_tokens: int, output_tokens: int) -> None:
+        future = asyncio.run_coroutine_threadsafe(
+            db.execute(session_id, input_tokens, output_tokens), loop
+        )
+        tasks.append(future)
+
+    us = await asyncio.to_thread(_run_workers, calls, sessions, record)
+    await asyncio.gather(*(asyncio.wrap_future(task) for task in tasks))
+    return us
+
+
+async def _batched(calls: int, sessions: int, db: _StubDatabase) -> float:
+    accumulator = TokenAccumulator(flush_interval_ms=1000, flush_calls=100)
+    accumulator.attach_loop()
+    flush_task = asyncio.create_task(accumulator.run())
+    us = await asyncio.to_thread(_run_workers, calls, sessions, accumulator.record)
+    flush_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await flush_task
+    await accumulator.flush()
+    return us
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=4000)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'sessions':>8} {'per-call us':>12} {'stmts':>6} "
+        f"{'batched us':>11} {'stmts':>6}"
+    )
+    for sessions in SESSION_COUNTS:
+        per_call_db = _StubDatabase(args.rtt_ms)
+        per_call_us = await _per_call(args.calls, sessions, per_call_db)
+
+        batched_db = _StubDatabase(args.rtt_ms)
+        shared_models.database.get_db_session = batched_db.session  # type: ignore[assignment]
+        SessionTokenService.apply_token_deltas = staticmethod(  # type: ignore[method-assign]
+            lambda db, deltas: batched_db.execute(deltas)
+        )
+        batched_us = await _batched(args.calls, sessions, batched_db)
+        print(
+            f"{sessions:>8} {per_call_us:>12.2f} {per_call_db.statements:>6} "
+            f"{batched_us:>11.2f} {batched_db.statements:>6}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for building the tools array on each LLM call.
+
+Compares rebuilding every MCP tool definition per call (compile + render, as
+create_response did before tool templates) against rendering the per-agent
+templates with only the per-request headers and allowed-tools filter. Vector
+stores are served by a fake LlamaStack client, so no server is needed and the
+numbers exclude the network round trip the old per-call lookup also paid.
+
+Usage:
+    uv run python benchmarks/bench_tool_construction.py [--iterations N]
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import yaml
+from agent_service.knowledge import vector_store_resolver
+from agent_service.knowledge.vector_store_resolver import VectorStoreResolver
+from agent_service.langgraph.responses_agent import Agent
+from agent_service.langgraph.util import resolve_agent_service_path
+
+AGENT_CONFIGS = [
+    "config/agents/laptop-refresh-agent.yaml",
+    "config/agents/routing-agent.yaml",
+]
+
+
+class _FakeVectorStores:
+    def list(self) -> Any:
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(
+                    name="laptop-refresh-kb-bench", id="vs_bench", created_at=1
+                )
+            ]
+        )
+
+
+def _make_agent(config_file: str) -> Agent:
+    """Build an Agent without contacting LlamaStack."""
+    with open(resolve_agent_service_path(config_file)) as f:
+        config = yaml.safe_load(f)
+    agent = Agent.__new__(Agent)
+    agent.agent_name = config["name"]
+    agent.config = config
+    agent.mcp_tool_templates = agent._compile_mcp_tool_templates(
+        config.get("mcp_servers", [])
+    )
+    return agent
+
+
+def _time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    vector_store_resolver._vector_store_resolver = VectorStoreResolver(
+        client_factory=lambda: SimpleNamespace(vector_stores=_FakeVectorStores())
+    )
+
+    print(f"{'agent':<24} {'rebuild us':>11} {'template us':>12} {'speedup':>8}")
+    for config_file in AGENT_CONFIGS:
+        agent = _make_agent(config_file)
+        mcp_server_configs = agent.config.get("mcp_servers", [])
+
+        def rebuild() -> None:
+            agent.mcp_tool_templates = agent._compile_mcp_tool_templates(
+                mcp_server_configs
+            )
+            agent._get_tools_to_use(True, "user@example.com", None)
+
+        def render() -> None:
+            agent._get_tools_to_use(True, "user@example.com", None)
+
+        rebuild_us = _time_per_call(rebuild, args.iterations)
+        render_us = _time_per_call(render, args.iterations)
+        print(
+            f"{agent.agent_name:<24} {rebuild_us:>11.2f} {render_us:>12.2f} "
+            f"{rebuild_us / render_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
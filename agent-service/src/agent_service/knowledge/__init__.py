@@ -1,5 +1,6 @@
 """Knowledge base management for agent service."""
 
 from .kb_manager import KnowledgeBaseManager
+from .vector_store_resolver import VectorStoreResolver, get_vector_store_resolver
 
-__all__ = ["KnowledgeBaseManager"]
+__all__ = ["KnowledgeBaseManager", "VectorStoreResolver", "get_vector_store_resolver"]
@@ -5,6 +5,8 @@ from typing import Any, Optional
 from agent_service.utils import create_llamastack_client
 from shared_models import configure_logging
 
+from .vector_store_resolver import get_vector_store_resolver
+
 logger = configure_logging("agent-service")
 
 
@@ -95,6 +97,11 @@ class KnowledgeBaseManager:
                 kb_directory, vector_store_id
             )
 
+            # Make the new store visible to agents in this process right away
+            get_vector_store_resolver().register(
+                kb_name, str(vector_store_id), vector_store_name
+            )
+
             if uploaded_files > 0:
                 logger.info(
                     "Successfully uploaded files via LlamaStack to vector store",
@@ -0,0 +1,180 @@
+"""
+Shared knowledge base name -> vector store ID resolution.
+
+Knowledge bases are registered as vector stores named "<kb_name>-kb-<suffix>";
+agents use the most recently created matching store. Listing vector stores on
+every lookup costs a LlamaStack round trip per knowledge base whenever an
+agent's tools are built (at init and on most create_response calls), so the
+store list is cached here: it is listed once at service startup, refreshed on a
+TTL, and updated directly when KnowledgeBaseManager registers a new store.
+
+Configuration (environment variables):
+    VECTOR_STORE_CACHE_TTL_SECONDS: how long the cached store list is used
+        before it is listed again (default 300, 0 disables caching)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from agent_service.utils import create_llamastack_client
+from shared_models import configure_logging
+
+logger = configure_logging("agent-service")
+
+# Unknown knowledge bases trigger a refresh at most this often, so a store
+# registered by another process is picked up without waiting for the full TTL
+_MISS_REFRESH_SECONDS = 30.0
+
+
+class VectorStoreResolver:
+    """Resolves knowledge base names to the latest vector store ID from memory."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        client_factory: Callable[[], Any] = create_llamastack_client,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._client_factory = client_factory
+        self._client: Any = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # (name, id, created_at) of every listed vector store
+        self._stores: list[tuple[str, str, Any]] = []
+        self._resolved: dict[str, Optional[str]] = {}
+        self._refreshed_at: Optional[float] = None
+        self._hits = 0
+        self._refreshes = 0
+
+    def resolve(self, kb_name: str) -> str:
+        """Get the latest vector store ID for a knowledge base.
+
+        Falls back to the knowledge base name if no store is found, as before.
+        """
+        now = time.monotonic()
+        with self._lock:
+            fresh = (
+                self._refreshed_at is not None
+                and now - self._refreshed_at < self.ttl_seconds
+            )
+            if fresh:
+                store_id = self._resolve_locked(kb_name)
+                recent = now - (self._refreshed_at or now) < _MISS_REFRESH_SECONDS
+                if store_id is not None or recent:
+                    self._hits += 1
+                    return store_id or kb_name
+
+        # One thread lists the stores; concurrent lookups wait and reuse it
+        with self._refresh_lock:
+            with self._lock:
+                refreshed = self._refreshed_at is not None and self._refreshed_at >= now
+            if not refreshed:
+                self.refresh()
+
+        with self._lock:
+            store_id = self._resolve_locked(kb_name)
+        if store_id is None:
+            logger.warning(
+                "No vector store found for knowledge base, using fallback",
+                kb_name=kb_name,
+            )
+            return kb_name
+        return store_id
+
+    def refresh(self) -> bool:
+        """List vector stores from LlamaStack and replace the cached list.
+
+        On failure the previous list is kept (if any) so lookups keep working.
+        """
+        try:
+            if self._client is None:
+                self._client = self._client_factory()
+            vector_stores = self._client.vector_stores.list()
+            stores = [
+                (str(vs.name), str(vs.id), vs.created_at)
+                for vs in vector_stores.data
+                if vs.name and vs.id is not None
+            ]
+        except Exception as e:
+            logger.error(
+                "Error listing vector stores",
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            with self._lock:
+                if self._stores:
+                    # Retry after the miss interval instead of on every lookup
+                    self._refreshed_at = time.monotonic() - max(
+                        0.0, self.ttl_seconds - _MISS_REFRESH_SECONDS
+                    )
+            return False
+
+        with self._lock:
+            self._stores = stores
+            self._resolved = {}
+            self._refreshed_at = time.monotonic()
+            self._refreshes += 1
+        logger.debug("Refreshed vector store cache", store_count=len(stores))
+        return True
+
+    def register(
+        self, kb_name: str, vector_store_id: str, vector_store_name: str
+    ) -> None:
+        """Record a newly created vector store so it is used immediately."""
+        with self._lock:
+            self._stores.append((vector_store_name, vector_store_id, time.time()))
+            self._resolved.pop(kb_name, None)
+            for name in list(self._resolved):
+                if name in vector_store_name:
+                    self._resolved.pop(name)
+
+    def invalidate(self) -> None:
+        """Force the next lookup to list vector stores again."""
+        with self._lock:
+            self._refreshed_at = None
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "stores": len(self._stores),
+                "resolved": {
+                    name: store_id for name, store_id in self._resolved.items()
+                },
+                "hits": self._hits,
+                "refreshes": self._refreshes,
+                "age_seconds": (
+                    round(time.monotonic() - self._refreshed_at, 1)
+                    if self._refreshed_at is not None
+                    else None
+                ),
+            }
+
+    def _resolve_locked(self, kb_name: str) -> Optional[str]:
+        if kb_name not in self._resolved:
+            matching = [store for store in self._stores if kb_name in store[0]]
+            self._resolved[kb_name] = (
+                max(matching, key=lambda store: store[2])[1] if matching else None
+            )
+        return self._resolved[kb_name]
+
+
+# Global resolver instance
+_vector_store_resolver: Optional[VectorStoreResolver] = None
+_vector_store_resolver_lock = threading.Lock()
+
+
+def get_vector_store_resolver() -> VectorStoreResolver:
+    """Get the global vector store resolver."""
+    global _vector_store_resolver
+    if _vector_store_resolver is None:
+        with _vector_store_resolver_lock:
+            if _vector_store_resolver is None:
+                _vector_store_resolver = VectorStoreResolver(
+                    ttl_seconds=float(
+                        os.getenv("VECTOR_STORE_CACHE_TTL_SECONDS", "300")
+                    )
+                )
+    return _vector_store_resolver
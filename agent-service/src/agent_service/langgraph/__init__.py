@@ -5,10 +5,16 @@ and state machine functionality within the agent service.
 """
 
 from .lg_flow_state_machine import ConversationSession, StateMachine
-from .responses_agent import ResponsesAgentManager
+from .responses_agent import (
+    ResponsesAgentManager,
+    get_agent_manager,
+    reload_agent_manager,
+)
 
 __all__ = [
     "StateMachine",
     "ConversationSession",
     "ResponsesAgentManager",
+    "get_agent_manager",
+    "reload_agent_manager",
 ]
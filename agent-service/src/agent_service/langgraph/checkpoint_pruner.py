@@ -0,0 +1,355 @@
+"""
+Background pruning and compaction of LangGraph checkpoint tables.
+
+PostgresSaver keeps every intermediate checkpoint of every thread, and routing
+handoffs and conversation resets start new threads all the time. This module
+periodically:
+
+- deletes all checkpoint data for threads whose RequestSession is no longer
+  active (or has expired), and for orphaned threads no session points to that
+  have been idle longer than CHECKPOINT_ORPHAN_TTL_HOURS
+- compacts idle threads down to the latest CHECKPOINT_KEEP_LATEST checkpoints,
+  removing the pending writes and channel blobs only the old ones referenced
+
+Work is done in batches of CHECKPOINT_PRUNE_BATCH_SIZE threads, one transaction
+per batch, and a transaction-level advisory lock keeps concurrent uvicorn
+workers and replicas from pruning at the same time.
+
+Configuration (environment variables):
+    CHECKPOINT_PRUNE_ENABLED: "true" (default) or "false"
+    CHECKPOINT_PRUNE_INTERVAL_SECONDS: seconds between runs (default 3600)
+    CHECKPOINT_KEEP_LATEST: checkpoints kept per thread (default 3)
+    CHECKPOINT_PRUNE_BATCH_SIZE: threads per transaction (default 100)
+    CHECKPOINT_PRUNE_IDLE_SECONDS: only compact threads idle this long (default 600)
+    CHECKPOINT_ORPHAN_TTL_HOURS: delete unreferenced threads idle this long
+        (default 24, 0 disables)
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from shared_models import configure_logging
+from shared_models.database import get_database_manager
+
+from .postgres_checkpoint import forget_checkpoint_threads
+
+logger = configure_logging("agent-service")
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+_PRUNE_LOCK_KEY = 0x4C47434B  # "LGCK"
+
+# Upper bound on batches per run so one run can't monopolize the pool
+_MAX_BATCHES_PER_RUN = 1000
+
+_INACTIVE_THREADS_SQL = """
+SELECT DISTINCT s.conversation_thread_id
+FROM request_sessions s
+WHERE s.conversation_thread_id IS NOT NULL
+  AND (s.status <> 'ACTIVE' OR (s.expires_at IS NOT NULL AND s.expires_at < now()))
+  AND EXISTS (
+      SELECT 1 FROM checkpoints c WHERE c.thread_id = s.conversation_thread_id
+  )
+  AND NOT EXISTS (
+      SELECT 1 FROM request_sessions a
+      WHERE a.conversation_thread_id = s.conversation_thread_id
+        AND a.status = 'ACTIVE'
+        AND (a.expires_at IS NULL OR a.expires_at >= now())
+  )
+LIMIT %(limit)s
+"""
+
+_ORPHAN_THREADS_SQL = """
+SELECT c.thread_id
+FROM checkpoints c
+WHERE NOT EXISTS (
+    SELECT 1 FROM request_sessions s WHERE s.conversation_thread_id = c.thread_id
+)
+GROUP BY c.thread_id
+HAVING max((c.checkpoint ->> 'ts')::timestamptz)
+    < now() - %(idle_seconds)s * interval '1 second'
+LIMIT %(limit)s
+"""
+
+_COMPACTABLE_THREADS_SQL = """
+SELECT c.thread_id
+FROM checkpoints c
+GROUP BY c.thread_id, c.checkpoint_ns
+HAVING count(*) > %(keep)s
+   AND max((c.checkpoint ->> 'ts')::timestamptz)
+    < now() - %(idle_seconds)s * interval '1 second'
+LIMIT %(limit)s
+"""
+
+_DELETE_THREAD_SQL = {
+    "checkpoint_writes": "DELETE FROM checkpoint_writes WHERE thread_id = ANY(%(threads)s)",
+    "checkpoint_blobs": "DELETE FROM checkpoint_blobs WHERE thread_id = ANY(%(threads)s)",
+    "checkpoints": "DELETE FROM checkpoints WHERE thread_id = ANY(%(threads)s)",
+}
+
+_COMPACT_CHECKPOINTS_SQL = """
+DELETE FROM checkpoints c
+USING (
+    SELECT thread_id, checkpoint_ns, checkpoint_id,
+           row_number() OVER (
+               PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+           ) AS rn
+    FROM checkpoints
+    WHERE thread_id = ANY(%(threads)s)
+) r
+WHERE c.thread_id = r.thread_id
+  AND c.checkpoint_ns = r.checkpoint_ns
+  AND c.checkpoint_id = r.checkpoint_id
+  AND r.rn > %(keep)s
+"""
+
+_COMPACT_WRITES_SQL = """
+DELETE FROM checkpoint_writes w
+WHERE w.thread_id = ANY(%(threads)s)
+  AND NOT EXISTS (
+      SELECT 1 FROM checkpoints c
+      WHERE c.thread_id = w.thread_id
+        AND c.checkpoint_ns = w.checkpoint_ns
+        AND c.checkpoint_id = w.checkpoint_id
+  )
+"""
+
+# Message blobs written by DeltaPostgresSaver ("__msg__") aren't referenced via
+# channel_versions; they are shared across checkpoints and only removed with
+# the whole thread
+_COMPACT_BLOBS_SQL = """
+DELETE FROM checkpoint_blobs b
+WHERE b.thread_id = ANY(%(threads)s)
+  AND b.channel <> '__msg__'
+  AND NOT EXISTS (
+      SELECT 1 FROM checkpoints c
+      WHERE c.thread_id = b.thread_id
+        AND c.checkpoint_ns = b.checkpoint_ns
+        AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+  )
+"""
+
+
+@dataclass
+class PruneResult:
+    """Rows reclaimed by one pruning run."""
+
+    threads_deleted: int = 0
+    threads_compacted: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    blobs_deleted: int = 0
+    batches: int = 0
+    duration_ms: float = 0.0
+    skipped: bool = False  # Another worker held the prune lock
+
+    @property
+    def rows_deleted(self) -> int:
+        return self.checkpoints_deleted + self.writes_deleted + self.blobs_deleted
+
+
+class CheckpointPruner:
+    """Deletes stale LangGraph threads and compacts old checkpoints in batches."""
+
+    def __init__(
+        self,
+        keep_latest: int = 3,
+        batch_size: int = 100,
+        idle_seconds: int = 600,
+        orphan_ttl_hours: float = 24.0,
+    ) -> None:
+        self.keep_latest = max(1, keep_latest)
+        self.batch_size = max(1, batch_size)
+        self.idle_seconds = max(0, idle_seconds)
+        self.orphan_ttl_hours = orphan_ttl_hours
+        self.last_result: Optional[PruneResult] = None
+
+    def run(self) -> PruneResult:
+        """Run one full pruning pass (blocking; call from a worker thread)."""
+        result = PruneResult()
+        start = time.perf_counter()
+
+        # Whole threads first so compaction doesn't waste work on them
+        self._run_batches(result, self._select_inactive_threads, self._delete_threads)
+        if self.orphan_ttl_hours > 0 and not result.skipped:
+            self._run_batches(result, self._select_orphan_threads, self._delete_threads)
+        if not result.skipped:
+            self._run_batches(
+                result, self._select_compactable_threads, self._compact_threads
+            )
+
+        result.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.last_result = result
+        return result
+
+    def _run_batches(self, result: PruneResult, select: Any, apply: Any) -> None:
+        pool = get_database_manager().get_sync_pool()
+        for _ in range(_MAX_BATCHES_PER_RUN):
+            with pool.connection() as conn:
+                with conn.transaction():
+                    cur = conn.cursor()
+                    cur.execute(
+                        "SELECT pg_try_advisory_xact_lock(%s) AS locked",
+                        (_PRUNE_LOCK_KEY,),
+                    )
+                    row: Any = cur.fetchone()
+                    if not row or not row["locked"]:
+                        result.skipped = True
+                        return
+
+                    threads = select(cur)
+                    if not threads:
+                        return
+                    apply(cur, threads, result)
+                    result.batches += 1
+
+            if apply == self._delete_threads:
+                # Committed; message keys cached for these threads are now stale
+                forget_checkpoint_threads(threads)
+
+            if len(threads) < self.batch_size:
+                return
+
+    def _select_inactive_threads(self, cur: Any) -> list[str]:
+        cur.execute(_INACTIVE_THREADS_SQL, {"limit": self.batch_size})
+        return [row["conversation_thread_id"] for row in cur.fetchall()]
+
+    def _select_orphan_threads(self, cur: Any) -> list[str]:
+        cur.execute(
+            _ORPHAN_THREADS_SQL,
+            {"idle_seconds": self.orphan_ttl_hours * 3600, "limit": self.batch_size},
+        )
+        return [row["thread_id"] for row in cur.fetchall()]
+
+    def _select_compactable_threads(self, cur: Any) -> list[str]:
+        cur.execute(
+            _COMPACTABLE_THREADS_SQL,
+            {
+                "keep": self.keep_latest,
+                "idle_seconds": self.idle_seconds,
+                "limit": self.batch_size,
+            },
+        )
+        return list({row["thread_id"] for row in cur.fetchall()})
+
+    def _delete_threads(
+        self, cur: Any, threads: list[str], result: PruneResult
+    ) -> None:
+        params = {"threads": threads}
+        cur.execute(_DELETE_THREAD_SQL["checkpoint_writes"], params)
+        result.writes_deleted += cur.rowcount
+        cur.execute(_DELETE_THREAD_SQL["checkpoint_blobs"], params)
+        result.blobs_deleted += cur.rowcount
+        cur.execute(_DELETE_THREAD_SQL["checkpoints"], params)
+        result.checkpoints_deleted += cur.rowcount
+        result.threads_deleted += len(threads)
+
+    def _compact_threads(
+        self, cur: Any, threads: list[str], result: PruneResult
+    ) -> None:
+        params = {"threads": threads, "keep": self.keep_latest}
+        cur.execute(_COMPACT_CHECKPOINTS_SQL, params)
+        result.checkpoints_deleted += cur.rowcount
+        cur.execute(_COMPACT_WRITES_SQL, params)
+        result.writes_deleted += cur.rowcount
+        cur.execute(_COMPACT_BLOBS_SQL, params)
+        result.blobs_deleted += cur.rowcount
+        result.threads_compacted += len(threads)
+
+
+# Global pruner instance and background task
+_pruner: Optional[CheckpointPruner] = None
+_pruner_task: Optional[asyncio.Task[None]] = None
+
+
+def get_checkpoint_pruner() -> CheckpointPruner:
+    """Get the global checkpoint pruner configured from the environment."""
+    global _pruner
+    if _pruner is None:
+        _pruner = CheckpointPruner(
+            keep_latest=int(os.getenv("CHECKPOINT_KEEP_LATEST", "3")),
+            batch_size=int(os.getenv("CHECKPOINT_PRUNE_BATCH_SIZE", "100")),
+            idle_seconds=int(os.getenv("CHECKPOINT_PRUNE_IDLE_SECONDS", "600")),
+            orphan_ttl_hours=float(os.getenv("CHECKPOINT_ORPHAN_TTL_HOURS", "24")),
+        )
+    return _pruner
+
+
+def get_checkpoint_prune_stats() -> dict[str, Any]:
+    """Return the result of the most recent pruning run (empty if none yet)."""
+    if _pruner is None or _pruner.last_result is None:
+        return {}
+    stats = asdict(_pruner.last_result)
+    stats["rows_deleted"] = _pruner.last_result.rows_deleted
+    return stats
+
+
+async def _prune_loop(interval: float) -> None:
+    pruner = get_checkpoint_pruner()
+    # Short initial delay keeps pruning out of startup without depending on uptime
+    await asyncio.sleep(min(interval, 60.0))
+    while True:
+        try:
+            result = await asyncio.to_thread(pruner.run)
+            if result.skipped:
+                logger.debug(
+                    "Checkpoint pruning skipped, another worker holds the lock"
+                )
+            else:
+                logger.info(
+                    "Checkpoint pruning completed",
+                    threads_deleted=result.threads_deleted,
+                    threads_compacted=result.threads_compacted,
+                    checkpoints_deleted=result.checkpoints_deleted,
+                    writes_deleted=result.writes_deleted,
+                    blobs_deleted=result.blobs_deleted,
+                    rows_deleted=result.rows_deleted,
+                    batches=result.batches,
+                    duration_ms=result.duration_ms,
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(
+                "Checkpoint pruning failed",
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+        await asyncio.sleep(interval)
+
+
+def start_checkpoint_pruner() -> None:
+    """Start the background pruning task if enabled."""
+    global _pruner_task
+
+    if os.getenv("CHECKPOINT_PRUNE_ENABLED", "true").lower() != "true":
+        logger.info("Checkpoint pruning disabled")
+        return
+    if _pruner_task is not None:
+        return
+
+    interval = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "3600"))
+    _pruner_task = asyncio.create_task(_prune_loop(interval))
+    pruner = get_checkpoint_pruner()
+    logger.info(
+        "Started checkpoint pruner",
+        interval_seconds=interval,
+        keep_latest=pruner.keep_latest,
+        batch_size=pruner.batch_size,
+        orphan_ttl_hours=pruner.orphan_ttl_hours,
+    )
+
+
+async def stop_checkpoint_pruner() -> None:
+    """Cancel the background pruning task."""
+    global _pruner_task
+
+    if _pruner_task is not None:
+        _pruner_task.cancel()
+        try:
+            await _pruner_task
+        except asyncio.CancelledError:
+            pass
+        _pruner_task = None
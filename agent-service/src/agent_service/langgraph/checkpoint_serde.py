@@ -0,0 +1,83 @@
+"""
+Checkpoint serialization helpers for the agent-service checkpointer.
+
+CompressedSerializer wraps LangGraph's default JsonPlusSerializer and
+zlib-compresses payloads above a size threshold. The compression is recorded in
+the stored type tag ("zlib+<type>"), so uncompressed blobs written by the
+default serializer remain readable.
+
+The message-reference helpers are used by DeltaPostgresSaver to store the
+append-only `messages` channel as one blob per message plus a compact list of
+message keys per checkpoint, instead of re-serializing the whole history into
+every checkpoint.
+"""
+
+import hashlib
+import zlib
+from typing import Any, Optional
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+COMPRESSED_TYPE_PREFIX = "zlib+"
+
+# Channel holding the conversation history in every agent state
+MESSAGES_CHANNEL = "messages"
+# Pseudo-channel in checkpoint_blobs for individually stored messages
+MESSAGE_BLOB_CHANNEL = "__msg__"
+# Blob type of a messages channel value stored as message keys
+MESSAGE_REFS_TYPE = "msgrefs"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Serializer that compresses large payloads produced by another serializer."""
+
+    def __init__(
+        self,
+        min_bytes: int = 1024,
+        level: int = 6,
+        serde: Optional[SerializerProtocol] = None,
+    ) -> None:
+        self.min_bytes = min_bytes
+        self.level = level
+        self.serde = serde or JsonPlusSerializer()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.serde.loads(data)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) >= self.min_bytes:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return COMPRESSED_TYPE_PREFIX + type_, compressed
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(COMPRESSED_TYPE_PREFIX):
+            return self.serde.loads_typed(
+                (type_[len(COMPRESSED_TYPE_PREFIX) :], zlib.decompress(payload))
+            )
+        return self.serde.loads_typed(data)
+
+
+class MessageRefs(list[str]):
+    """Placeholder for a messages channel value that still has to be resolved."""
+
+
+def message_key(type_: str, data: bytes) -> str:
+    """Content-address a serialized message (same content -> same key)."""
+    return hashlib.sha1(type_.encode() + b"\0" + data).hexdigest()
+
+
+def dump_message_refs(keys: list[str]) -> bytes:
+    return zlib.compress(",".join(keys).encode())
+
+
+def load_message_refs(data: bytes) -> MessageRefs:
+    decoded = zlib.decompress(data).decode()
+    return MessageRefs(decoded.split(",") if decoded else [])
@@ -0,0 +1,400 @@
+"""
+Compiler for lg-prompt state machine configs.
+
+An lg-prompt YAML is parsed, validated and compiled once into a read-only
+CompiledStateMachineConfig: the state table with resolved transitions and
+prompt rules, the settings the engine reads on every node, and the
+precompiled placeholder templates, phrase matchers and pre-classifiers.
+Compiled configs are memoized by the SHA-256 of the file contents, so every
+StateMachine built from the same YAML (for any agent or session, and across
+graph rebuilds) shares one compiled config, and an edited file compiles anew.
+
+Validation reports every problem in the config at once (unknown state types,
+transitions to states that don't exist, invalid extract_data patterns, ...)
+as a StateMachineConfigError when the config is compiled, instead of the
+conversation failing when it reaches the broken state.
+
+The raw YAML blocks referenced from the compiled config are shared by all
+sessions and must not be modified.
+"""
+
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+import yaml
+from shared_models import configure_logging
+
+from .phrase_matcher import (
+    PHRASE_LIST_KEYS,
+    PhraseMatcher,
+    get_pattern,
+    get_phrase_matcher,
+)
+from .pre_classifier import PreClassifier, build_pre_classifier
+from .text_templates import TextTemplate, get_text_template
+
+logger = configure_logging("agent-service")
+
+STATE_TYPES = frozenset(
+    {"llm_processor", "intent_classifier", "llm_validator", "waiting", "terminal"}
+)
+
+# settings.checkpoint_durability values mapped to LangGraph durability modes
+CHECKPOINT_DURABILITY_MODES = {
+    "step": "async",  # checkpoint after every node (LangGraph default)
+    "exit": "exit",  # checkpoint only when the graph pauses or ends
+}
+
+DEFAULT_INITIAL_STATE = "collect_employee_id"
+DEFAULT_TERMINAL_STATE = "end"
+DEFAULT_EMPTY_RESPONSE_RETRY_COUNT = 3
+
+
+class StateMachineConfigError(RuntimeError):
+    """An lg-prompt config that can't be loaded or fails validation."""
+
+
+@dataclass(frozen=True)
+class CompiledState:
+    """One state of a compiled config."""
+
+    name: str
+    type: str
+    # The state's YAML block, as passed to the StateMachine.process_* methods
+    config: dict[str, Any]
+    transitions: Mapping[str, str]
+    # conditional_prompts entries other than "default", in order, and the
+    # prompt used when none of them match
+    prompt_conditions: tuple[dict[str, Any], ...]
+    default_prompt: str
+
+    @property
+    def is_waiting(self) -> bool:
+        return self.type == "waiting"
+
+
+@dataclass(frozen=True)
+class CompiledStateMachineConfig:
+    """Read-only, validated form of an lg-prompt config."""
+
+    digest: str
+    raw: dict[str, Any]
+    settings: Mapping[str, Any]
+    state_schema: Mapping[str, Any]
+    states: Mapping[str, CompiledState]
+    initial_state: str
+    terminal_state: str
+    checkpoint_durability: str
+    empty_response_retry_count: int
+    # Placeholder templates by text, phrase matchers by their phrases as a
+    # tuple, and pre-classifiers by intent_classifier state name
+    text_templates: Mapping[str, TextTemplate]
+    phrase_matchers: Mapping[tuple[Any, ...], PhraseMatcher]
+    pre_classifiers: Mapping[str, PreClassifier]
+
+    def state(self, name: str) -> Optional[CompiledState]:
+        return self.states.get(name)
+
+    def is_waiting_state(self, name: str) -> bool:
+        state = self.states.get(name)
+        return state is not None and state.is_waiting
+
+    def is_terminal_state(self, name: str) -> bool:
+        return name == self.terminal_state
+
+
+def prompt_rules(
+    state_config: dict[str, Any],
+) -> tuple[tuple[dict[str, Any], ...], str]:
+    """Split a state's prompts into its conditional prompts and its fallback.
+
+    Returns the conditional_prompts entries other than "default" in order, and
+    the prompt used when none of them match: the first "default" entry if the
+    state has conditional prompts, otherwise the state's `prompt`.
+    """
+    conditional_prompts = state_config.get("conditional_prompts") or []
+    conditions = tuple(
+        condition_config
+        for condition_config in conditional_prompts
+        if condition_config.get("condition") != "default"
+    )
+    for condition_config in conditional_prompts:
+        if condition_config.get("condition") == "default":
+            return conditions, str(condition_config.get("prompt", ""))
+    return conditions, str(state_config.get("prompt", ""))
+
+
+class _Compiler:
+    """Single-use compiler for one parsed config."""
+
+    def __init__(self, config: dict[str, Any], config_path: str) -> None:
+        self.config = config
+        self.config_path = config_path
+        self.errors: list[str] = []
+        self.text_templates: dict[str, TextTemplate] = {}
+        self.phrase_matchers: dict[tuple[Any, ...], PhraseMatcher] = {}
+
+    def compile(self, digest: str) -> CompiledStateMachineConfig:
+        settings = self._mapping(self.config.get("settings"), "settings")
+        state_schema = self._mapping(self.config.get("state_schema"), "state_schema")
+        states_config = self._mapping(self.config.get("states"), "states")
+        if not states_config:
+            self.errors.append("states: no states defined")
+
+        states: dict[str, CompiledState] = {}
+        pre_classifiers: dict[str, PreClassifier] = {}
+        for name, state_config in states_config.items():
+            state = self._compile_state(str(name), state_config)
+            if state is None:
+                continue
+            states[state.name] = state
+            if state.type == "intent_classifier":
+                pre_classifier = build_pre_classifier(state.config)
+                if pre_classifier is not None:
+                    pre_classifiers[state.name] = pre_classifier
+
+        initial_state = str(settings.get("initial_state", DEFAULT_INITIAL_STATE))
+        terminal_state = settings.get("terminal_state", DEFAULT_TERMINAL_STATE)
+        terminal_state = (
+            str(terminal_state)
+            if terminal_state is not None
+            else DEFAULT_TERMINAL_STATE
+        )
+        if states:
+            self._check_target(states, "settings.initial_state", initial_state)
+            self._check_target(states, "settings.terminal_state", terminal_state)
+            for state in states.values():
+                self._check_state_targets(states, state)
+
+        self._precompile(self.config)
+        checkpoint_durability = self._checkpoint_durability(settings)
+        empty_response_retry_count = self._retry_count(settings)
+
+        if self.errors:
+            raise StateMachineConfigError(
+                f"Invalid state machine config {self.config_path}: "
+                + "; ".join(self.errors)
+            )
+
+        return CompiledStateMachineConfig(
+            digest=digest,
+            raw=self.config,
+            settings=MappingProxyType(settings),
+            state_schema=MappingProxyType(state_schema),
+            states=MappingProxyType(states),
+            initial_state=initial_state,
+            terminal_state=terminal_state,
+            checkpoint_durability=checkpoint_durability,
+            empty_response_retry_count=empty_response_retry_count,
+            text_templates=MappingProxyType(self.text_templates),
+            phrase_matchers=MappingProxyType(self.phrase_matchers),
+            pre_classifiers=MappingProxyType(pre_classifiers),
+        )
+
+    def _mapping(self, value: Any, where: str) -> dict[str, Any]:
+        if value is None:
+            return {}
+        if not isinstance(value, dict):
+            self.errors.append(f"{where}: expected a mapping")
+            return {}
+        return value
+
+    def _compile_state(self, name: str, state_config: Any) -> Optional[CompiledState]:
+        where = f"states.{name}"
+        if not isinstance(state_config, dict):
+            self.errors.append(f"{where}: expected a mapping")
+            return None
+
+        state_type = str(state_config.get("type", ""))
+        if state_type not in STATE_TYPES:
+            self.errors.append(f"{where}.type: unknown state type '{state_type}'")
+
+        transitions = self._mapping(
+            state_config.get("transitions"), f"{where}.transitions"
+        )
+
+        conditional_prompts = state_config.get("conditional_prompts")
+        if conditional_prompts and not (
+            isinstance(conditional_prompts, list)
+            and all(isinstance(item, dict) for item in conditional_prompts)
+        ):
+            self.errors.append(
+                f"{where}.conditional_prompts: expected a list of mappings"
+            )
+            prompt_conditions: tuple[dict[str, Any], ...] = ()
+            default_prompt = str(state_config.get("prompt", ""))
+        else:
+            prompt_conditions, default_prompt = prompt_rules(state_config)
+
+        return CompiledState(
+            name=name,
+            type=state_type,
+            config=state_config,
+            transitions=MappingProxyType(
+                {str(event): str(target) for event, target in transitions.items()}
+            ),
+            prompt_conditions=prompt_conditions,
+            default_prompt=default_prompt,
+        )
+
+    def _check_target(
+        self, states: Mapping[str, CompiledState], where: str, target: Any
+    ) -> None:
+        if target is not None and str(target) not in states:
+            self.errors.append(f"{where}: unknown state '{target}'")
+
+    def _check_state_targets(
+        self, states: Mapping[str, CompiledState], state: CompiledState
+    ) -> None:
+        where = f"states.{state.name}"
+        for event, target in state.transitions.items():
+            self._check_target(states, f"{where}.transitions.{event}", target)
+
+        analysis = state.config.get("response_analysis")
+        if isinstance(analysis, dict):
+            self._check_target(
+                states,
+                f"{where}.response_analysis.default_transition",
+                analysis.get("default_transition"),
+            )
+            for condition in analysis.get("conditions") or []:
+                if not isinstance(condition, dict):
+                    continue
+                for action in condition.get("actions") or []:
+                    if isinstance(action, dict) and action.get("type") == "transition":
+                        self._check_target(
+                            states,
+                            f"{where}.response_analysis action target",
+                            action.get("target", DEFAULT_TERMINAL_STATE),
+                        )
+
+        intent_actions = state.config.get("intent_actions")
+        if isinstance(intent_actions, dict):
+            for intent, action in intent_actions.items():
+                if isinstance(action, dict):
+                    self._check_target(
+                        states,
+                        f"{where}.intent_actions.{intent}.next_state",
+                        action.get("next_state", DEFAULT_TERMINAL_STATE),
+                    )
+
+        reset_behavior = state.config.get("reset_behavior")
+        if isinstance(reset_behavior, dict):
+            self._check_target(
+                states,
+                f"{where}.reset_behavior.reset_state",
+                reset_behavior.get("reset_state"),
+            )
+
+    def _precompile(self, value: Any, key: Optional[str] = None) -> None:
+        """Compile the templates, phrase lists and patterns of a config subtree."""
+        if key in PHRASE_LIST_KEYS and not isinstance(value, (list, type(None))):
+            # A string would be matched character by character
+            self.errors.append(f"{key}: expected a list of phrases")
+        elif isinstance(value, str):
+            if "{" in value and value not in self.text_templates:
+                self.text_templates[value] = get_text_template(value)
+            if key == "pattern":
+                try:
+                    get_pattern(value)
+                except re.error as e:
+                    self.errors.append(f"invalid pattern '{value}': {e}")
+        elif isinstance(value, dict):
+            for item_key, item in value.items():
+                self._precompile(item, str(item_key))
+        elif isinstance(value, list):
+            if key in PHRASE_LIST_KEYS:
+                phrases = tuple(value)
+                self.phrase_matchers[phrases] = get_phrase_matcher(phrases)
+            for item in value:
+                self._precompile(item)
+
+    def _checkpoint_durability(self, settings: Mapping[str, Any]) -> str:
+        """LangGraph durability mode for settings.checkpoint_durability.
+
+        "step" (default) persists a checkpoint after every node; "exit" persists
+        only when the graph pauses at a waiting state or reaches a terminal state,
+        i.e. once per user turn.
+        """
+        configured = str(settings.get("checkpoint_durability", "step")).lower()
+        durability = CHECKPOINT_DURABILITY_MODES.get(configured)
+        if durability is None:
+            logger.warning(
+                "Unknown checkpoint_durability, persisting every step",
+                checkpoint_durability=configured,
+                config_path=self.config_path,
+            )
+            return CHECKPOINT_DURABILITY_MODES["step"]
+        return durability
+
+    def _retry_count(self, settings: Mapping[str, Any]) -> int:
+        retry_count = settings.get("empty_response_retry_count")
+        if isinstance(retry_count, (int, str)):
+            try:
+                return int(retry_count)
+            except ValueError:
+                self.errors.append(
+                    "settings.empty_response_retry_count: expected an integer"
+                )
+        return DEFAULT_EMPTY_RESPONSE_RETRY_COUNT
+
+
+# Compiled configs by SHA-256 of the YAML file contents
+_compiled_configs: dict[str, CompiledStateMachineConfig] = {}
+_compiled_configs_lock = threading.Lock()
+
+
+def compile_state_machine_config(
+    config_path: Path | str,
+) -> CompiledStateMachineConfig:
+    """Get the compiled config for an lg-prompt YAML file.
+
+    The file is read on every call, but only parsed and compiled the first time
+    its contents are seen.
+
+    Raises:
+        StateMachineConfigError: the file can't be read or parsed, or the
+            config is invalid
+    """
+    try:
+        content = Path(config_path).read_bytes()
+    except OSError as e:
+        raise StateMachineConfigError(
+            f"Failed to load state machine config from {config_path}: {e}"
+        ) from e
+    digest = hashlib.sha256(content).hexdigest()
+
+    compiled = _compiled_configs.get(digest)
+    if compiled is not None:
+        return compiled
+
+    with _compiled_configs_lock:
+        compiled = _compiled_configs.get(digest)
+        if compiled is not None:
+            return compiled
+
+        try:
+            config = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise StateMachineConfigError(
+                f"Failed to load state machine config from {config_path}: {e}"
+            ) from e
+        if not isinstance(config, dict):
+            config = {}
+
+        compiled = _Compiler(config, str(config_path)).compile(digest)
+        _compiled_configs[digest] = compiled
+        logger.info(
+            "Compiled state machine config",
+            config_path=str(config_path),
+            digest=digest[:12],
+            states=len(compiled.states),
+            text_templates=len(compiled.text_templates),
+            phrase_matchers=len(compiled.phrase_matchers),
+        )
+        return compiled
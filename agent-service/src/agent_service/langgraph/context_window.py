@@ -0,0 +1,273 @@
+"""
+Token-budgeted conversation history for llm_processor states.
+
+States with `use_conversation_history: true` send the whole conversation on
+every LLM call, so prompt size (and latency/cost) grows with conversation
+length. With a `context_window` configured, only the most recent messages that
+fit in `max_history_tokens` are sent verbatim. Older messages are replaced by a
+rolling summary stored in the agent state.
+
+The summary is produced off the critical path: when messages fall out of the
+window, a summarization call is submitted to a small background pool and the
+result is picked up (and written into state) on a later turn. Until then the
+older messages are simply dropped.
+
+Configuration (lg-prompt YAML, `settings.context_window` for the whole agent,
+overridable per state with `context_window` on the state):
+
+    context_window:
+      max_history_tokens: 4000   # token budget for conversation history
+      min_recent_messages: 4     # always sent verbatim, even if over budget
+      summarize: true            # keep a rolling summary of dropped messages
+      summary_max_words: 200     # length requested from the summarizer
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from shared_models import configure_logging
+
+from .token_counter import estimate_tokens_from_text
+
+logger = configure_logging("agent-service")
+
+# State field holding the rolling summary: {"text", "message_count", "digest"}
+SUMMARY_STATE_FIELD = "_conversation_summary"
+
+DEFAULT_MIN_RECENT_MESSAGES = 4
+DEFAULT_SUMMARY_MAX_WORDS = 200
+
+# Per-message overhead used by count_tokens_from_messages
+_MESSAGE_OVERHEAD_TOKENS = 3
+
+SUMMARY_PROMPT = """Summarize the earlier part of a conversation between a user and an assistant.
+Keep facts the assistant will need later: user details, requests, decisions, \
+identifiers, tool results and open questions. Do not add anything that was not said.
+Answer with the summary only, in at most {max_words} words.
+
+{previous_summary}Conversation:
+{transcript}"""
+
+
+@dataclass(frozen=True)
+class ContextWindowConfig:
+    max_history_tokens: int
+    min_recent_messages: int = DEFAULT_MIN_RECENT_MESSAGES
+    summarize: bool = True
+    summary_max_words: int = DEFAULT_SUMMARY_MAX_WORDS
+
+
+def get_context_window_config(
+    settings: dict[str, Any], state_config: dict[str, Any]
+) -> Optional[ContextWindowConfig]:
+    """Merge settings.context_window with the state's context_window.
+
+    Returns None when no token budget is configured (history is sent in full).
+    """
+    merged = dict(settings.get("context_window") or {})
+    merged.update(state_config.get("context_window") or {})
+
+    max_history_tokens = merged.get("max_history_tokens")
+    if not max_history_tokens or int(max_history_tokens) <= 0:
+        return None
+
+    return ContextWindowConfig(
+        max_history_tokens=int(max_history_tokens),
+        min_recent_messages=int(
+            merged.get("min_recent_messages", DEFAULT_MIN_RECENT_MESSAGES)
+        ),
+        summarize=bool(merged.get("summarize", True)),
+        summary_max_words=int(
+            merged.get("summary_max_words", DEFAULT_SUMMARY_MAX_WORDS)
+        ),
+    )
+
+
+def conversation_digest(messages: list[dict[str, Any]]) -> str:
+    """Identify a conversation prefix, so a summary is never applied to a
+    conversation it was not computed from (e.g. after a reset)."""
+    digest = hashlib.sha1()
+    for message in messages:
+        digest.update(message["role"].encode())
+        digest.update(b"\0")
+        digest.update(str(message["content"]).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_valid_summary(
+    state: dict[str, Any], conversation: list[dict[str, Any]]
+) -> Optional[dict[str, Any]]:
+    """Return the stored summary if it still matches the conversation prefix."""
+    summary = state.get(SUMMARY_STATE_FIELD)
+    if not summary:
+        return None
+    count = summary.get("message_count", 0)
+    if count > len(conversation) or summary.get("digest") != conversation_digest(
+        conversation[:count]
+    ):
+        return None
+    return summary  # type: ignore[no-any-return]
+
+
+def select_recent_messages(
+    conversation: list[dict[str, Any]],
+    config: ContextWindowConfig,
+    reserved_tokens: int = 0,
+) -> int:
+    """Return the index of the oldest message that fits in the token budget.
+
+    Messages are taken newest first; the newest `min_recent_messages` are always
+    kept so the current exchange is never cut.
+    """
+    budget = config.max_history_tokens - reserved_tokens
+    used = 0
+    start = len(conversation)
+    for index in range(len(conversation) - 1, -1, -1):
+        tokens = (
+            estimate_tokens_from_text(str(conversation[index]["content"]))
+            + _MESSAGE_OVERHEAD_TOKENS
+        )
+        kept = len(conversation) - index - 1
+        if kept >= config.min_recent_messages and used + tokens > budget:
+            break
+        used += tokens
+        start = index
+    return start
+
+
+def build_summary_prompt(
+    previous_summary: Optional[str],
+    messages: list[dict[str, Any]],
+    max_words: int,
+) -> str:
+    transcript = "\n".join(
+        f"{message['role']}: {message['content']}" for message in messages
+    )
+    previous = (
+        f"Summary of the conversation before this part:\n{previous_summary}\n\n"
+        if previous_summary
+        else ""
+    )
+    return SUMMARY_PROMPT.format(
+        max_words=max_words, previous_summary=previous, transcript=transcript
+    )
+
+
+class ConversationSummarizer:
+    """Computes rolling summaries in the background, one job per thread at a time."""
+
+    def __init__(self, max_workers: int = 2) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="context-summary"
+        )
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Future[Optional[dict[str, Any]]]] = {}
+
+    def schedule(
+        self,
+        key: str,
+        agent: Any,
+        previous_summary: Optional[dict[str, Any]],
+        conversation: list[dict[str, Any]],
+        message_count: int,
+        max_words: int,
+        token_context: Optional[str] = None,
+    ) -> bool:
+        """Extend previous_summary to cover conversation[:message_count].
+
+        Does nothing if a summary job for the key is still running.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.done():
+                return False
+            self._jobs[key] = self._executor.submit(
+                self._summarize,
+                agent,
+                previous_summary,
+                conversation[:message_count],
+                message_count,
+                max_words,
+                token_context,
+            )
+        return True
+
+    def collect(self, key: str) -> Optional[dict[str, Any]]:
+        """Return a finished summary for the key, if any (never blocks)."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or not job.done():
+                return None
+            del self._jobs[key]
+        try:
+            return job.result()
+        except Exception as e:
+            logger.warning(
+                "Conversation summary failed",
+                key=key,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            return None
+
+    def _summarize(
+        self,
+        agent: Any,
+        previous_summary: Optional[dict[str, Any]],
+        conversation: list[dict[str, Any]],
+        message_count: int,
+        max_words: int,
+        token_context: Optional[str],
+    ) -> Optional[dict[str, Any]]:
+        covered = previous_summary["message_count"] if previous_summary else 0
+        prompt = build_summary_prompt(
+            previous_summary["text"] if previous_summary else None,
+            conversation[covered:message_count],
+            max_words,
+        )
+        text = agent.create_response(
+            [{"role": "user", "content": prompt}],
+            temperature=0.1,
+            skip_all_tools=True,
+            token_context=token_context,
+        )
+        if not text or not text.strip():
+            return None
+        return {
+            "text": text.strip(),
+            "message_count": message_count,
+            "digest": conversation_digest(conversation[:message_count]),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global summarizer instance
+_summarizer: Optional[ConversationSummarizer] = None
+_summarizer_lock = threading.Lock()
+
+
+def get_conversation_summarizer() -> ConversationSummarizer:
+    """Get the global conversation summarizer."""
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                _summarizer = ConversationSummarizer(
+                    max_workers=int(os.getenv("CONTEXT_SUMMARY_MAX_WORKERS", "2"))
+                )
+    return _summarizer
+
+
+def shutdown_conversation_summarizer() -> None:
+    """Shut down the global conversation summarizer (called on service shutdown)."""
+    global _summarizer
+    if _summarizer is not None:
+        _summarizer.shutdown()
+        _summarizer = None
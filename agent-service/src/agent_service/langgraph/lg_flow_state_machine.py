@@ -5,18 +5,51 @@ LangGraph-based state machine and agent session management.
 This module contains the StateMachine and AgentSession classes for managing
 conversational flows using LangGraph with persistent checkpoint storage.
 """
+
+import os
+import threading
+import time
 from pathlib import Path
 from typing import Annotated, Any, Dict, List, Optional, TypedDict
 
-import yaml
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.types import Command
 from shared_models import configure_logging
 
 # Import PostgreSQL checkpoint utilities
-from .postgres_checkpoint import get_postgres_checkpointer, reset_postgres_checkpointer
+from .config_compiler import (
+    StateMachineConfigError,
+    compile_state_machine_config,
+    prompt_rules,
+)
+from .context_window import (
+    SUMMARY_STATE_FIELD,
+    ContextWindowConfig,
+    get_context_window_config,
+    get_conversation_summarizer,
+    get_valid_summary,
+    select_recent_messages,
+)
+from .message_index import (
+    MESSAGE_INDEX_FIELD,
+    human_message_count,
+    last_ai_message,
+    last_human_message,
+)
+from .phrase_matcher import PhraseMatcher, get_pattern, get_phrase_matcher
+from .postgres_checkpoint import get_postgres_checkpointer
+from .pre_classifier import get_pre_classifier_stats
+from .response_cache import (
+    get_response_cache,
+    get_response_cache_config,
+    make_response_cache_key,
+)
+from .responses_agent import FALLBACK_RESPONSES
+from .text_templates import get_text_template
+from .token_counter import estimate_tokens_from_text
 from .util import resolve_agent_service_path
 
 logger = configure_logging("agent-service")
@@ -56,6 +89,10 @@ def create_agent_state_class(state_schema: dict[str, Any]) -> type[dict[str, Any
     fields["_last_processed_human_count"] = Optional[int]
     fields["_consumed_this_invoke"] = Optional[bool]
     fields["_last_waiting_node"] = Optional[str]  # Track last waiting node for resume
+    # Incremental index over messages (human count, last user/assistant message)
+    fields[MESSAGE_INDEX_FIELD] = Optional[Dict[str, Any]]
+    # Rolling summary of history dropped from the context window
+    fields[SUMMARY_STATE_FIELD] = Optional[Dict[str, Any]]
 
     # Create the TypedDict class dynamically
     agent_state_class = TypedDict("AgentState", fields)  # type: ignore[misc]
@@ -66,30 +103,176 @@ class StateMachine:
     """Configurable state machine engine for conversation flows."""
 
     def __init__(self, config_path: str):
-        """Initialize the state machine with configuration from YAML file."""
+        """Initialize the state machine with configuration from YAML file.
+
+        Raises:
+            StateMachineConfigError: the config can't be loaded or is invalid
+        """
         self.config_path = Path(config_path)
-        self.config = self._load_config()
+        # Validated config with precompiled templates, phrase matchers and
+        # pre-classifiers, shared by every StateMachine for the same YAML
+        self.compiled = compile_state_machine_config(self.config_path)
+        self.config = self.compiled.raw
 
         # Create dynamic AgentState class from configuration
-        state_schema = self.config.get("state_schema", {})
-        self.AgentState = create_agent_state_class(state_schema)
+        self.AgentState = create_agent_state_class(dict(self.compiled.state_schema))
+
+        self.checkpoint_durability = self.compiled.checkpoint_durability
+        self.pre_classifiers = self.compiled.pre_classifiers
+        self.text_templates = self.compiled.text_templates
+        self.phrase_matchers = self.compiled.phrase_matchers
+
+    def _phrase_matcher(self, phrases: list[Any]) -> PhraseMatcher:
+        """Get the compiled matcher for a phrase list from the config."""
+        key = tuple(phrases)
+        matcher = self.phrase_matchers.get(key)
+        if matcher is None:
+            matcher = get_phrase_matcher(key)
+        return matcher
+
+    def _apply_context_window(
+        self,
+        state: dict[str, Any],
+        conversation: list[dict[str, Any]],
+        window_config: ContextWindowConfig,
+        agent: Any,
+        thread_id: str | None,
+        token_context: str | None,
+    ) -> list[dict[str, Any]]:
+        """Trim conversation history to the token budget.
+
+        Messages that no longer fit are replaced by the rolling summary kept in
+        state. Summaries are computed in the background and stored into state on
+        a later turn, so trimming never waits on an extra LLM call.
+        """
+        summarizer = get_conversation_summarizer() if window_config.summarize else None
+
+        # Pick up a summary finished since the previous turn
+        if summarizer is not None and thread_id:
+            finished = summarizer.collect(thread_id)
+            if finished is not None:
+                state[SUMMARY_STATE_FIELD] = finished
+
+        summary = get_valid_summary(state, conversation)
+        summary_message = (
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary['text']}",
+            }
+            if summary
+            else None
+        )
+        reserved_tokens = (
+            estimate_tokens_from_text(summary_message["content"])
+            if summary_message
+            else 0
+        )
+        start = select_recent_messages(conversation, window_config, reserved_tokens)
+        if start == 0:
+            return conversation
+
+        covered = summary["message_count"] if summary else 0
+        if summarizer is not None and thread_id and start > covered:
+            summarizer.schedule(
+                thread_id,
+                agent,
+                summary,
+                conversation,
+                start,
+                window_config.summary_max_words,
+                token_context=token_context,
+            )
 
-    def _load_config(self) -> dict[str, Any]:
-        """Load state machine configuration from YAML file."""
-        try:
-            with open(self.config_path, "r") as f:
-                config = yaml.safe_load(f)
-                return config if isinstance(config, dict) else {}
-        except Exception as e:
-            raise RuntimeError(
-                f"Failed to load state machine config from {self.config_path}: {e}"
+        logger.info(
+            "Trimmed conversation history to context window",
+            thread_id=thread_id,
+            max_history_tokens=window_config.max_history_tokens,
+            total_messages=len(conversation),
+            kept_messages=len(conversation) - start,
+            summarized_messages=min(covered, start),
+        )
+
+        # A summary that reaches past the window start still describes only
+        # older messages, so the recent messages stay verbatim either way
+        recent = conversation[start:]
+        return [summary_message, *recent] if summary_message else recent
+
+    def _create_response_cached(
+        self,
+        agent: Any,
+        messages_to_send: list[dict[str, Any]],
+        state: dict[str, Any],
+        state_config: dict[str, Any],
+        response_kwargs: dict[str, Any],
+    ) -> str:
+        """Call create_response_with_retry, memoized for states with `cache` set.
+
+        Only calls that cannot reach MCP servers are cached, since skipping the
+        LLM would also skip any tool calls it makes.
+        """
+        cache_config = get_response_cache_config(state_config)
+        allowed_tools = response_kwargs.get("allowed_tools")
+        mcp_disabled = (
+            response_kwargs.get("skip_all_tools")
+            or response_kwargs.get("skip_mcp_servers_only")
+            # allowed_tools: [""] disables all tools
+            or (allowed_tools is not None and not any(allowed_tools))
+        )
+        if cache_config is None or not mcp_disabled:
+            return str(
+                agent.create_response_with_retry(
+                    messages_to_send, self._get_retry_count(), **response_kwargs
+                )
             )
 
+        history: list[dict[str, Any]] = []
+        if cache_config.history_messages > 0:
+            for msg in state.get("messages", [])[-cache_config.history_messages :]:
+                if isinstance(msg, (HumanMessage, AIMessage)):
+                    history.append({"type": msg.type, "content": msg.content})
+
+        model = str(response_kwargs.get("model") or getattr(agent, "model", ""))
+        cache_key = make_response_cache_key(
+            model,
+            str(getattr(agent, "system_message", "")),
+            str(messages_to_send[-1]["content"]) if messages_to_send else "",
+            history,
+            response_kwargs.get("temperature"),
+            {
+                "skip_all_tools": response_kwargs.get("skip_all_tools"),
+                "allowed_tools": response_kwargs.get("allowed_tools"),
+                "max_output_tokens": response_kwargs.get("max_output_tokens"),
+            },
+        )
+
+        cache = get_response_cache()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(
+                "Using cached LLM response",
+                current_state=state.get("current_state"),
+                cache_key=cache_key[:12],
+            )
+            return cached
+
+        response = str(
+            agent.create_response_with_retry(
+                messages_to_send, self._get_retry_count(), **response_kwargs
+            )
+        )
+        if response.strip() and response not in FALLBACK_RESPONSES:
+            cache.put(
+                cache_key,
+                response,
+                model,
+                state_name=state.get("current_state"),
+                ttl_seconds=cache_config.ttl_seconds,
+            )
+        return response
+
     def _get_retry_count(self) -> int:
         """Get the configured retry count for empty responses."""
-        settings = self.config.get("settings", {})
-        retry_count = settings.get("empty_response_retry_count")
-        return int(retry_count) if isinstance(retry_count, (int, str)) else 3
+        return self.compiled.empty_response_retry_count
 
     def _is_config_disabled(self, config_value) -> bool:  # type: ignore[no-untyped-def]
         """Check if a config value represents 'disabled' (no/No/NO or False).
@@ -145,6 +328,15 @@ class StateMachine:
                 state_config.get("uses_mcp_tools", "yes")
             )
 
+        # Optional per-state model tier (actions fall back to the state's settings)
+        model = state_config.get("model")
+        max_output_tokens = state_config.get("max_output_tokens")
+        if action_config:
+            model = action_config.get("model", model)
+            max_output_tokens = action_config.get(
+                "max_output_tokens", max_output_tokens
+            )
+
         # Build kwargs
         response_kwargs = {
             "temperature": temperature,
@@ -162,6 +354,26 @@ class StateMachine:
         if token_context is not None:
             response_kwargs["token_context"] = token_context
 
+        if model:
+            response_kwargs["model"] = str(model)
+        if max_output_tokens:
+            response_kwargs["max_output_tokens"] = int(max_output_tokens)
+
+        # Time budget for the call including retries (state overrides settings)
+        deadline_seconds = state_config.get(
+            "deadline_seconds",
+            self.compiled.settings.get("deadline_seconds"),
+        )
+        if deadline_seconds:
+            response_kwargs["deadline_seconds"] = float(deadline_seconds)
+
+        # hedge: true, or a mapping with a fixed after_ms delay
+        hedge = state_config.get("hedge")
+        if hedge:
+            response_kwargs["hedge"] = True
+            if isinstance(hedge, dict) and hedge.get("after_ms"):
+                response_kwargs["hedge_after_ms"] = float(hedge["after_ms"])
+
         return response_kwargs
 
     def _get_user_id(self, authoritative_user_id: str | None) -> str:
@@ -175,79 +387,9 @@ class StateMachine:
         authoritative_user_id: str | None = None,
     ) -> str:
         """Format text by replacing placeholders with state data."""
-        import re
-
         try:
-            # Add special computed values
-            format_data = dict(state_data)
-
-            # Add authoritative_user_id if provided
-            if authoritative_user_id:
-                format_data["authoritative_user_id"] = authoritative_user_id
-
-            # Add last_user_message placeholder
-            messages = state_data.get("messages", [])
-            last_user_message = ""
-            for msg in reversed(messages):
-                if hasattr(msg, "content"):
-                    msg_class = getattr(msg, "__class__", None)
-                    if msg_class is not None and msg_class.__name__ == "HumanMessage":
-                        last_user_message = msg.content
-                        break
-            format_data["last_user_message"] = last_user_message
-
-            # Add conversation_history placeholder
-            conversation_history = ""
-            for i, msg in enumerate(messages):
-                if hasattr(msg, "content"):
-                    msg_class = getattr(msg, "__class__", None)
-                    if msg_class is not None:
-                        msg_type = msg_class.__name__
-                        if msg_type == "HumanMessage":
-                            conversation_history += f"User: {msg.content}\n"
-                        elif msg_type == "AIMessage":
-                            conversation_history += f"Assistant: {msg.content}\n"
-            format_data["conversation_history"] = conversation_history.strip()
-
-            # Custom dot notation replacement
-            def replace_placeholders(text, data):  # type: ignore[no-untyped-def]
-                # First, temporarily replace escaped braces to protect them
-                text = text.replace("{{", "\x00ESCAPED_OPEN\x00")
-                text = text.replace("}}", "\x00ESCAPED_CLOSE\x00")
-
-                # Pattern to match {field.subfield} or {field} (but not escaped ones)
-                pattern = r"\{([^}]+)\}"
-
-                def replacer(match):  # type: ignore[no-untyped-def]
-                    field_path = match.group(1)
-                    try:
-                        # Split by dots and navigate the data structure
-                        value = data
-                        for part in field_path.split("."):
-                            if isinstance(value, dict):
-                                value = value[part]
-                            else:
-                                value = getattr(value, part)
-                        return str(value)
-                    except (KeyError, AttributeError, TypeError):
-                        # Return the placeholder unchanged if field not found
-                        logger.warning(
-                            "Missing placeholder data", field_path=field_path
-                        )
-                        return match.group(0)
-
-                # Replace placeholders
-                text = re.sub(pattern, replacer, text)
-
-                # Restore escaped braces as single braces
-                text = text.replace("\x00ESCAPED_OPEN\x00", "{")
-                text = text.replace("\x00ESCAPED_CLOSE\x00", "}")
-
-                return text
-
-            result = replace_placeholders(text, format_data)  # type: ignore[no-untyped-call]
-            return str(result) if result is not None else text
-
+            template = self.text_templates.get(text) or get_text_template(text)
+            return template.render(state_data, authoritative_user_id)
         except Exception as e:
             logger.warning(
                 "Error formatting text, returning original",
@@ -263,6 +405,8 @@ class StateMachine:
         agent: Any,
         authoritative_user_id: str | None = None,
         token_context: str | None = None,
+        thread_id: str | None = None,
+        response_stream: Any = None,
     ) -> tuple[dict[str, Any], str]:
         """Process llm_processor type states - completely generic and configuration-driven.
 
@@ -287,25 +431,40 @@ class StateMachine:
             # Add conversation history
             state_messages = state.get("messages", [])
             logger.info("Using conversation history", message_count=len(state_messages))
+            conversation: list[dict[str, Any]] = []
             for msg in state_messages:
                 if hasattr(msg, "content"):
                     msg_class = getattr(msg, "__class__", None)
                     if msg_class is not None:
                         msg_type = msg_class.__name__
                         if msg_type == "HumanMessage":
-                            messages_to_send.append(
+                            conversation.append(
                                 {"role": "user", "content": msg.content}
                             )
                         elif msg_type == "AIMessage":
-                            messages_to_send.append(
+                            conversation.append(
                                 {"role": "assistant", "content": msg.content}
                             )
 
+            # Keep history within the configured token budget
+            window_config = get_context_window_config(
+                dict(self.compiled.settings), state_config
+            )
+            if window_config is not None:
+                conversation = self._apply_context_window(
+                    state, conversation, window_config, agent, thread_id, token_context
+                )
+            messages_to_send.extend(conversation)
+
             logger.info(
                 "Sending messages to LLM",
                 total_messages=len(messages_to_send),
-                system_messages=1,
-                conversation_messages=len(messages_to_send) - 1,
+                system_messages=sum(
+                    1 for message in messages_to_send if message["role"] == "system"
+                ),
+                conversation_messages=sum(
+                    1 for message in messages_to_send if message["role"] != "system"
+                ),
             )
         else:
             # Traditional approach - send prompt as single user message
@@ -328,6 +487,10 @@ class StateMachine:
             token_context=token_context,
         )
 
+        # User-facing states opt in to streaming; the turn decides if it streams
+        if response_stream is not None and state_config.get("stream"):
+            response_kwargs["response_stream"] = response_stream
+
         response = agent.create_response_with_retry(
             messages_to_send,
             self._get_retry_count(),
@@ -354,30 +517,19 @@ class StateMachine:
         authoritative_user_id: str | None = None,
     ) -> str:
         """Get the appropriate prompt based on conditional logic or default."""
+        compiled_state = self.compiled.state(state.get("current_state", ""))
+        if compiled_state is not None and compiled_state.config is state_config:
+            conditions = compiled_state.prompt_conditions
+            default_prompt = compiled_state.default_prompt
+        else:
+            conditions, default_prompt = prompt_rules(state_config)
 
-        # Check for conditional prompts
-        conditional_prompts = state_config.get("conditional_prompts")
-        if conditional_prompts:
-            for condition_config in conditional_prompts:
-                condition_name = condition_config.get("condition")
-
-                if condition_name == "default":
-                    continue  # Handle default last
-
-                # Check if condition is met
-                if self._evaluate_condition(state, condition_config):
-                    prompt_text = condition_config.get("prompt", "")
-                    return self._format_text(prompt_text, state, authoritative_user_id)
-
-            # If no conditions matched, use default
-            for condition_config in conditional_prompts:
-                if condition_config.get("condition") == "default":
-                    prompt_text = condition_config.get("prompt", "")
-                    return self._format_text(prompt_text, state, authoritative_user_id)
+        for condition_config in conditions:
+            if self._evaluate_condition(state, condition_config):
+                prompt_text = condition_config.get("prompt", "")
+                return self._format_text(prompt_text, state, authoritative_user_id)
 
-        # Fallback to simple prompt
-        prompt_text = state_config.get("prompt", "")
-        return self._format_text(prompt_text, state, authoritative_user_id)
+        return self._format_text(default_prompt, state, authoritative_user_id)
 
     def _evaluate_condition(
         self, state: dict[str, Any], condition_config: dict[str, Any]
@@ -414,8 +566,7 @@ class StateMachine:
             return False
 
         # Check if any of the phrases are present
-        field_value_lower = str(field_value).lower()
-        return any(phrase.lower() in field_value_lower for phrase in check_phrases)
+        return self._phrase_matcher(check_phrases).search(str(field_value).lower())
 
     def _get_nested_field_value(
         self, state: dict[str, Any], field_path: str
@@ -478,17 +629,11 @@ class StateMachine:
             exclude_phrases = condition.get("exclude_phrases", [])
 
             # Check if trigger phrases are present
-            has_trigger = any(
-                phrase.lower() in response_lower for phrase in trigger_phrases
-            )
-            if not has_trigger:
+            if not self._phrase_matcher(trigger_phrases).search(response_lower):
                 continue
 
             # Check if exclude phrases are present (if so, skip this condition)
-            has_exclude = any(
-                phrase.lower() in response_lower for phrase in exclude_phrases
-            )
-            if has_exclude:
+            if self._phrase_matcher(exclude_phrases).search(response_lower):
                 continue
 
             # Execute actions for this condition - completely generic
@@ -524,9 +669,7 @@ class StateMachine:
             elif action_type == "check_correction":
                 # Check if correction is needed based on phrases
                 correction_phrases = action.get("correction_phrases", [])
-                if any(
-                    phrase.lower() in response_lower for phrase in correction_phrases
-                ):
+                if self._phrase_matcher(correction_phrases).search(response_lower):
                     correction_message = action.get("correction_message", "")
                     if correction_message:
                         formatted_message = self._format_text(
@@ -543,8 +686,6 @@ class StateMachine:
                 )  # "response" or "last_user_message"
 
                 if pattern and field_name:
-                    import re
-
                     if source_text == "response":
                         text_to_search = response
                     elif source_text == "last_user_message":
@@ -552,7 +693,7 @@ class StateMachine:
                     else:
                         text_to_search = response
 
-                    match = re.search(pattern, text_to_search)
+                    match = get_pattern(pattern).search(text_to_search)
                     if match:
                         # Use group(1) if available (captured group), otherwise group(0) (entire match)
                         try:
@@ -580,36 +721,24 @@ class StateMachine:
 
     def _get_last_user_message(self, state: dict[str, Any]) -> str:
         """Get the last user message from the conversation."""
-        messages = state.get("messages", [])
-        for msg in reversed(messages):
-            if hasattr(msg, "content"):
-                msg_class = getattr(msg, "__class__", None)
-                if msg_class is not None and msg_class.__name__ == "HumanMessage":
-                    content = msg.content
-                    return str(content) if content is not None else ""
-        return ""
+        msg = last_human_message(state)
+        if msg is None or msg.content is None:
+            return ""
+        return str(msg.content)
 
     def is_terminal_state(self, state_name: str) -> bool:
         """Check if the given state is a terminal state."""
-        settings = self.config.get("settings", {})
-        terminal_state = settings.get("terminal_state", "end")
-        terminal_state_str = (
-            str(terminal_state) if terminal_state is not None else "end"
-        )
-        return state_name == terminal_state_str
+        return self.compiled.is_terminal_state(state_name)
 
     def is_waiting_state(self, state_name: str) -> bool:
         """Check if the given state is a waiting state by looking up its type."""
-        states = self.config.get("states", {})
-        state_config = states.get(state_name, {})
-        state_type = state_config.get("type")
-        return str(state_type) == "waiting" if state_type is not None else False
+        return self.compiled.is_waiting_state(state_name)
 
     def create_initial_state(self) -> dict[str, Any]:
         """Create initial state with default field values from configuration."""
-        settings = self.config.get("settings", {})
-        initial_state_name = settings.get("initial_state", "collect_employee_id")
-        state_schema = self.config.get("state_schema", {})
+        settings = self.compiled.settings
+        initial_state_name = self.compiled.initial_state
+        state_schema = self.compiled.state_schema
 
         # Create state with default values from schema
         state: Dict[str, Any] = {}
@@ -650,16 +779,13 @@ class StateMachine:
 
     def reset_state_for_new_conversation(self) -> dict[str, Any]:
         """Reset state for a new conversation based on end state configuration."""
-        end_state_config = self.config.get("states", {}).get("end", {})
+        end_state = self.compiled.state("end")
+        end_state_config = end_state.config if end_state is not None else {}
         reset_behavior = end_state_config.get("reset_behavior", {})
-        settings = self.config.get("settings", {})
-        state_schema = self.config.get("state_schema", {})
+        state_schema = self.compiled.state_schema
 
         # Get reset state name - defaults to initial_state if not specified
-        reset_state = reset_behavior.get(
-            "reset_state",
-            settings.get("initial_state", "collect_employee_id"),
-        )
+        reset_state = reset_behavior.get("reset_state", self.compiled.initial_state)
 
         # Get fields to clear from reset behavior or use all fields
         fields_to_clear = reset_behavior.get("clear_data", [])
@@ -748,15 +874,39 @@ class StateMachine:
             token_context=token_context,
         )
 
-        intent_response = (
-            agent.create_response_with_retry(
-                intent_messages,
-                self._get_retry_count(),
-                **response_kwargs,
+        current_state_name = state.get("current_state", "")
+        fast_path = None
+        pre_classifier = self.pre_classifiers.get(current_state_name)
+        if pre_classifier is not None:
+            fast_path = pre_classifier.classify(user_input)
+            if (
+                fast_path is not None
+                and fast_path.confidence < pre_classifier.threshold
+            ):
+                fast_path = None
+
+        if fast_path is not None:
+            # Obvious answer - classified locally without an LLM call
+            intent_response = fast_path.intent.upper()
+            get_pre_classifier_stats().record_fast_path(current_state_name)
+            logger.info(
+                "Intent classified by pre-classifier",
+                current_state=current_state_name,
+                intent=intent_response,
+                confidence=fast_path.confidence,
+            )
+        else:
+            started_at = time.perf_counter()
+            intent_response = (
+                self._create_response_cached(
+                    agent, intent_messages, state, state_config, response_kwargs
+                )
+                .strip()
+                .upper()
+            )
+            get_pre_classifier_stats().record_llm(
+                current_state_name, (time.perf_counter() - started_at) * 1000
             )
-            .strip()
-            .upper()
-        )
 
         # Process intent actions
         intent_actions = state_config.get("intent_actions", {})
@@ -878,10 +1028,8 @@ class StateMachine:
             token_context=token_context,
         )
 
-        response = agent.create_response_with_retry(
-            messages_to_send,
-            self._get_retry_count(),
-            **response_kwargs,
+        response = self._create_response_cached(
+            agent, messages_to_send, state, state_config, response_kwargs
         )
 
         # Use LLM to determine if validation passed
@@ -904,10 +1052,8 @@ class StateMachine:
         )
 
         validation_response = (
-            agent.create_response_with_retry(
-                validation_messages,
-                self._get_retry_count(),
-                **validation_kwargs,
+            self._create_response_cached(
+                agent, validation_messages, state, state_config, validation_kwargs
             )
             .strip()
             .upper()
@@ -944,6 +1090,8 @@ class StateMachine:
         agent: Any,
         authoritative_user_id: str | None = None,
         token_context: str | None = None,
+        thread_id: str | None = None,
+        response_stream: Any = None,
     ) -> tuple[dict[str, Any], str | None]:
         """Process the current state based on its configuration.
 
@@ -951,16 +1099,23 @@ class StateMachine:
             tuple: (updated_state, next_state_name)
         """
         current_state_name = state.get("current_state", "")
-        state_config = self.config["states"].get(current_state_name)
-        if not state_config:
+        compiled_state = self.compiled.state(current_state_name)
+        if compiled_state is None:
             logger.error("Unknown state", current_state=current_state_name)
             return state, "end"
 
-        state_type = state_config.get("type", "")
+        state_config = compiled_state.config
+        state_type = compiled_state.type
 
         if state_type == "llm_processor":
             return self.process_llm_processor_state(
-                state, state_config, agent, authoritative_user_id, token_context
+                state,
+                state_config,
+                agent,
+                authoritative_user_id,
+                token_context,
+                thread_id=thread_id,
+                response_stream=response_stream,
             )
         elif state_type == "intent_classifier":
             return self.process_intent_classifier_state(
@@ -977,6 +1132,245 @@ class StateMachine:
             return state, "end"
 
 
+def resolve_state_machine_config_path(agent_config: dict[str, Any]) -> Path:
+    """Get the lg-prompt YAML path for an agent.
+
+    The LG_PROMPT_<AGENT_NAME> environment variable overrides the agent's
+    lg_state_machine_config, e.g. LG_PROMPT_LAPTOP_REFRESH for the
+    laptop-refresh agent. Relative paths resolve against the agent service.
+    """
+    agent_name = agent_config.get("name", "").replace("-", "_").upper()
+    env_var_name = f"LG_PROMPT_{agent_name}"
+    lg_config_path = os.environ.get(
+        env_var_name,
+        agent_config.get(
+            "lg_state_machine_config", "config/lg-prompts/chat-lg-state.yaml"
+        ),
+    )
+    if env_var_name in os.environ:
+        logger.info(
+            "Using LangGraph prompt override",
+            env_var=env_var_name,
+            config_path=lg_config_path,
+        )
+
+    # Convert to absolute path using centralized path resolution
+    if Path(lg_config_path).is_absolute():
+        return Path(lg_config_path)
+    try:
+        return resolve_agent_service_path(lg_config_path)
+    except FileNotFoundError as e:
+        logger.error(
+            "ConversationSession config not found",
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        raise
+
+
+def compile_agent_state_machine_configs(agents: dict[str, Any]) -> list[str]:
+    """Compile and validate the lg-prompt config of every agent.
+
+    Run at startup so config errors are reported before any conversation
+    reaches them, and the first session of each agent doesn't pay for the
+    compile.
+
+    Returns:
+        list: names of the agents whose config is missing or invalid
+    """
+    failed = []
+    for agent_name, agent in agents.items():
+        try:
+            compile_state_machine_config(
+                resolve_state_machine_config_path(agent.config)
+            )
+        except (FileNotFoundError, StateMachineConfigError) as e:
+            failed.append(agent_name)
+            logger.error(
+                "Invalid state machine config for agent",
+                agent_name=agent_name,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+    return failed
+
+
+# Compiled graphs shared by all ConversationSession instances, keyed by
+# (config path, config mtime, id(checkpointer)). Per-session values such as the
+# thread id and agent are passed through the runnable config at invoke time.
+_graph_cache: dict[tuple[str, int, int], tuple[Any, StateMachine, Any]] = {}
+_graph_cache_lock = threading.Lock()
+
+
+def get_compiled_graph(
+    config_path: Path, checkpointer: Any
+) -> tuple[StateMachine, Any]:
+    """Get the StateMachine and compiled graph for a config file and checkpointer.
+
+    The YAML is parsed and the graph compiled only on the first request for a
+    given (path, mtime, checkpointer); later calls are a stat and a dict lookup.
+
+    Returns:
+        tuple: (state_machine, compiled_graph)
+    """
+    path_str = str(config_path)
+    key = (path_str, config_path.stat().st_mtime_ns, id(checkpointer))
+
+    cached = _graph_cache.get(key)
+    # The checkpointer is kept in the entry so a recycled id() can't match
+    if cached is not None and cached[0] is checkpointer:
+        return cached[1], cached[2]
+
+    with _graph_cache_lock:
+        cached = _graph_cache.get(key)
+        if cached is not None and cached[0] is checkpointer:
+            return cached[1], cached[2]
+
+        state_machine = StateMachine(path_str)
+        app = _create_graph(state_machine, checkpointer)
+
+        # Drop entries for the same file built from an older mtime or checkpointer
+        for stale_key in [k for k in _graph_cache if k[0] == path_str]:
+            del _graph_cache[stale_key]
+        _graph_cache[key] = (checkpointer, state_machine, app)
+
+        logger.info(
+            "Compiled LangGraph for state machine config",
+            config_path=path_str,
+            cached_graphs=len(_graph_cache),
+        )
+        return state_machine, app
+
+
+def clear_graph_cache() -> None:
+    """Drop all cached compiled graphs (e.g. after the checkpointer is replaced)."""
+    with _graph_cache_lock:
+        _graph_cache.clear()
+
+
+def _create_graph(
+    state_machine: StateMachine, checkpointer: Any
+) -> Any:  # LangGraph CompiledGraph type
+    """Create the LangGraph workflow with one node per YAML state.
+
+    Nodes read thread_id, agent, authoritative_user_id, token_context and
+    response_stream from config["configurable"] so one compiled graph can serve
+    every session.
+    """
+    # Use the dynamic AgentState from the state machine
+    workflow = StateGraph(state_machine.AgentState)  # type: ignore[type-var]
+
+    # Get all states from the compiled configuration
+    compiled_states = state_machine.compiled.states
+    initial_state = state_machine.compiled.initial_state
+
+    # Add a node for each state in the YAML configuration
+    node_names = []
+    for state_name, compiled_state in compiled_states.items():
+        state_type = compiled_state.type
+        node_names.append(state_name)
+
+        # Create node function with closure to capture state_name
+        def make_node_func(name, stype):  # type: ignore[no-untyped-def]
+            def node_func(
+                state: dict[str, Any], config: RunnableConfig
+            ) -> Command[Any] | dict[str, Any]:
+                """Node function that returns Command for routing (or state for terminal nodes)."""
+                configurable = config.get("configurable", {})
+                logger.info(
+                    "Processing node",
+                    thread_id=configurable.get("thread_id"),
+                    node_name=name,
+                    node_type=stype,
+                )
+
+                # Update current_state to track where we are (for logging/debugging)
+                state["current_state"] = name
+
+                # Terminal states just return state - explicit edge to END handles routing
+                if stype == "terminal":
+                    return state
+
+                # Waiting states check if there's a new HUMAN message to consume
+                if stype == "waiting":
+                    # Get the target from transitions
+                    next_node: str | None = compiled_states[name].transitions.get(
+                        "user_input", "end"
+                    )
+
+                    # Check if there's a new HumanMessage by counting them
+                    human_count = human_message_count(state)
+
+                    # Track GLOBALLY which human message number was last processed
+                    # Use checkpointed value to persist across invokes
+                    last_processed_global = state.get("_last_processed_human_count", 0)
+
+                    # Also check if we've already consumed a message in THIS invoke
+                    # This flag gets set when the FIRST waiting node in an invoke consumes a message
+                    consumed_this_invoke = state.get("_consumed_this_invoke", False)
+
+                    if human_count > last_processed_global and not consumed_this_invoke:
+                        # New human message AND not yet consumed in this invoke - consume it
+                        state["_last_processed_human_count"] = human_count
+                        state["_consumed_this_invoke"] = (
+                            True  # Mark as consumed for this invoke
+                        )
+                        state["_last_waiting_node"] = (
+                            None  # Clear since we're moving on
+                        )
+                        return Command(goto=next_node, update=state)
+
+                    # Already consumed in this invoke, or no new message - pause execution
+                    # Store this waiting node as the resume point
+                    state["_last_waiting_node"] = name
+                    return state
+                else:
+                    # Process the state and get next node
+                    updated_state, next_node = state_machine.process_state(
+                        state,
+                        configurable.get("agent"),
+                        configurable.get("authoritative_user_id"),
+                        configurable.get("token_context"),
+                        thread_id=configurable.get("thread_id"),
+                        response_stream=configurable.get("response_stream"),
+                    )
+                    # Return Command with routing information
+                    return Command(goto=next_node, update=updated_state)
+
+            return node_func
+
+        workflow.add_node(state_name, make_node_func(state_name, state_type))  # type: ignore[no-untyped-call]
+
+    # Add a resume dispatcher node that routes to the correct starting point
+    def resume_dispatcher(state: dict[str, Any]) -> Command[Any]:
+        """Dispatcher that resumes from last waiting node or starts from initial state"""
+        last_waiting_node = state.get("_last_waiting_node")
+
+        if last_waiting_node and last_waiting_node in node_names:
+            # Resume from last waiting node
+            return Command(goto=last_waiting_node, update=state)
+        else:
+            # New conversation - start from initial state
+            return Command(goto=initial_state, update=state)
+
+    workflow.add_node("__resume_dispatcher__", resume_dispatcher)  # type: ignore[type-var]
+
+    logger.info("Created nodes", node_count=len(node_names), nodes=node_names)
+
+    # Set entry point to resume dispatcher
+    workflow.set_entry_point("__resume_dispatcher__")
+
+    # No need for explicit edges - nodes return Command(goto=X) which handles routing
+    # The only explicit edge needed is for terminal states
+    for state_name, compiled_state in compiled_states.items():
+        if compiled_state.type == "terminal":
+            # Terminal states always go to END
+            workflow.add_edge(state_name, END)
+
+    # Compile with checkpointer only
+    return workflow.compile(checkpointer=checkpointer, debug=False)
+
+
 class ConversationSession:
     """
     Encapsulates the state machine, graph, and persistent conversation state for a single conversation session.
@@ -1003,48 +1397,15 @@ class ConversationSession:
         self.agent = agent
         self.authoritative_user_id = authoritative_user_id
 
-        # Get state machine config path from agent configuration
-        # First check for environment variable override: LG_PROMPT_<AGENT_NAME>
-        # Example: LG_PROMPT_LAPTOP_REFRESH for laptop-refresh agent
-        import os
-
-        agent_name = agent.config.get("name", "").replace("-", "_").upper()
-        env_var_name = f"LG_PROMPT_{agent_name}"
-        lg_config_path = os.environ.get(
-            env_var_name,
-            agent.config.get(
-                "lg_state_machine_config", "config/lg-prompts/chat-lg-state.yaml"
-            ),
-        )
-        if env_var_name in os.environ:
-            logger.info(
-                "Using LangGraph prompt override",
-                env_var=env_var_name,
-                config_path=lg_config_path,
-            )
-
-        # Convert to absolute path using centralized path resolution
-        if not Path(lg_config_path).is_absolute():
-            try:
-                self.config_path = resolve_agent_service_path(lg_config_path)
-            except FileNotFoundError as e:
-                logger.error(
-                    "ConversationSession config not found",
-                    error=str(e),
-                    error_type=type(e).__name__,
-                )
-                raise
-        else:
-            self.config_path = Path(lg_config_path)
+        self.config_path = resolve_state_machine_config_path(agent.config)
 
         # Initialize checkpoint storage with PostgresSaver
         self.checkpointer = get_postgres_checkpointer()
 
-        # Initialize state machine
-        self.state_machine = StateMachine(str(self.config_path))
-
-        # Create the graph with checkpointer
-        self.app = self._create_graph()
+        # Shared state machine and compiled graph (cached per config file)
+        self.state_machine, self.app = get_compiled_graph(
+            self.config_path, self.checkpointer
+        )
 
         # Thread configuration for this session
         self.thread_config = {"configurable": {"thread_id": self.thread_id}}
@@ -1052,124 +1413,24 @@ class ConversationSession:
         # Store current token context for this session
         self.current_token_context: Optional[str] = None
 
-    def _create_graph(self) -> Any:  # LangGraph CompiledGraph type
-        """Create the LangGraph workflow with one node per YAML state."""
-        # Use the dynamic AgentState from the state machine
-        workflow = StateGraph(self.state_machine.AgentState)  # type: ignore[type-var]
-
-        # Get all states from configuration
-        states_config = self.state_machine.config.get("states", {})
-        settings = self.state_machine.config.get("settings", {})
-        initial_state = settings.get("initial_state", "collect_employee_id")
-
-        # Add a node for each state in the YAML configuration
-        node_names = []
-        for state_name, state_config in states_config.items():
-            state_type = state_config.get("type", "")
-            node_names.append(state_name)
-
-            # Create node function with closure to capture state_name
-            def make_node_func(name, stype):  # type: ignore[no-untyped-def]
-                def node_func(state: dict[str, Any]) -> Command[Any] | dict[str, Any]:
-                    """Node function that returns Command for routing (or state for terminal nodes)."""
-                    logger.info(
-                        "Processing node",
-                        thread_id=self.thread_id,
-                        node_name=name,
-                        node_type=stype,
-                    )
-
-                    # Update current_state to track where we are (for logging/debugging)
-                    state["current_state"] = name
-
-                    # Terminal states just return state - explicit edge to END handles routing
-                    if stype == "terminal":
-                        return state
-
-                    # Waiting states check if there's a new HUMAN message to consume
-                    if stype == "waiting":
-                        # Get the target from transitions
-                        transitions = states_config[name].get("transitions", {})
-                        next_node = transitions.get("user_input", "end")
-
-                        # Check if there's a new HumanMessage by counting them
-                        messages = state.get("messages", [])
-                        human_count = sum(
-                            1 for msg in messages if isinstance(msg, HumanMessage)
-                        )
-
-                        # Track GLOBALLY which human message number was last processed
-                        # Use checkpointed value to persist across invokes
-                        last_processed_global = state.get(
-                            "_last_processed_human_count", 0
-                        )
-
-                        # Also check if we've already consumed a message in THIS invoke
-                        # This flag gets set when the FIRST waiting node in an invoke consumes a message
-                        consumed_this_invoke = state.get("_consumed_this_invoke", False)
-
-                        if (
-                            human_count > last_processed_global
-                            and not consumed_this_invoke
-                        ):
-                            # New human message AND not yet consumed in this invoke - consume it
-                            state["_last_processed_human_count"] = human_count
-                            state["_consumed_this_invoke"] = (
-                                True  # Mark as consumed for this invoke
-                            )
-                            state["_last_waiting_node"] = (
-                                None  # Clear since we're moving on
-                            )
-                            return Command(goto=next_node, update=state)
-
-                        # Already consumed in this invoke, or no new message - pause execution
-                        # Store this waiting node as the resume point
-                        state["_last_waiting_node"] = name
-                        return state
-                    else:
-                        # Process the state and get next node
-                        updated_state, next_node = self.state_machine.process_state(
-                            state,
-                            self.agent,
-                            self.authoritative_user_id,
-                            self.current_token_context,
-                        )
-                        # Return Command with routing information
-                        return Command(goto=next_node, update=updated_state)
-
-                return node_func
-
-            workflow.add_node(state_name, make_node_func(state_name, state_type))  # type: ignore[no-untyped-call]
-
-        # Add a resume dispatcher node that routes to the correct starting point
-        def resume_dispatcher(state: dict[str, Any]) -> Command[Any]:
-            """Dispatcher that resumes from last waiting node or starts from initial state"""
-            last_waiting_node = state.get("_last_waiting_node")
-
-            if last_waiting_node and last_waiting_node in node_names:
-                # Resume from last waiting node
-                return Command(goto=last_waiting_node, update=state)
-            else:
-                # New conversation - start from initial state
-                return Command(goto=initial_state, update=state)
-
-        workflow.add_node("__resume_dispatcher__", resume_dispatcher)  # type: ignore[type-var]
-
-        logger.info("Created nodes", node_count=len(node_names), nodes=node_names)
-
-        # Set entry point to resume dispatcher
-        workflow.set_entry_point("__resume_dispatcher__")
-
-        # No need for explicit edges - nodes return Command(goto=X) which handles routing
-        # The only explicit edge needed is for terminal states
-        for state_name, state_config in states_config.items():
-            state_type = state_config.get("type", "")
-            if state_type == "terminal":
-                # Terminal states always go to END
-                workflow.add_edge(state_name, END)
-
-        # Compile with checkpointer only
-        return workflow.compile(checkpointer=self.checkpointer, debug=False)
+        # Stream for the current turn's response text (streaming requests only)
+        self.current_response_stream: Any = None
+
+        # Thread state values as of this session's last turn (None = read from
+        # the checkpoint), so a turn reads the checkpoint at most once
+        self.state_values: Optional[dict[str, Any]] = None
+
+    def _invoke_config(self) -> dict[str, Any]:
+        """Build the runnable config for a graph invocation of this session."""
+        return {
+            "configurable": {
+                "thread_id": self.thread_id,
+                "agent": self.agent,
+                "authoritative_user_id": self.authoritative_user_id,
+                "token_context": self.current_token_context,
+                "response_stream": self.current_response_stream,
+            }
+        }
 
     def get_initial_response(self) -> str | list[str | dict[str, Any]]:
         """Get the initial response from the agent by checking conversation history."""
@@ -1182,7 +1443,11 @@ class ConversationSession:
             else:
                 # New conversation - initialize and get first response
                 initial_state = self.state_machine.create_initial_state()
-                result = self.app.invoke(initial_state, config=self.thread_config)
+                result = self.app.invoke(
+                    initial_state,
+                    config=self._invoke_config(),
+                    durability=self.state_machine.checkpoint_durability,
+                )
 
                 if result.get("messages"):
                     last_message = result["messages"][-1]
@@ -1198,6 +1463,28 @@ class ConversationSession:
             )
             return ""
 
+    def get_state_values(self) -> dict[str, Any]:
+        """Get the thread state values, reading the checkpoint only if not known."""
+        if self.state_values is None:
+            self.state_values = self._get_state_with_retry().values or {}
+        return self.state_values
+
+    def invalidate_state(self) -> None:
+        """Forget the known thread state, e.g. after another process changed it."""
+        self.state_values = None
+
+    def uses_current_graph(self) -> bool:
+        """Whether the config file and checkpointer still map to this session's graph.
+
+        False once the lg-prompt config changed on disk or the checkpointer was
+        replaced, so the state machine and graph this session holds are outdated.
+        """
+        try:
+            _, app = get_compiled_graph(self.config_path, get_postgres_checkpointer())
+        except OSError:
+            return False
+        return app is self.app
+
     def _get_state_with_retry(self) -> Any:
         """Get the current state from LangGraph with connection error handling and retry.
 
@@ -1215,20 +1502,18 @@ class ConversationSession:
                 or "the connection" in error_str
             ):
                 logger.warning(
-                    "PostgresSaver connection lost, resetting and retrying",
+                    "PostgresSaver connection lost, retrying",
                     error=str(e),
                     error_type=type(e).__name__,
                 )
-                reset_postgres_checkpointer()
-                # Recreate the graph with a fresh checkpointer
-                self.checkpointer = get_postgres_checkpointer()
-                self.app = self._create_graph()
-                # Retry once
+                # The saver borrows connections from the pool, which validates them
+                # on checkout, so a retry gets a fresh connection without rebuilding
+                # the checkpointer or recompiling the graph
                 try:
                     return self.app.get_state(self.thread_config)
                 except Exception as e2:
                     logger.error(
-                        "Failed to get state after connection reset",
+                        "Failed to get state after connection retry",
                         error=str(e2),
                         error_type=type(e2).__name__,
                     )
@@ -1236,7 +1521,12 @@ class ConversationSession:
             else:
                 raise
 
-    def send_message(self, message: str, token_context: Optional[str] = None) -> str:
+    def send_message(
+        self,
+        message: str,
+        token_context: Optional[str] = None,
+        response_stream: Any = None,
+    ) -> str:
         """
         Send a message to the agent and return the response.
         Uses checkpointed thread state for persistence across process restarts.
@@ -1244,6 +1534,7 @@ class ConversationSession:
         Args:
             message: The user message to send to the agent
             token_context: Optional context for token counting (e.g., "session_123")
+            response_stream: Optional ResponseStream for states with `stream: true`
 
         Returns:
             The agent's response message as a string
@@ -1256,12 +1547,16 @@ class ConversationSession:
         if not message.strip():
             return "Please provide a valid message."
 
+        self.current_response_stream = response_stream
+
         try:
-            # Get current thread state with retry logic for connection errors
-            current_state = self._get_state_with_retry()
+            # Known thread state, or the checkpoint (with retry logic for
+            # connection errors); the graph result replaces it below
+            state_values = self.get_state_values()
+            self.state_values = None
 
             # Initialize conversation if needed
-            if not current_state.values:
+            if not state_values:
                 # First message - initialize with empty state and let the graph handle initialization
                 initial_state = self.state_machine.create_initial_state()
 
@@ -1274,8 +1569,9 @@ class ConversationSession:
 
                 # Only mark as consumed if initial_state is NOT a waiting state
                 # Waiting states need to consume the first message themselves
-                settings = self.state_machine.config.get("settings", {})
-                initial_state_name = settings.get("initial_state", "")
+                initial_state_name = self.state_machine.compiled.settings.get(
+                    "initial_state", ""
+                )
                 if not self.state_machine.is_waiting_state(initial_state_name):
                     # Mark this kickoff message as already processed so waiting nodes don't consume it
                     initial_state["_last_processed_human_count"] = 1
@@ -1287,16 +1583,23 @@ class ConversationSession:
                 if token_context:
                     self.current_token_context = token_context
 
-                result: Any = self.app.invoke(initial_state, config=self.thread_config)
+                result: Any = self.app.invoke(
+                    initial_state,
+                    config=self._invoke_config(),
+                    durability=self.state_machine.checkpoint_durability,
+                )
             else:
                 # Existing conversation - add user message and continue
                 # Get the current state and add the new message
                 # Note: Copy the state to avoid modifying the original checkpoint state
                 # This is critical for PostgreSQL saver to work correctly
-                current_values = current_state.values.copy()
+                current_values = state_values.copy()
 
-                # Add the new user message to the existing messages
-                current_values["messages"].append(HumanMessage(content=message))
+                # Add the new user message to a copy of the existing messages
+                current_values["messages"] = [
+                    *current_values["messages"],
+                    HumanMessage(content=message),
+                ]
                 current_values["_consumed_this_invoke"] = (
                     False  # Reset flag so first waiting node can consume
                 )
@@ -1306,7 +1609,9 @@ class ConversationSession:
                     self.current_token_context = token_context
 
                 result2: Any = self.app.invoke(
-                    current_values, config=self.thread_config
+                    current_values,
+                    config=self._invoke_config(),
+                    durability=self.state_machine.checkpoint_durability,
                 )
 
             # Extract agent response
@@ -1314,24 +1619,28 @@ class ConversationSession:
             current_result = result if "result" in locals() else result2
             if current_result and current_result.get("messages"):
                 # Find the last AI message
-                for msg in reversed(current_result["messages"]):
-                    if isinstance(msg, AIMessage):
-                        if isinstance(msg.content, str):
-                            agent_response = msg.content
-                        else:
-                            # Handle list content by joining or converting to string
-                            agent_response = str(msg.content)
-                        break
+                last_message = last_ai_message(current_result)
+                if last_message is not None:
+                    if isinstance(last_message.content, str):
+                        agent_response = last_message.content
+                    else:
+                        # Handle list content by joining or converting to string
+                        agent_response = str(last_message.content)
+
+            if isinstance(current_result, dict):
+                self.state_values = current_result
 
             # Check if conversation ended and reset if needed
             if current_result and self.state_machine.is_terminal_state(
                 current_result.get("current_state")
             ):
                 # Check if the end state has reset_behavior configured
-                end_state_config = self.state_machine.config.get("states", {}).get(
-                    "end", {}
+                end_state = self.state_machine.compiled.state("end")
+                reset_behavior = (
+                    end_state.config.get("reset_behavior")
+                    if end_state is not None
+                    else None
                 )
-                reset_behavior = end_state_config.get("reset_behavior")
 
                 if reset_behavior:
                     # Reset behavior is configured - reset the conversation
@@ -1348,6 +1657,7 @@ class ConversationSession:
                         self.app.update_state(
                             self.thread_config, reset_state_without_current
                         )
+                        self.invalidate_state()
 
                     if agent_response:
                         agent_response += (
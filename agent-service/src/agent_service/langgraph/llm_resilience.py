@@ -0,0 +1,222 @@
+"""
+Resilience helpers for LlamaStack response calls.
+
+- Retry backoff: exponential with full jitter, so retries from many sessions
+  don't hit a recovering replica in lock-step.
+- Circuit breaker per LlamaStack endpoint: after consecutive failures (timeouts,
+  connection errors) calls fail fast for a cool-down period instead of each
+  waiting for the client timeout; one probe call is let through afterwards.
+- Hedge executor: runs a second copy of a slow request for states that opt
+  in with `hedge` (see create_response_with_retry).
+
+Configuration (environment variables):
+    LLM_CIRCUIT_FAILURE_THRESHOLD: consecutive failures that open the circuit
+        (default 5, 0 disables the breaker)
+    LLM_CIRCUIT_RESET_SECONDS: how long an open circuit fails fast (default 30)
+    LLM_RETRY_BASE_DELAY_SECONDS: first retry backoff ceiling (default 1)
+    LLM_RETRY_MAX_DELAY_SECONDS: maximum retry backoff ceiling (default 8)
+    LLM_HEDGE_MAX_WORKERS: threads for hedged requests (default 16)
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from shared_models import configure_logging
+
+logger = configure_logging("agent-service")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry `attempt` (0-based)."""
+    base = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "1"))
+    cap = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """Whether an error means the endpoint is unhealthy (vs. a bad request)."""
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code >= 500 or status_code == 429
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    error_msg = f"{type(error).__name__} {error}".lower()
+    return any(marker in error_msg for marker in ("timeout", "connection", "network"))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one endpoint.
+
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_seconds`, when a single probe call is allowed.
+    The probe's outcome closes or re-opens the circuit; a probe that ends
+    without reaching the endpoint is handed back with release_probe().
+    """
+
+    def __init__(
+        self, endpoint: str, failure_threshold: int = 5, reset_seconds: float = 30.0
+    ) -> None:
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._probe_thread: Optional[int] = None
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def allow_request(self) -> bool:
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if (
+                time.monotonic() - self._opened_at >= self.reset_seconds
+                and not self._probe_in_flight
+            ):
+                self._probe_in_flight = True
+                self._probe_thread = threading.get_ident()
+                return True
+            self._rejected += 1
+            return False
+
+    def release_probe(self) -> None:
+        """Let another call probe if this thread's probe never got an outcome.
+
+        Calls can end before reaching the endpoint (e.g. blocked by an input
+        shield); without this the circuit would stay open.
+        """
+        with self._lock:
+            if self._probe_in_flight and self._probe_thread == threading.get_ident():
+                self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("LlamaStack circuit closed", endpoint=self.endpoint)
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._consecutive_failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if was_probe or (
+                self._opened_at is None
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._times_opened += 1
+                logger.warning(
+                    "LlamaStack circuit opened",
+                    endpoint=self.endpoint,
+                    consecutive_failures=self._consecutive_failures,
+                    reset_seconds=self.reset_seconds,
+                )
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            if self._opened_at is None:
+                state = "closed"
+            elif self._probe_in_flight:
+                state = "half_open"
+            else:
+                state = "open"
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+            }
+
+
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """Get the shared circuit breaker for a LlamaStack endpoint."""
+    breaker = _circuit_breakers.get(endpoint)
+    if breaker is None:
+        with _circuit_breakers_lock:
+            breaker = _circuit_breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    endpoint,
+                    failure_threshold=int(
+                        os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5")
+                    ),
+                    reset_seconds=float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30")),
+                )
+                _circuit_breakers[endpoint] = breaker
+    return breaker
+
+
+def get_circuit_breaker_stats() -> dict[str, Any]:
+    with _circuit_breakers_lock:
+        breakers = list(_circuit_breakers.values())
+    return {breaker.endpoint: breaker.get_stats() for breaker in breakers}
+
+
+# Pool for hedged (duplicate) requests
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """Get the global executor for hedged requests (LLM_HEDGE_MAX_WORKERS)."""
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("LLM_HEDGE_MAX_WORKERS", "16")),
+                    thread_name_prefix="llm-hedge",
+                )
+    return _hedge_executor
+
+
+class HedgeStats:
+    """How often hedged requests were sent and how often they won."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def record(self, hedged: bool, hedge_won: bool) -> None:
+        with self._lock:
+            self._calls += 1
+            self._hedged += int(hedged)
+            self._hedge_wins += int(hedge_won)
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "hedged": self._hedged,
+                "hedge_wins": self._hedge_wins,
+            }
+
+
+_hedge_stats = HedgeStats()
+
+
+def get_hedge_stats() -> HedgeStats:
+    return _hedge_stats
@@ -0,0 +1,114 @@
+"""
+Incremental index over the conversation messages in the agent state.
+
+Waiting nodes, prompt placeholders and response extraction need the number of
+user messages, the last user / assistant message and the rendered conversation
+history. Instead of rescanning `messages` for each lookup, the index in
+`_message_index` records them for the messages seen so far and is extended
+with only the messages appended since, so lookups stay constant-time as the
+conversation grows. It is stored in the (checkpointed) state, so it carries
+over between turns.
+
+The index checks that the message it ended at is still in the same position;
+if messages were replaced or removed it is rebuilt from scratch.
+"""
+
+import zlib
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+MESSAGE_INDEX_FIELD = "_message_index"
+
+_HISTORY_PREFIXES = {"HumanMessage": "User: ", "AIMessage": "Assistant: "}
+
+
+def _fingerprint(msg: Any) -> list[Any]:
+    """Identity of the last indexed message (message IDs are assigned later)."""
+    content = getattr(msg, "content", None)
+    return [
+        msg.__class__.__name__,
+        zlib.crc32(content.encode()) if isinstance(content, str) else repr(content),
+    ]
+
+
+def _empty_index() -> dict[str, Any]:
+    return {
+        "count": 0,
+        "fingerprint": None,
+        "human_count": 0,
+        "last_human": -1,
+        "last_ai": -1,
+        # Rendered history and the number of messages it covers (rendered only
+        # once a prompt uses it)
+        "history": None,
+        "history_count": 0,
+    }
+
+
+def get_message_index(state: dict[str, Any]) -> dict[str, Any]:
+    """Get the message index for a state, extending it over new messages."""
+    messages = state.get("messages") or []
+    index = state.get(MESSAGE_INDEX_FIELD)
+    count = len(messages)
+
+    if (
+        not isinstance(index, dict)
+        or index.get("count", 0) > count
+        or (
+            index.get("count", 0) > 0
+            and index.get("fingerprint") != _fingerprint(messages[index["count"] - 1])
+        )
+    ):
+        index = _empty_index()
+    elif index["count"] == count:
+        return index
+
+    index = dict(index)
+    for position in range(index["count"], count):
+        msg = messages[position]
+        if isinstance(msg, HumanMessage):
+            index["human_count"] += 1
+            index["last_human"] = position
+        elif isinstance(msg, AIMessage):
+            index["last_ai"] = position
+    index["count"] = count
+    index["fingerprint"] = _fingerprint(messages[-1]) if messages else None
+
+    state[MESSAGE_INDEX_FIELD] = index
+    return index
+
+
+def human_message_count(state: dict[str, Any]) -> int:
+    return int(get_message_index(state)["human_count"])
+
+
+def last_human_message(state: dict[str, Any]) -> Optional[BaseMessage]:
+    position = get_message_index(state)["last_human"]
+    return state["messages"][position] if position >= 0 else None
+
+
+def last_ai_message(state: dict[str, Any]) -> Optional[BaseMessage]:
+    position = get_message_index(state)["last_ai"]
+    return state["messages"][position] if position >= 0 else None
+
+
+def conversation_history(state: dict[str, Any]) -> str:
+    """User and assistant messages as "User: ..." / "Assistant: ..." lines."""
+    index = get_message_index(state)
+    messages = state.get("messages") or []
+    history = index["history"]
+    if history is None:
+        history, start = "", 0
+    else:
+        start = index["history_count"]
+    if start < index["count"]:
+        lines = [history] if history else []
+        for msg in messages[start : index["count"]]:
+            prefix = _HISTORY_PREFIXES.get(msg.__class__.__name__)
+            if prefix is not None:
+                lines.append(f"{prefix}{msg.content}")
+        history = "\n".join(lines)
+        index = dict(index, history=history, history_count=index["count"])
+        state[MESSAGE_INDEX_FIELD] = index
+    return str(history).strip()
@@ -0,0 +1,124 @@
+"""
+Verdict cache for moderation shields.
+
+Input shields check the last user message on every LLM call, so a turn that
+passes through several LLM-backed states moderates the same text repeatedly,
+and short common replies ("yes", "proceed") are moderated for every user.
+Verdicts are cached per (shield model, normalized text hash, ignored
+categories) in a bounded LRU with a TTL. Failed shield calls are never cached.
+
+Configuration (environment variables):
+    MODERATION_CACHE_SIZE: maximum number of cached verdicts (default 4096,
+        0 disables the cache)
+    MODERATION_CACHE_TTL_SECONDS: how long a verdict is reused (default 3600)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+# Returned by get() when there is no usable cached verdict
+MISS = object()
+
+CacheKey = tuple[str, str, frozenset[str]]
+
+
+def normalize_moderation_text(text: str) -> str:
+    """Collapse whitespace and case so trivially different inputs share a verdict."""
+    return " ".join(text.split()).casefold()
+
+
+class ModerationCache:
+    """Thread-safe LRU + TTL cache of shield verdicts."""
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 3600.0) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (stored_at, verdict); verdict is the block message or None
+        self._entries: OrderedDict[CacheKey, tuple[float, Optional[str]]] = (
+            OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def make_key(
+        shield_model: str, text: str, ignored_categories: Iterable[str]
+    ) -> CacheKey:
+        digest = hashlib.sha256(
+            normalize_moderation_text(text).encode("utf-8")
+        ).hexdigest()
+        return shield_model, digest, frozenset(ignored_categories)
+
+    def get(self, key: CacheKey) -> Any:
+        """Return the cached verdict (block message or None), or MISS."""
+        if not self.enabled:
+            return MISS
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] >= self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: CacheKey, verdict: Optional[str]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), verdict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Global moderation cache instance
+_moderation_cache: Optional[ModerationCache] = None
+_moderation_cache_lock = threading.Lock()
+
+
+def get_moderation_cache() -> ModerationCache:
+    """Get the global moderation verdict cache."""
+    global _moderation_cache
+    if _moderation_cache is None:
+        with _moderation_cache_lock:
+            if _moderation_cache is None:
+                _moderation_cache = ModerationCache(
+                    max_size=int(os.getenv("MODERATION_CACHE_SIZE", "4096")),
+                    ttl_seconds=float(
+                        os.getenv("MODERATION_CACHE_TTL_SECONDS", "3600")
+                    ),
+                )
+    return _moderation_cache
@@ -0,0 +1,56 @@
+"""
+Precompiled phrase and pattern matching for state machine configs.
+
+`response_analysis` trigger/exclude phrases, `check_correction` correction
+phrases and `check_phrases` conditions are case-insensitive substring tests
+against a response or state field. Each phrase list is compiled once into a
+single alternation regex over the lower-cased phrases, so a test is one regex
+search of the text no matter how many phrases the list has. `extract_data`
+patterns are compiled once as well.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+# Config keys whose values are phrase lists
+PHRASE_LIST_KEYS = frozenset(
+    {"trigger_phrases", "exclude_phrases", "correction_phrases", "check_phrases"}
+)
+
+
+class PhraseMatcher:
+    """Tests whether any of a set of phrases occurs in a lower-cased text."""
+
+    def __init__(self, phrases: Iterable[Any]) -> None:
+        lowered = {str(phrase).lower() for phrase in phrases}
+        # An empty phrase is a substring of everything
+        self._matches_everything = "" in lowered
+        self._pattern: Optional[re.Pattern[str]] = None
+        if lowered and not self._matches_everything:
+            self._pattern = re.compile(
+                "|".join(
+                    re.escape(phrase)
+                    for phrase in sorted(lowered, key=len, reverse=True)
+                )
+            )
+
+    def search(self, text_lower: str) -> bool:
+        """Whether any phrase occurs in `text_lower` (already lower-cased)."""
+        if self._matches_everything:
+            return True
+        return (
+            self._pattern is not None and self._pattern.search(text_lower) is not None
+        )
+
+
+@lru_cache(maxsize=1024)
+def get_phrase_matcher(phrases: tuple[Any, ...]) -> PhraseMatcher:
+    """Get the compiled matcher for a phrase list."""
+    return PhraseMatcher(phrases)
+
+
+@lru_cache(maxsize=256)
+def get_pattern(pattern: str) -> re.Pattern[str]:
+    """Get a compiled regex (raises re.error for invalid patterns)."""
+    return re.compile(pattern)
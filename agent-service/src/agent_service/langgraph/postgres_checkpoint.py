@@ -4,16 +4,343 @@ PostgreSQL checkpoint implementation for LangGraph.
 This module provides PostgreSQL-based checkpointing for LangGraph state machines.
 The LangGraph tables are set up by the database migration job, so this module
 just creates PostgresSaver instances with proper connection management.
+
+The saver is backed by the shared sync connection pool (sized by the
+DB_SYNC_POOL_* settings): each checkpoint read/write borrows a connection and
+returns it, so checkpoint I/O from concurrent sessions runs in parallel and
+broken connections are replaced by the pool instead of the saver.
+
+Setting CHECKPOINT_SERIALIZER=delta switches to DeltaPostgresSaver, which stores
+message history incrementally and compresses large blobs. Checkpoints written
+in delta mode can only be read back in delta mode.
 """
 
-from typing import Optional
+import os
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Iterator, Optional, Sequence
 
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointTuple
 from langgraph.checkpoint.postgres import PostgresSaver
+from psycopg_pool import ConnectionPool
 from shared_models import configure_logging
 from shared_models.database import get_database_manager
 
+from .checkpoint_serde import (
+    MESSAGE_BLOB_CHANNEL,
+    MESSAGE_REFS_TYPE,
+    MESSAGES_CHANNEL,
+    CompressedSerializer,
+    MessageRefs,
+    dump_message_refs,
+    load_message_refs,
+    message_key,
+)
+
 logger = configure_logging("agent-service")
 
+SELECT_MESSAGE_BLOBS_SQL = """
+    SELECT version, type, blob FROM checkpoint_blobs
+    WHERE thread_id = %s AND checkpoint_ns = %s AND channel = %s AND version = ANY(%s)
+"""
+
+
+class PooledPostgresSaver(PostgresSaver):
+    """PostgresSaver that lets threads use the connection pool concurrently.
+
+    PostgresSaver guards every operation with a saver-wide lock, which is needed
+    for a single shared connection but serializes all checkpoint I/O when the
+    saver is given a pool. Each operation here checks out its own pooled
+    connection, so the lock is replaced with a no-op.
+    """
+
+    def __init__(self, conn: ConnectionPool[Any], **kwargs: Any) -> None:
+        super().__init__(conn, **kwargs)
+        self.lock = nullcontext()  # type: ignore[assignment]
+
+
+class DeltaPostgresSaver(PooledPostgresSaver):
+    """PooledPostgresSaver that writes conversation history incrementally.
+
+    The `messages` channel is append-only but PostgresSaver re-serializes the
+    whole list into a new blob for every checkpoint, so write volume grows
+    quadratically with conversation length. Here each message is stored once as
+    a content-addressed blob and the channel blob only holds the list of message
+    keys. Pending writes to `messages` that repeat stored messages (nodes
+    return the full state) are stored as message keys the same way; writes of
+    only new messages stay inline, since the reducer gives those messages ids
+    (and so new keys) later. Other blobs and pending writes are compressed
+    above a size threshold. Reads resolve the keys after loading, so get_state
+    sees plain messages.
+    """
+
+    def __init__(
+        self,
+        conn: ConnectionPool[Any],
+        compress_min_bytes: int = 1024,
+        written_cache_threads: int = 1024,
+    ) -> None:
+        super().__init__(conn, serde=CompressedSerializer(min_bytes=compress_min_bytes))
+        # Message keys known to be stored, per (thread_id, checkpoint_ns), so
+        # unchanged history isn't resent. Bounded LRU; a miss only costs an
+        # idempotent re-insert.
+        self._written: OrderedDict[tuple[str, str], set[str]] = OrderedDict()
+        self._written_lock = threading.Lock()
+        self._written_cache_threads = written_cache_threads
+
+    def _known_keys(self, thread_id: str, checkpoint_ns: str) -> set[str]:
+        with self._written_lock:
+            keys = self._written.get((thread_id, checkpoint_ns))
+            if keys is None:
+                keys = set()
+                self._written[(thread_id, checkpoint_ns)] = keys
+                while len(self._written) > self._written_cache_threads:
+                    self._written.popitem(last=False)
+            else:
+                self._written.move_to_end((thread_id, checkpoint_ns))
+            return keys
+
+    def _forget_keys(self, thread_id: str, checkpoint_ns: str) -> None:
+        with self._written_lock:
+            self._written.pop((thread_id, checkpoint_ns), None)
+
+    def forget_threads(self, thread_ids: list[str]) -> None:
+        """Drop the known message keys of threads whose checkpoints were deleted."""
+        deleted = set(thread_ids)
+        with self._written_lock:
+            for key in [key for key in self._written if key[0] in deleted]:
+                del self._written[key]
+
+    def _dump_blobs(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        values: dict[str, Any],
+        versions: ChannelVersions,
+    ) -> list[tuple[str, str, str, str, str, bytes | None]]:
+        messages = values.get(MESSAGES_CHANNEL)
+        if MESSAGES_CHANNEL not in versions or not isinstance(messages, list):
+            return super()._dump_blobs(thread_id, checkpoint_ns, values, versions)
+
+        other_versions = {k: v for k, v in versions.items() if k != MESSAGES_CHANNEL}
+        rows = super()._dump_blobs(thread_id, checkpoint_ns, values, other_versions)
+
+        keys, message_rows = self._dump_messages(thread_id, checkpoint_ns, messages)
+        rows.extend(message_rows)
+        self._known_keys(thread_id, checkpoint_ns).update(keys)
+        rows.append(
+            (
+                thread_id,
+                checkpoint_ns,
+                MESSAGES_CHANNEL,
+                str(versions[MESSAGES_CHANNEL]),
+                MESSAGE_REFS_TYPE,
+                dump_message_refs(keys),
+            )
+        )
+        return rows
+
+    def _dump_messages(
+        self, thread_id: str, checkpoint_ns: str, messages: list[Any]
+    ) -> tuple[MessageRefs, list[tuple[str, str, str, str, str, bytes | None]]]:
+        """Return the messages' keys and blob rows for those not stored yet."""
+        known = self._known_keys(thread_id, checkpoint_ns)
+        keys = MessageRefs()
+        rows: list[tuple[str, str, str, str, str, bytes | None]] = []
+        for message in messages:
+            type_, data = self.serde.dumps_typed(message)
+            key = message_key(type_, data)
+            if key not in known and key not in keys:
+                rows.append(
+                    (thread_id, checkpoint_ns, MESSAGE_BLOB_CHANNEL, key, type_, data)
+                )
+            keys.append(key)
+        return keys, rows
+
+    def _dump_writes(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        task_id: str,
+        task_path: str,
+        writes: Sequence[tuple[str, Any]],
+    ) -> list[tuple[str, str, str, str, str, int, str, str, bytes]]:
+        rows = super()._dump_writes(
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            task_id,
+            task_path,
+            # Message keys are dumped below, don't serialize them twice
+            [
+                (channel, None if isinstance(value, MessageRefs) else value)
+                for channel, value in writes
+            ],
+        )
+        return [
+            (
+                (*row[:7], MESSAGE_REFS_TYPE, dump_message_refs(value))
+                if isinstance(value, MessageRefs)
+                else row
+            )
+            for row, (_, value) in zip(rows, writes)
+        ]
+
+    def _load_writes(
+        self, writes: list[tuple[bytes, bytes, bytes, bytes]]
+    ) -> list[tuple[str, str, Any]]:
+        return [
+            (
+                task_id.decode(),
+                channel.decode(),
+                (
+                    load_message_refs(value)
+                    if type_.decode() == MESSAGE_REFS_TYPE
+                    else self.serde.loads_typed((type_.decode(), value))
+                ),
+            )
+            for task_id, channel, type_, value in writes or []
+        ]
+
+    def _load_blobs(
+        self, blob_values: list[tuple[bytes, bytes, bytes]]
+    ) -> dict[str, Any]:
+        if not blob_values:
+            return {}
+        refs = {
+            k.decode(): load_message_refs(v)
+            for k, t, v in blob_values
+            if t.decode() == MESSAGE_REFS_TYPE
+        }
+        if not refs:
+            return super()._load_blobs(blob_values)
+        other = [
+            (k, t, v) for k, t, v in blob_values if t.decode() != MESSAGE_REFS_TYPE
+        ]
+        return {**super()._load_blobs(other), **refs}
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: Any,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        if not config["configurable"].get("checkpoint_id"):
+            # First checkpoint of the thread: anything cached for it is from
+            # before the thread was deleted (e.g. pruned by another worker)
+            self._forget_keys(
+                config["configurable"]["thread_id"],
+                config["configurable"].get("checkpoint_ns", ""),
+            )
+        try:
+            return super().put(config, checkpoint, metadata, new_versions)
+        except Exception:
+            # Keys were marked as stored while dumping; drop them so the next
+            # checkpoint re-inserts any message blobs that didn't make it
+            self._forget_keys(
+                config["configurable"]["thread_id"],
+                config["configurable"].get("checkpoint_ns", ""),
+            )
+            raise
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        known = self._known_keys(thread_id, checkpoint_ns)
+        blob_rows = []
+        encoded = []
+        for channel, value in writes:
+            if channel == MESSAGES_CHANNEL and isinstance(value, list):
+                keys, rows = self._dump_messages(thread_id, checkpoint_ns, value)
+                if len(rows) < len(set(keys)):
+                    value = keys
+                    blob_rows.extend(rows)
+                    known.update(keys)
+            encoded.append((channel, value))
+        try:
+            if blob_rows:
+                with self._cursor(pipeline=True) as cur:
+                    cur.executemany(self.UPSERT_CHECKPOINT_BLOBS_SQL, blob_rows)
+            super().put_writes(config, encoded, task_id, task_path)
+        except Exception:
+            self._forget_keys(thread_id, checkpoint_ns)
+            raise
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self._resolve_messages(super().get_tuple(config))
+
+    def list(
+        self, config: RunnableConfig | None, **kwargs: Any
+    ) -> Iterator[CheckpointTuple]:
+        # Materialize first so resolving doesn't check out a second connection
+        # while the listing cursor is still open
+        for checkpoint_tuple in list(super().list(config, **kwargs)):
+            resolved = self._resolve_messages(checkpoint_tuple)
+            if resolved is not None:
+                yield resolved
+
+    def _resolve_messages(
+        self, checkpoint_tuple: CheckpointTuple | None
+    ) -> CheckpointTuple | None:
+        if checkpoint_tuple is None:
+            return None
+        channel_values = checkpoint_tuple.checkpoint["channel_values"]
+        refs = channel_values.get(MESSAGES_CHANNEL)
+        pending_writes = checkpoint_tuple.pending_writes or []
+        all_refs = {
+            key
+            for value in [refs, *(write[2] for write in pending_writes)]
+            if isinstance(value, MessageRefs)
+            for key in value
+        }
+        if not all_refs:
+            return checkpoint_tuple
+
+        thread_id = checkpoint_tuple.config["configurable"]["thread_id"]
+        checkpoint_ns = checkpoint_tuple.config["configurable"].get("checkpoint_ns", "")
+        with self._cursor() as cur:
+            cur.execute(
+                SELECT_MESSAGE_BLOBS_SQL,
+                (thread_id, checkpoint_ns, MESSAGE_BLOB_CHANNEL, list(all_refs)),
+            )
+            rows = cur.fetchall()
+
+        by_key = {
+            row["version"]: self.serde.loads_typed((row["type"], row["blob"]))
+            for row in rows
+        }
+        missing = all_refs - by_key.keys()
+        if missing:
+            raise RuntimeError(
+                f"Checkpoint for thread {thread_id} references {len(missing)} "
+                "missing message blobs"
+            )
+
+        if isinstance(refs, MessageRefs):
+            channel_values[MESSAGES_CHANNEL] = [by_key[key] for key in refs]
+        self._known_keys(thread_id, checkpoint_ns).update(by_key)
+        return checkpoint_tuple._replace(
+            pending_writes=[
+                (
+                    (task_id, channel, [by_key[key] for key in value])
+                    if isinstance(value, MessageRefs)
+                    else (task_id, channel, value)
+                )
+                for task_id, channel, value in pending_writes
+            ]
+        )
+
+
 # Global checkpointer instance for connection reuse
 _checkpointer: Optional[PostgresSaver] = None
 
@@ -24,19 +351,31 @@ def get_postgres_checkpointer() -> PostgresSaver:
     Uses a singleton pattern to reuse the same checkpointer instance across the application,
     which improves performance by reusing the underlying database connection pool.
 
-    If the connection is closed, recreates the checkpointer to allow the session to retry.
+    The saver holds the connection pool rather than a single connection, so it
+    stays valid across reconnects and the compiled graphs built on it can be reused.
     """
     global _checkpointer
 
     if _checkpointer is None:
         try:
             # LangGraph tables should already be set up by the database migration job
-            # Get a connection from the pool for the checkpointer
+            # Hand the whole pool to the saver so connections are borrowed per operation
             db_manager = get_database_manager()
-            conn = db_manager.get_sync_connection()
-            _checkpointer = PostgresSaver(conn)
+            pool = db_manager.get_sync_pool()
+            serializer = os.getenv("CHECKPOINT_SERIALIZER", "default").lower()
+            if serializer == "delta":
+                _checkpointer = DeltaPostgresSaver(
+                    pool,
+                    compress_min_bytes=int(
+                        os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "1024")
+                    ),
+                )
+            else:
+                _checkpointer = PooledPostgresSaver(pool)
             logger.debug(
-                "Created PostgresSaver with shared configuration and connection pooling"
+                "Created PostgresSaver backed by sync connection pool",
+                pool_max_size=db_manager.config.sync_pool_max_size,
+                serializer=serializer,
             )
         except Exception as e:
             logger.error(
@@ -52,6 +391,12 @@ def get_postgres_checkpointer() -> PostgresSaver:
     return _checkpointer
 
 
+def forget_checkpoint_threads(thread_ids: list[str]) -> None:
+    """Tell this process's checkpointer that threads' checkpoints were deleted."""
+    if isinstance(_checkpointer, DeltaPostgresSaver):
+        _checkpointer.forget_threads(thread_ids)
+
+
 def close_postgres_checkpointer() -> None:
     """Close the PostgresSaver instance and clean up resources."""
     global _checkpointer
@@ -84,3 +429,16 @@ def reset_postgres_checkpointer() -> None:
         _checkpointer = None
     else:
         logger.debug("No PostgresSaver instance to reset")
+
+
+def get_checkpoint_pool_stats() -> dict[str, Any]:
+    """Get connection pool statistics for the checkpointer (including wait times)."""
+    try:
+        return get_database_manager().get_sync_pool_stats()
+    except Exception as e:
+        logger.debug(
+            "Could not get checkpoint pool stats",
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        return {}
@@ -0,0 +1,196 @@
+"""
+Local fast path for intent_classifier states.
+
+Obvious answers ("yes", "no", "go back to the router") don't need an LLM round
+trip to classify. An intent_classifier state can configure a pre-classifier
+that runs locally before the LLM; when its confidence reaches the threshold
+its intent is used directly, otherwise classification falls through to the
+LLM as before.
+
+State configuration:
+
+    pre_classifier:
+      type: "rules"              # default; see register_pre_classifier()
+      threshold: 0.9             # minimum confidence to skip the LLM
+      rules:
+        - intent: "YES"
+          phrases: ["yes", "sure", "go ahead"]   # whole message, confidence 1.0
+        - intent: RETURN_TO_ROUTER
+          patterns: ["\\brouter\\b"]             # regex search
+          confidence: 0.95                       # default 0.9 for patterns
+
+Input is matched after lower-casing, collapsing whitespace and stripping
+surrounding punctuation. If rules for different intents match, the message is
+treated as ambiguous and sent to the LLM.
+
+Other pre-classifiers (e.g. a small local model) can be plugged in with
+register_pre_classifier(name, factory); the factory receives the
+`pre_classifier` mapping and the state's intent names.
+"""
+
+import re
+import string
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Protocol
+
+from shared_models import configure_logging
+
+logger = configure_logging("agent-service")
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_PHRASE_CONFIDENCE = 1.0
+DEFAULT_PATTERN_CONFIDENCE = 0.9
+
+_STRIP_CHARS = string.whitespace + string.punctuation
+
+
+@dataclass(frozen=True)
+class PreClassification:
+    intent: str
+    confidence: float
+
+
+class PreClassifier(Protocol):
+    threshold: float
+
+    def classify(self, user_input: str) -> Optional[PreClassification]:
+        """Return the intent if confident enough, otherwise None."""
+
+
+def normalize_user_input(text: str) -> str:
+    return " ".join(text.split()).casefold().strip(_STRIP_CHARS)
+
+
+class RulePreClassifier:
+    """Phrase-list and regex rules compiled once per state."""
+
+    def __init__(self, config: dict[str, Any], intents: list[str]) -> None:
+        self.threshold = float(config.get("threshold", DEFAULT_THRESHOLD))
+        # normalized phrase -> (intent, confidence)
+        self._phrases: dict[str, tuple[str, float]] = {}
+        self._patterns: list[tuple[re.Pattern[str], str, float]] = []
+
+        for rule in config.get("rules", []):
+            intent = str(rule.get("intent", ""))
+            if intent not in intents:
+                logger.warning(
+                    "Ignoring pre-classifier rule for unknown intent",
+                    intent=intent,
+                    known_intents=intents,
+                )
+                continue
+
+            phrase_confidence = float(rule.get("confidence", DEFAULT_PHRASE_CONFIDENCE))
+            for phrase in rule.get("phrases", []):
+                self._phrases[normalize_user_input(str(phrase))] = (
+                    intent,
+                    phrase_confidence,
+                )
+
+            pattern_confidence = float(
+                rule.get("confidence", DEFAULT_PATTERN_CONFIDENCE)
+            )
+            for pattern in rule.get("patterns", []):
+                try:
+                    self._patterns.append(
+                        (re.compile(pattern, re.IGNORECASE), intent, pattern_confidence)
+                    )
+                except re.error as e:
+                    logger.warning(
+                        "Ignoring invalid pre-classifier pattern",
+                        intent=intent,
+                        pattern=pattern,
+                        error=str(e),
+                    )
+
+    def classify(self, user_input: str) -> Optional[PreClassification]:
+        text = normalize_user_input(user_input)
+        if not text:
+            return None
+
+        matches: dict[str, float] = {}
+        phrase_match = self._phrases.get(text)
+        if phrase_match is not None:
+            matches[phrase_match[0]] = phrase_match[1]
+        for pattern, intent, confidence in self._patterns:
+            if pattern.search(text):
+                matches[intent] = max(matches.get(intent, 0.0), confidence)
+
+        if len(matches) != 1:
+            # No match, or conflicting intents - let the LLM decide
+            return None
+        intent, confidence = next(iter(matches.items()))
+        return PreClassification(intent=intent, confidence=confidence)
+
+
+PreClassifierFactory = Callable[[dict[str, Any], list[str]], PreClassifier]
+
+_pre_classifier_factories: dict[str, PreClassifierFactory] = {
+    "rules": RulePreClassifier,
+}
+
+
+def register_pre_classifier(name: str, factory: PreClassifierFactory) -> None:
+    """Register a pre-classifier type usable as `pre_classifier.type` in YAML."""
+    _pre_classifier_factories[name] = factory
+
+
+def build_pre_classifier(
+    state_config: dict[str, Any],
+) -> Optional[PreClassifier]:
+    """Build the pre-classifier configured for an intent_classifier state."""
+    config = state_config.get("pre_classifier")
+    if not config:
+        return None
+
+    classifier_type = config.get("type", "rules")
+    factory = _pre_classifier_factories.get(classifier_type)
+    if factory is None:
+        logger.warning("Unknown pre-classifier type", type=classifier_type)
+        return None
+    intents = [str(name) for name in state_config.get("intent_actions", {})]
+    return factory(config, intents)
+
+
+class PreClassifierStats:
+    """Per-state counts of fast-path hits and LLM fall-throughs."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # state name -> [fast_path, llm, llm_total_ms]
+        self._states: dict[str, list[float]] = {}
+
+    def record_fast_path(self, state_name: str) -> None:
+        with self._lock:
+            self._states.setdefault(state_name, [0, 0, 0.0])[0] += 1
+
+    def record_llm(self, state_name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            entry = self._states.setdefault(state_name, [0, 0, 0.0])
+            entry[1] += 1
+            entry[2] += elapsed_ms
+
+    def get_stats(self) -> dict[str, Any]:
+        """Fast-path rate per state; time saved is estimated from the average
+        LLM classification latency of the same state."""
+        with self._lock:
+            states = {}
+            for state_name, (fast_path, llm, llm_total_ms) in self._states.items():
+                avg_llm_ms = llm_total_ms / llm if llm else 0.0
+                total = fast_path + llm
+                states[state_name] = {
+                    "fast_path": int(fast_path),
+                    "llm": int(llm),
+                    "fast_path_rate": round(fast_path / total, 3) if total else 0.0,
+                    "avg_llm_ms": round(avg_llm_ms, 1),
+                    "estimated_saved_ms": round(fast_path * avg_llm_ms, 1),
+                }
+            return states
+
+
+_pre_classifier_stats = PreClassifierStats()
+
+
+def get_pre_classifier_stats() -> PreClassifierStats:
+    return _pre_classifier_stats
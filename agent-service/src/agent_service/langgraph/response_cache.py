@@ -0,0 +1,254 @@
+"""
+Response cache for deterministic LLM calls in the state machine.
+
+intent_classifier and llm_validator states usually run at low temperature on
+short, repetitive inputs. States that opt in with `cache: true` in the
+lg-prompt YAML reuse a previous response for an identical request instead of
+calling the LLM again. The key is a hash of (model, system prompt, formatted
+prompt, last N conversation messages, temperature, tool settings).
+
+Entries live in a bounded in-memory LRU per worker. Optionally a shared
+Postgres tier (the llm_response_cache table) is consulted on a memory miss,
+so cached responses survive restarts and are shared between workers/replicas.
+
+State configuration:
+
+    cache: true                  # or a mapping:
+    cache:
+      ttl_seconds: 86400         # default LLM_RESPONSE_CACHE_TTL_SECONDS
+      history_messages: 2        # last N conversation messages in the key
+
+Configuration (environment variables):
+    LLM_RESPONSE_CACHE_SIZE: in-memory entries per worker (default 2048)
+    LLM_RESPONSE_CACHE_TTL_SECONDS: default entry lifetime (default 86400)
+    LLM_RESPONSE_CACHE_POSTGRES: "true" to enable the Postgres tier
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from shared_models import configure_logging
+from shared_models.database import get_database_manager
+
+logger = configure_logging("agent-service")
+
+DEFAULT_HISTORY_MESSAGES = 2
+
+# Expired Postgres rows are deleted every this many writes
+_EXPIRE_EVERY_PUTS = 500
+
+_SELECT_SQL = """
+SELECT response FROM llm_response_cache
+WHERE cache_key = %(cache_key)s AND expires_at > now()
+"""
+
+_UPSERT_SQL = """
+INSERT INTO llm_response_cache
+    (cache_key, model, state_name, response, expires_at, created_at, updated_at)
+VALUES (
+    %(cache_key)s, %(model)s, %(state_name)s, %(response)s,
+    now() + %(ttl_seconds)s * interval '1 second', now(), now()
+)
+ON CONFLICT (cache_key) DO UPDATE SET
+    response = EXCLUDED.response,
+    expires_at = EXCLUDED.expires_at,
+    updated_at = now()
+"""
+
+_EXPIRE_SQL = "DELETE FROM llm_response_cache WHERE expires_at <= now()"
+
+
+@dataclass(frozen=True)
+class ResponseCacheConfig:
+    ttl_seconds: float
+    history_messages: int = DEFAULT_HISTORY_MESSAGES
+
+
+def get_response_cache_config(
+    state_config: dict[str, Any],
+) -> Optional[ResponseCacheConfig]:
+    """Read a state's `cache` setting; None when caching is not enabled."""
+    cache_setting = state_config.get("cache")
+    if not cache_setting:
+        return None
+
+    options = cache_setting if isinstance(cache_setting, dict) else {}
+    return ResponseCacheConfig(
+        ttl_seconds=float(
+            options.get("ttl_seconds", get_response_cache().default_ttl_seconds)
+        ),
+        history_messages=int(options.get("history_messages", DEFAULT_HISTORY_MESSAGES)),
+    )
+
+
+def make_response_cache_key(
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    history: list[dict[str, Any]],
+    temperature: Any,
+    tool_settings: dict[str, Any],
+) -> str:
+    payload = json.dumps(
+        [model, system_prompt, prompt, history, temperature, tool_settings],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Bounded in-memory LRU with TTL and an optional Postgres second tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        default_ttl_seconds: float = 86400.0,
+        use_postgres: bool = False,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.default_ttl_seconds = default_ttl_seconds
+        self.use_postgres = use_postgres
+        self._lock = threading.Lock()
+        # key -> (expires_at monotonic, response)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._puts = 0
+        self._memory_hits = 0
+        self._postgres_hits = 0
+        self._misses = 0
+        self._postgres_errors = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._memory_hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.use_postgres:
+            response = self._get_postgres(key)
+            if response is not None:
+                with self._lock:
+                    self._postgres_hits += 1
+                # Keep it in memory for a while; Postgres holds the real expiry
+                self._put_memory(key, response, min(self.default_ttl_seconds, 300))
+                return response
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(
+        self,
+        key: str,
+        response: str,
+        model: str,
+        state_name: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._put_memory(key, response, ttl)
+        if self.use_postgres:
+            self._put_postgres(key, response, model, state_name, ttl)
+
+    def _put_memory(self, key: str, response: str, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_postgres(self, key: str) -> Optional[str]:
+        try:
+            with get_database_manager().get_sync_pool().connection() as conn:
+                row: Any = conn.execute(_SELECT_SQL, {"cache_key": key}).fetchone()
+        except Exception as e:
+            self._record_postgres_error("read", e)
+            return None
+        if row is None:
+            return None
+        return str(row["response"] if isinstance(row, dict) else row[0])
+
+    def _put_postgres(
+        self,
+        key: str,
+        response: str,
+        model: str,
+        state_name: Optional[str],
+        ttl_seconds: float,
+    ) -> None:
+        with self._lock:
+            self._puts += 1
+            expire = self._puts % _EXPIRE_EVERY_PUTS == 0
+        try:
+            with get_database_manager().get_sync_pool().connection() as conn:
+                conn.execute(
+                    _UPSERT_SQL,
+                    {
+                        "cache_key": key,
+                        "model": model,
+                        "state_name": state_name,
+                        "response": response,
+                        "ttl_seconds": ttl_seconds,
+                    },
+                )
+                if expire:
+                    conn.execute(_EXPIRE_SQL)
+        except Exception as e:
+            self._record_postgres_error("write", e)
+
+    def _record_postgres_error(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self._postgres_errors += 1
+        logger.warning(
+            "LLM response cache Postgres tier unavailable",
+            operation=operation,
+            error=str(error),
+            error_type=type(error).__name__,
+        )
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "postgres": self.use_postgres,
+                "memory_hits": self._memory_hits,
+                "postgres_hits": self._postgres_hits,
+                "misses": self._misses,
+                "postgres_errors": self._postgres_errors,
+            }
+
+
+# Global response cache instance
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the global LLM response cache."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    max_entries=int(os.getenv("LLM_RESPONSE_CACHE_SIZE", "2048")),
+                    default_ttl_seconds=float(
+                        os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", "86400")
+                    ),
+                    use_postgres=os.getenv(
+                        "LLM_RESPONSE_CACHE_POSTGRES", "false"
+                    ).lower()
+                    == "true",
+                )
+    return _response_cache
@@ -0,0 +1,192 @@
+"""
+Incremental delivery of streamed LLM responses.
+
+When a request asks for streaming, states with `stream: true` in the lg-prompt
+YAML call LlamaStack with stream=True and pass the text deltas to the turn's
+ResponseStream. The stream coalesces deltas and publishes agent response chunk
+events, so the request manager (SSE) and Slack can show the reply while it is
+still being generated. The complete response is still delivered by the normal
+response-ready event, which replaces any partial content.
+
+Each chunk carries the full text so far plus a sequence number; consumers show
+the chunk with the highest sequence. When an attempt fails after text was
+published, a chunk with empty content and `reset` is published right away, so
+clients drop the text before the retry starts. `reset` is also set on the first
+chunk after a later state restarted the response.
+
+Configuration (environment variables):
+    RESPONSE_STREAM_INTERVAL_MS: minimum time between chunks (default 250)
+    RESPONSE_STREAM_MIN_CHARS: characters generated before the first chunk is
+        published (default 40), so short control replies such as
+        task_complete_return_to_router are never shown to the user
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from shared_models import configure_logging
+
+logger = configure_logging("agent-service")
+
+
+class ResponseStream:
+    """Coalesces streamed text deltas for one turn into published chunks."""
+
+    def __init__(
+        self,
+        publish: Callable[[dict[str, Any]], None],
+        interval_seconds: Optional[float] = None,
+        min_chars: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            publish: Called with each chunk; must not block (it runs on the LLM
+                call's thread)
+            interval_seconds: Minimum time between chunks
+            min_chars: Characters generated before the first chunk is published
+        """
+        self._publish = publish
+        self.interval_seconds = (
+            interval_seconds
+            if interval_seconds is not None
+            else float(os.getenv("RESPONSE_STREAM_INTERVAL_MS", "250")) / 1000
+        )
+        self.min_chars = (
+            min_chars
+            if min_chars is not None
+            else int(os.getenv("RESPONSE_STREAM_MIN_CHARS", "40"))
+        )
+        self._lock = threading.Lock()
+        self._parts: list[str] = []
+        self._length = 0
+        self._published_length = 0
+        self._reset_pending = False
+        self._sequence = 0
+        self._last_publish = 0.0
+        self._created_at = time.monotonic()
+        self.first_token_ms: Optional[float] = None
+        self.first_chunk_ms: Optional[float] = None
+
+    @property
+    def chunks_published(self) -> int:
+        return self._sequence
+
+    def start(self) -> None:
+        """Start a new streamed response, discarding partial text of a previous one."""
+        with self._lock:
+            if self._published_length:
+                self._reset_pending = True
+            self._parts = []
+            self._length = 0
+            self._published_length = 0
+
+    def discard(self) -> None:
+        """Drop the text of a failed attempt, clearing it on clients that saw it."""
+        with self._lock:
+            published = self._published_length > 0
+            self._parts = []
+            self._length = 0
+            self._published_length = 0
+            if not published:
+                return
+            self._sequence += 1
+            self._reset_pending = False
+            self._last_publish = time.monotonic()
+            self._publish_locked(
+                {"sequence": self._sequence, "delta": "", "content": "", "reset": True}
+            )
+
+    def on_delta(self, delta: str) -> None:
+        """Add generated text; publishes a chunk when the interval has passed."""
+        if not delta:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self.first_token_ms is None:
+                self.first_token_ms = (now - self._created_at) * 1000
+            self._parts.append(delta)
+            self._length += len(delta)
+            if (
+                self._length < self.min_chars
+                or now - self._last_publish < self.interval_seconds
+            ):
+                return
+
+            content = "".join(self._parts)
+            self._parts = [content]
+            self._sequence += 1
+            chunk = {
+                "sequence": self._sequence,
+                "delta": content[self._published_length :],
+                "content": content,
+                "reset": self._reset_pending,
+            }
+            self._published_length = len(content)
+            self._reset_pending = False
+            self._last_publish = now
+            if self.first_chunk_ms is None:
+                self.first_chunk_ms = (now - self._created_at) * 1000
+            self._publish_locked(chunk)
+
+    def _publish_locked(self, chunk: dict[str, Any]) -> None:
+        # Publish under the lock so chunks leave in sequence order
+        try:
+            self._publish(chunk)
+        except Exception as e:
+            logger.warning(
+                "Failed to publish response chunk",
+                sequence=chunk["sequence"],
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+
+
+class ResponseStreamStats:
+    """Time to first token / first published chunk for streamed turns."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._streams = 0
+        self._streamed = 0
+        self._chunked = 0
+        self._chunks = 0
+        self._first_token_ms_total = 0.0
+        self._first_chunk_ms_total = 0.0
+
+    def record(self, stream: ResponseStream) -> None:
+        with self._lock:
+            self._streams += 1
+            self._chunks += stream.chunks_published
+            if stream.first_token_ms is not None:
+                self._streamed += 1
+                self._first_token_ms_total += stream.first_token_ms
+            if stream.first_chunk_ms is not None:
+                self._chunked += 1
+                self._first_chunk_ms_total += stream.first_chunk_ms
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self._streams,
+                "streamed": self._streamed,
+                "chunks": self._chunks,
+                "avg_first_token_ms": (
+                    round(self._first_token_ms_total / self._streamed, 1)
+                    if self._streamed
+                    else None
+                ),
+                "avg_first_chunk_ms": (
+                    round(self._first_chunk_ms_total / self._chunked, 1)
+                    if self._chunked
+                    else None
+                ),
+            }
+
+
+_response_stream_stats = ResponseStreamStats()
+
+
+def get_response_stream_stats() -> ResponseStreamStats:
+    return _response_stream_stats
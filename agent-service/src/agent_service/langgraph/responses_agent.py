@@ -1,16 +1,94 @@
+import contextvars
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, cast
 
 import yaml
+from agent_service.knowledge.vector_store_resolver import get_vector_store_resolver
 from agent_service.utils import create_llamastack_client
 from opentelemetry.propagate import inject
 from shared_models import configure_logging
 from tracing_config.auto_tracing import tracingIsActive
 
+from .llm_resilience import (
+    backoff_delay,
+    get_circuit_breaker,
+    get_hedge_executor,
+    get_hedge_stats,
+    is_endpoint_failure,
+)
+from .moderation_cache import MISS, get_moderation_cache
+from .response_streaming import ResponseStream
+from .state_latency import get_state_latency_stats
 from .util import load_config_from_path, resolve_agent_service_path
 
 logger = configure_logging("agent-service")
 
+# Marker for a shield call that failed (failures are not cached)
+_SHIELD_ERROR = object()
+
+# Returned by create_response_with_retry when no usable response was produced
+RESPONSE_UNAVAILABLE_MESSAGE = (
+    "I apologize, but I'm having difficulty generating a response right now. "
+    "Please try again."
+)
+RESPONSE_ERROR_MESSAGE = (
+    "I apologize, but I'm experiencing technical difficulties. Please try again later."
+)
+FALLBACK_RESPONSES = frozenset({RESPONSE_UNAVAILABLE_MESSAGE, RESPONSE_ERROR_MESSAGE})
+
+
+# Shared pool for moderation checks, so shield models (and a speculative input
+# shield) run concurrently with each other and with the LLM call
+_shield_executor: Optional[ThreadPoolExecutor] = None
+_shield_executor_lock = threading.Lock()
+
+
+def get_shield_executor() -> ThreadPoolExecutor:
+    """Get the global moderation shield executor (SHIELD_MAX_WORKERS, default 16)."""
+    global _shield_executor
+    if _shield_executor is None:
+        with _shield_executor_lock:
+            if _shield_executor is None:
+                _shield_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("SHIELD_MAX_WORKERS", "16")),
+                    thread_name_prefix="moderation-shield",
+                )
+    return _shield_executor
+
+
+@dataclass(frozen=True)
+class MCPToolTemplate:
+    """Static part of an MCP tool definition, compiled once per agent."""
+
+    server_label: str
+    fields: Mapping[str, Any]
+    allowed_tools: tuple[str, ...] | None = None
+
+    def render(
+        self, headers: dict[str, str], allowed_tools: list[str] | None = None
+    ) -> dict[str, Any]:
+        """Return a request-ready tool dict with the per-request values applied."""
+        mcp_tool = dict(self.fields)
+
+        # Apply headers if any are present
+        if headers:
+            mcp_tool["headers"] = dict(headers)
+
+        # Add allowed_tools if specified (from parameter or config)
+        if allowed_tools:
+            mcp_tool["allowed_tools"] = allowed_tools
+        elif self.allowed_tools:
+            mcp_tool["allowed_tools"] = list(self.allowed_tools)
+
+        return mcp_tool
+
 
 class Agent:
     """
@@ -38,9 +116,12 @@ class Agent:
         self.default_response_config = self._get_response_config()
         self.system_message = system_message or self._get_default_system_message()
 
+        # Compile MCP tool definitions once; only headers change per request
+        self.mcp_tool_templates = self._compile_mcp_tool_templates(
+            self.config.get("mcp_servers", [])
+        )
         # Build tools once during initialization (without authoritative_user_id)
-        mcp_server_configs = self.config.get("mcp_servers", [])
-        self.tools = self._get_mcp_tools_to_use(mcp_server_configs)
+        self.tools = self._get_tools_to_use()
 
         # Load shield configuration for input/output moderation
         # Check if SAFETY environment variables are configured
@@ -51,10 +132,15 @@ class Agent:
         if shields_available:
             self.input_shields = self.config.get("input_shields", [])
             self.output_shields = self.config.get("output_shields", [])
+            # Run the input shield concurrently with the LLM call (opt-in)
+            self.speculative_input_shield = bool(
+                self.config.get("speculative_input_shield", False)
+            )
         else:
             # Disable shields if SAFETY environment not configured
             self.input_shields = []
             self.output_shields = []
+            self.speculative_input_shield = False
             if self.config.get("input_shields") or self.config.get("output_shields"):
                 logger.warning(
                     "Shields configured in agent but SAFETY/SAFETY_URL environment variables not set. Shields will be disabled.",
@@ -139,55 +225,104 @@ class Agent:
 
     def _get_vector_store_id(self, kb_name: str) -> str:
         """Get the vector store ID for a specific knowledge base."""
-        try:
-            # Use LlamaStack's OpenAI-compatible vector store API
-            vector_stores = self.llama_client.vector_stores.list()
-            matching_stores = []
-            for vs in vector_stores.data:
-                if vs.name and kb_name in vs.name:
-                    matching_stores.append(vs)
-
-            if matching_stores:
-                latest_store = max(matching_stores, key=lambda x: x.created_at)
-                logger.info(
-                    "Found existing vector store",
-                    vector_store_id=latest_store.id,
-                    vector_store_name=latest_store.name,
+        # Resolved from the shared cache; LlamaStack is only listed on refresh
+        return get_vector_store_resolver().resolve(kb_name)
+
+    def _compile_mcp_tool_templates(
+        self, mcp_server_configs: list[dict[str, Any]] | None
+    ) -> tuple["MCPToolTemplate", ...]:
+        """Build the static part of every MCP tool definition once per agent.
+
+        Args:
+            mcp_server_configs: List of MCP server configurations with name, uri, etc.
+
+        Returns:
+            Immutable tool templates; per-request headers are added by render()
+        """
+        templates = []
+        for server_config in mcp_server_configs or []:
+            try:
+                server_name = server_config.get("name")
+                server_uri = server_config.get("uri")
+
+                if not server_name or not server_uri:
+                    logger.warning(
+                        "Skipping MCP server with missing name or uri",
+                        server_config=server_config,
+                    )
+                    continue
+
+                config_allowed_tools = server_config.get("allowed_tools")
+                templates.append(
+                    MCPToolTemplate(
+                        server_label=server_name,
+                        fields=MappingProxyType(
+                            {
+                                "type": "mcp",
+                                "server_label": server_name,
+                                "server_url": server_uri,
+                                "require_approval": server_config.get(
+                                    "require_approval", "never"
+                                ),
+                            }
+                        ),
+                        allowed_tools=(
+                            tuple(config_allowed_tools)
+                            if config_allowed_tools
+                            else None
+                        ),
+                    )
                 )
-                return str(latest_store.id) if latest_store.id is not None else kb_name
-            else:
-                logger.warning(
-                    "No vector store found for knowledge base, using fallback",
-                    kb_name=kb_name,
+
+            except Exception as e:
+                logger.error(
+                    "Error building MCP tool for server config",
+                    server_config=server_config,
+                    error=str(e),
+                    error_type=type(e).__name__,
                 )
-                return kb_name
 
-        except Exception as e:
-            logger.error(
-                "Error finding vector store for knowledge base",
-                kb_name=kb_name,
-                error=str(e),
-                error_type=type(e).__name__,
-            )
-            return kb_name  # Return the kb_name as fallback
+        return tuple(templates)
+
+    def _get_mcp_headers(self, authoritative_user_id: str | None) -> dict[str, str]:
+        """Build the per-request headers sent to MCP servers."""
+        tool_headers = {}
+
+        # Add headers if provided
+        if authoritative_user_id:
+            tool_headers["AUTHORITATIVE_USER_ID"] = authoritative_user_id
 
-    def _get_mcp_tools_to_use(
+        # Add tracing headers if tracing is active
+        if tracingIsActive():
+            # Inject current tracing context into headers
+            # This will add traceparent and tracestate headers
+            inject(tool_headers)
+
+        # Add ServiceNow API key header for pass-through authentication
+        # Read from environment dynamically, just like authoritative_user_id
+        snow_api_key = os.environ.get("SERVICENOW_API_KEY")
+        if snow_api_key:
+            tool_headers["SERVICE_NOW_TOKEN"] = snow_api_key
+
+        return tool_headers
+
+    def _get_tools_to_use(
         self,
-        mcp_server_configs: list[dict[str, Any]] | None = None,
+        include_mcp_servers: bool = True,
         authoritative_user_id: str | None = None,
         allowed_tools: list[str] | None = None,
     ) -> list[Any]:
         """Get complete tools array for LlamaStack responses API.
 
         Args:
-            mcp_server_configs: List of MCP server configurations with name, uri, etc.
+            include_mcp_servers: If False, only knowledge base tools are returned
             authoritative_user_id: Optional user ID to pass to MCP servers
             allowed_tools: Optional list of tool names to restrict
 
         Returns:
             List of tool configurations for LlamaStack responses API
         """
-        tools_to_use = []
+        tools_to_use: list[Any] = []
 
         # Add file_search tools for knowledge bases from agent config
         knowledge_bases = self.config.get("knowledge_bases", [])
@@ -205,75 +340,13 @@ class Agent:
                 }
                 tools_to_use.append(knowledge_base_tool)
 
-        # Add MCP tools from server configurations
-        if mcp_server_configs:
-            for server_config in mcp_server_configs:
-                try:
-                    server_name = server_config.get("name")
-                    server_uri = server_config.get("uri")
-
-                    if not server_name or not server_uri:
-                        logger.warning(
-                            "Skipping MCP server with missing name or uri",
-                            server_config=server_config,
-                        )
-                        continue
-
-                    mcp_tool: Dict[str, Any] = {
-                        "type": "mcp",
-                        "server_label": server_name,
-                        "server_url": server_uri,
-                        "require_approval": server_config.get(
-                            "require_approval", "never"
-                        ),
-                    }
-
-                    # Build headers dictionary dynamically per request
-                    tool_headers = {}
-
-                    # Add headers if provided
-                    if authoritative_user_id:
-                        tool_headers["AUTHORITATIVE_USER_ID"] = authoritative_user_id
-
-                    # Add tracing headers if tracing is active
-                    if tracingIsActive():
-                        # Inject current tracing context into headers
-                        # This will add traceparent and tracestate headers
-                        inject(tool_headers)
-                        logger.debug(
-                            "Injected tracing headers for MCP server",
-                            server_name=server_name,
-                            header_keys=list(tool_headers.keys()),
-                        )
-
-                    # Add ServiceNow API key header for pass-through authentication
-                    # Read from environment dynamically, just like authoritative_user_id
-                    snow_api_key = os.environ.get("SERVICENOW_API_KEY")
-                    if snow_api_key:
-                        tool_headers["SERVICE_NOW_TOKEN"] = snow_api_key
+        # Add MCP tools from the precompiled templates
+        if include_mcp_servers and self.mcp_tool_templates:
+            tool_headers = self._get_mcp_headers(authoritative_user_id)
+            for template in self.mcp_tool_templates:
+                tools_to_use.append(template.render(tool_headers, allowed_tools))
 
-                    # Apply headers if any are present
-                    if tool_headers:
-                        mcp_tool["headers"] = tool_headers
-
-                    # Add allowed_tools if specified (from parameter or config)
-                    config_allowed_tools = server_config.get("allowed_tools")
-                    if allowed_tools:
-                        mcp_tool["allowed_tools"] = allowed_tools
-                    elif config_allowed_tools:
-                        mcp_tool["allowed_tools"] = config_allowed_tools
-
-                    tools_to_use.append(mcp_tool)
-
-                except Exception as e:
-                    logger.error(
-                        "Error building MCP tool for server config",
-                        server_config=server_config,
-                        error=str(e),
-                        error_type=type(e).__name__,
-                    )
-
-        logger.info("Built tools array", tool_count=len(tools_to_use))
+        logger.debug("Built tools array", tool_count=len(tools_to_use))
 
         return tools_to_use
 
@@ -286,6 +359,8 @@ class Agent:
         """
         Run moderation checks using OpenAI-compatible moderation API.
 
+        With more than one shield model the checks run concurrently.
+
         Args:
             content: Either a string (for output) or list of message dicts (for input)
             shield_models: List of moderation model names (e.g., ["llama-guard-3"])
@@ -299,27 +374,69 @@ class Agent:
         if not shield_models or len(shield_models) == 0:
             return True, None
 
-        # Use configured ignored categories from agent config based on check type
-        if check_type == "input":
-            ignored_categories = self.ignored_input_categories
-        elif check_type == "output":
-            ignored_categories = self.ignored_output_categories
-        else:
-            ignored_categories = set()
+        if len(shield_models) == 1:
+            # Single shield: no benefit from a thread hop
+            moderation = self._prepare_moderation_input(content)
+            if moderation is None:
+                return True, None
+            error_message = self._check_shield(
+                shield_models[0], moderation[0], moderation[1], check_type
+            )
+            return error_message is None, error_message
+
+        return self._finish_moderation_shields(
+            self._start_moderation_shields(content, shield_models, check_type)
+        )
+
+    def _start_moderation_shields(
+        self,
+        content: Any,
+        shield_models: list[str],
+        check_type: str = "input",
+    ) -> list[Future[Optional[str]]]:
+        """Submit one moderation check per shield model to the shield executor."""
+        moderation = self._prepare_moderation_input(content)
+        if moderation is None or not shield_models:
+            return []
+
+        executor = get_shield_executor()
+        return [
+            # Each check gets its own copy of the context (tracing)
+            executor.submit(
+                contextvars.copy_context().run,
+                self._check_shield,
+                shield_model,
+                moderation[0],
+                moderation[1],
+                check_type,
+            )
+            for shield_model in shield_models
+        ]
 
-        # Prepare input for moderation API
-        moderation_input: Any
-        log_preview: str
+    @staticmethod
+    def _finish_moderation_shields(
+        checks: list[Future[Optional[str]]],
+    ) -> tuple[bool, Optional[str]]:
+        """Wait for submitted checks; the first blocking shield (in order) wins."""
+        for check in checks:
+            error_message = check.result()
+            if error_message is not None:
+                return False, error_message
 
+        # All shields passed
+        return True, None
+
+    def _prepare_moderation_input(self, content: Any) -> Optional[tuple[str, str]]:
+        """Get (moderation_input, log_preview) for content, None if nothing to check."""
         if isinstance(content, str):
             # Output shield: single string
-            moderation_input = content
-            log_preview = content[:100]
-        elif isinstance(content, list):
+            return content, content[:100]
+
+        if isinstance(content, list):
             # Input shield: list of messages
             # Only check the last message (most recent user input)
             if len(content) == 0:
-                return True, None
+                return None
 
             last_msg = content[-1]
             if isinstance(last_msg, dict) and "content" in last_msg:
@@ -331,81 +448,128 @@ class Agent:
                     "Invalid last message format for moderation",
                     message_type=type(last_msg).__name__,
                 )
-                return True, None
+                return None
+
+            return moderation_input, f"last message, {len(moderation_input)} chars"
+
+        logger.warning(
+            "Invalid content type for moderation",
+            content_type=type(content).__name__,
+        )
+        return None
 
-            log_preview = f"last message, {len(moderation_input)} chars"
+    def _check_shield(
+        self,
+        shield_model: str,
+        moderation_input: str,
+        log_preview: str,
+        check_type: str,
+    ) -> Optional[str]:
+        """Run a single shield model, reusing a cached verdict when available.
+
+        Returns:
+            User-facing message if the content is blocked, None if it passes
+            (or if the shield call fails - shields fail open)
+        """
+        # Use configured ignored categories from agent config based on check type
+        if check_type == "input":
+            ignored_categories = self.ignored_input_categories
+        elif check_type == "output":
+            ignored_categories = self.ignored_output_categories
         else:
-            logger.warning(
-                "Invalid content type for moderation",
-                content_type=type(content).__name__,
+            ignored_categories = set()
+
+        cache = get_moderation_cache()
+        cache_key = cache.make_key(shield_model, moderation_input, ignored_categories)
+        cached = cache.get(cache_key)
+        if cached is not MISS:
+            logger.debug(
+                "Using cached shield verdict",
+                check_type=check_type,
+                shield_model=shield_model,
+                blocked=cached is not None,
             )
-            return True, None
+            return cast(Optional[str], cached)
 
-        for shield_model in shield_models:
-            try:
-                logger.debug(
-                    "Running shield on content",
-                    check_type=check_type,
-                    shield_model=shield_model,
-                    preview=log_preview,
-                )
+        verdict = self._call_shield(
+            shield_model, moderation_input, log_preview, check_type, ignored_categories
+        )
+        if verdict is not _SHIELD_ERROR:
+            cache.put(cache_key, verdict)
+            return cast(Optional[str], verdict)
+        # Fail open - allow if the shield cannot be reached
+        return None
 
-                # Call OpenAI-compatible moderation API
-                moderation_response = self.llama_client.moderations.create(
-                    input=moderation_input, model=shield_model
-                )
+    def _call_shield(
+        self,
+        shield_model: str,
+        moderation_input: str,
+        log_preview: str,
+        check_type: str,
+        ignored_categories: set[str],
+    ) -> Any:
+        """Call the moderation API; returns the verdict or _SHIELD_ERROR."""
+        try:
+            logger.debug(
+                "Running shield on content",
+                check_type=check_type,
+                shield_model=shield_model,
+                preview=log_preview,
+            )
 
-                # Check if content was flagged
-                if moderation_response.results and len(moderation_response.results) > 0:
-                    result = moderation_response.results[0]
-
-                    if result.flagged:
-                        # Check if any flagged categories are NOT in the ignored list
-                        flagged_categories = {
-                            cat
-                            for cat, is_flagged in (result.categories or {}).items()
-                            if is_flagged and cat not in ignored_categories
-                        }
-
-                        if flagged_categories:
-                            # Log the violation with details including full content
-                            logger.warning(
-                                "Content flagged by shield",
-                                check_type=check_type,
-                                shield_model=shield_model,
-                                categories=result.categories,
-                                scores=result.category_scores,
-                                content=repr(moderation_input),
-                            )
+            # Call OpenAI-compatible moderation API
+            moderation_response = self.llama_client.moderations.create(
+                input=moderation_input, model=shield_model
+            )
 
-                            # Return user-facing message
-                            user_message = (
-                                result.user_message
-                                or "I apologize, but I cannot process that request due to safety concerns."
-                            )
-                            return False, user_message
-                        else:
-                            # Only ignored categories were flagged - allow content
-                            logger.info(
-                                "Content flagged by shield but only in ignored categories",
-                                check_type=check_type,
-                                shield_model=shield_model,
-                                categories=result.categories,
-                            )
+            # Check if content was flagged
+            if moderation_response.results and len(moderation_response.results) > 0:
+                result = moderation_response.results[0]
 
-            except Exception as e:
-                logger.error(
-                    "Error running shield",
-                    check_type=check_type,
-                    shield_model=shield_model,
-                    error=str(e),
-                    error_type=type(e).__name__,
-                )
-                # Fail open - continue to next shield or allow if last shield
-                continue
+                if result.flagged:
+                    # Check if any flagged categories are NOT in the ignored list
+                    flagged_categories = {
+                        cat
+                        for cat, is_flagged in (result.categories or {}).items()
+                        if is_flagged and cat not in ignored_categories
+                    }
 
-        # All shields passed
-        return True, None
+                    if flagged_categories:
+                        # Log the violation with details including full content
+                        logger.warning(
+                            "Content flagged by shield",
+                            check_type=check_type,
+                            shield_model=shield_model,
+                            categories=result.categories,
+                            scores=result.category_scores,
+                            content=repr(moderation_input),
+                        )
+
+                        # Return user-facing message
+                        return str(
+                            result.user_message
+                            or "I apologize, but I cannot process that request due to safety concerns."
+                        )
+                    else:
+                        # Only ignored categories were flagged - allow content
+                        logger.info(
+                            "Content flagged by shield but only in ignored categories",
+                            check_type=check_type,
+                            shield_model=shield_model,
+                            categories=result.categories,
+                        )
+
+        except Exception as e:
+            logger.error(
+                "Error running shield",
+                check_type=check_type,
+                shield_model=shield_model,
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            return _SHIELD_ERROR
+
+        return None
 
     def create_response_with_retry(
         self,
@@ -419,72 +583,237 @@ class Agent:
         skip_mcp_servers_only: bool = False,
         current_state_name: str | None = None,
         token_context: str | None = None,
+        model: str | None = None,
+        max_output_tokens: int | None = None,
+        deadline_seconds: float | None = None,
+        hedge: bool = False,
+        hedge_after_ms: float | None = None,
+        response_stream: ResponseStream | None = None,
     ) -> str:
-        """Create a response with retry logic for empty responses and errors."""
-        response = "I apologize, but I'm having difficulty generating a response right now. Please try again."
+        """Create a response with retry logic for empty responses and errors.
+
+        Args:
+            deadline_seconds: Optional time budget for all attempts, including
+                backoff; each call's timeout is the remaining budget
+            hedge: Send a second request when the first is slower than
+                hedge_after_ms (default: observed p95 for this state/model) and
+                use whichever finishes first. Ignored when MCP tools are enabled,
+                as duplicated tool calls could have side effects.
+            hedge_after_ms: Optional fixed hedge delay in milliseconds
+            response_stream: Optional stream receiving the response text as it
+                is generated (not combined with hedging)
+        """
+        response = RESPONSE_UNAVAILABLE_MESSAGE
         last_error = None
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        breaker = get_circuit_breaker(self._get_llm_endpoint())
+        hedge = (
+            hedge
+            and response_stream is None
+            and (
+                skip_all_tools
+                or skip_mcp_servers_only
+                # allowed_tools: [""] disables all tools
+                or (allowed_tools is not None and not any(allowed_tools))
+            )
+        )
+        create_kwargs: dict[str, Any] = {
+            "temperature": temperature,
+            "additional_system_messages": additional_system_messages,
+            "authoritative_user_id": authoritative_user_id,
+            "allowed_tools": allowed_tools,
+            "skip_all_tools": skip_all_tools,
+            "skip_mcp_servers_only": skip_mcp_servers_only,
+            "current_state_name": current_state_name,
+            "token_context": token_context,
+            "model": model,
+            "max_output_tokens": max_output_tokens,
+            "response_stream": response_stream,
+        }
 
         for attempt in range(max_retries + 1):  # +1 for initial attempt plus retries
-            try:
-                response = self.create_response(
-                    messages,
-                    temperature=temperature,
-                    additional_system_messages=additional_system_messages,
-                    authoritative_user_id=authoritative_user_id,
-                    allowed_tools=allowed_tools,
-                    skip_all_tools=skip_all_tools,
-                    skip_mcp_servers_only=skip_mcp_servers_only,
-                    current_state_name=current_state_name,
-                    token_context=token_context,
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        "LLM deadline exceeded",
+                        current_state=current_state_name,
+                        deadline_seconds=deadline_seconds,
+                        attempts=attempt,
+                    )
+                    response = RESPONSE_UNAVAILABLE_MESSAGE
+                    break
+            if not breaker.allow_request():
+                logger.warning(
+                    "LlamaStack circuit open, failing fast",
+                    endpoint=breaker.endpoint,
+                    current_state=current_state_name,
                 )
+                response = RESPONSE_UNAVAILABLE_MESSAGE
+                break
 
-                # Check if response is empty or contains error
-                if response and response.strip():
-                    # Check if it's an error message that we should retry
-                    if response.startswith("Error: Unable to get response"):
-                        last_error = response
-                        response = ""  # Treat as empty to continue retry loop
+            try:
+                try:
+                    if hedge:
+                        response = self._create_response_hedged(
+                            messages, create_kwargs, remaining, hedge_after_ms
+                        )
                     else:
-                        # Valid response, break out of retry loop
-                        break
+                        response = self.create_response(
+                            messages, request_timeout=remaining, **create_kwargs
+                        )
 
-                # Empty response or error detected
-                if attempt < max_retries:
-                    retry_delay = min(
-                        2**attempt, 8
-                    )  # Exponential backoff: 1s, 2s, 4s, 8s max
-                    logger.info(
-                        "Empty/error response, retrying",
-                        attempt=attempt + 1,
-                        max_attempts=max_retries + 1,
-                        retry_delay=retry_delay,
-                    )
-                    import time
+                    # Check if response is empty or contains error
+                    if response and response.strip():
+                        # Check if it's an error message that we should retry
+                        if response.startswith("Error: Unable to get response"):
+                            last_error = response
+                            response = ""  # Treat as empty to continue retry loop
+                        else:
+                            # Valid response, break out of retry loop
+                            break
 
-                    time.sleep(retry_delay)
-                else:
+                    # Empty response or error detected
+                    if response_stream is not None:
+                        response_stream.discard()
+                    if attempt < max_retries:
+                        # Exponential backoff with full jitter, within the deadline
+                        retry_delay = backoff_delay(attempt)
+                        if deadline is not None:
+                            retry_delay = min(
+                                retry_delay, max(0.0, deadline - time.monotonic())
+                            )
+                        logger.info(
+                            "Empty/error response, retrying",
+                            attempt=attempt + 1,
+                            max_attempts=max_retries + 1,
+                            retry_delay=round(retry_delay, 2),
+                        )
+                        time.sleep(retry_delay)
+                    else:
+                        logger.warning(
+                            "All retry attempts failed",
+                            max_attempts=max_retries + 1,
+                            last_error=last_error or "Empty response",
+                        )
+                        response = RESPONSE_UNAVAILABLE_MESSAGE
+
+                except Exception as e:
+                    last_error = str(e)
+                    if response_stream is not None:
+                        response_stream.discard()
                     logger.warning(
-                        "All retry attempts failed",
-                        max_attempts=max_retries + 1,
-                        last_error=last_error or "Empty response",
+                        "Exception on retry attempt",
+                        attempt=attempt + 1,
+                        max_retries=max_retries + 1,
+                        error=str(e),
+                        error_type=type(e).__name__,
                     )
-                    response = "I apologize, but I'm having difficulty generating a response right now. Please try again."
+                    if attempt >= max_retries:
+                        response = RESPONSE_ERROR_MESSAGE
+                        break
+            finally:
+                # Hand back a half-open probe that never reached the endpoint
+                breaker.release_probe()
 
-            except Exception as e:
-                last_error = str(e)
-                logger.warning(
-                    "Exception on retry attempt",
-                    attempt=attempt + 1,
-                    max_retries=max_retries + 1,
-                    error=str(e),
-                    error_type=type(e).__name__,
-                )
-                if attempt >= max_retries:
-                    response = "I apologize, but I'm experiencing technical difficulties. Please try again later."
-                    break
+        return response
 
+    def _create_response_hedged(
+        self,
+        messages: list[Any],
+        create_kwargs: dict[str, Any],
+        remaining: float | None,
+        hedge_after_ms: float | None,
+    ) -> str:
+        """Run create_response, duplicating it if it is slower than the hedge delay."""
+        if hedge_after_ms is None:
+            hedge_after_ms = get_state_latency_stats().get_percentile(
+                self.agent_name,
+                create_kwargs.get("current_state_name"),
+                create_kwargs.get("model") or self.model,
+                0.95,
+            )
+        if hedge_after_ms is None or (
+            remaining is not None and hedge_after_ms / 1000 >= remaining
+        ):
+            # Not enough latency samples yet, or no time left to hedge
+            return self.create_response(
+                messages, request_timeout=remaining, **create_kwargs
+            )
+
+        start = time.monotonic()
+        executor = get_hedge_executor()
+        call = partial(
+            self.create_response, messages, request_timeout=remaining, **create_kwargs
+        )
+
+        def submit() -> Future[str]:
+            # Each request gets its own copy of the context (tracing)
+            return executor.submit(contextvars.copy_context().run, call)
+
+        primary = submit()
+        done, _ = wait([primary], timeout=hedge_after_ms / 1000)
+        if done:
+            get_hedge_stats().record(hedged=False, hedge_won=False)
+            return primary.result()
+
+        hedged = submit()
+        logger.debug(
+            "Sending hedged LLM request",
+            current_state=create_kwargs.get("current_state_name"),
+            hedge_after_ms=round(hedge_after_ms, 1),
+        )
+        timeout = None if remaining is None else remaining - (time.monotonic() - start)
+        response = ""
+        errors: list[Exception] = []
+        try:
+            for future in as_completed([primary, hedged], timeout=timeout):
+                try:
+                    response = future.result()
+                except Exception as e:
+                    # Keep waiting for the other request
+                    errors.append(e)
+                    logger.debug(
+                        "Hedged LLM request failed",
+                        current_state=create_kwargs.get("current_state_name"),
+                        error=str(e),
+                        error_type=type(e).__name__,
+                    )
+                    continue
+                if response.strip() and not response.startswith(
+                    "Error: Unable to get response"
+                ):
+                    get_hedge_stats().record(hedged=True, hedge_won=future is hedged)
+                    return response
+        except TimeoutError:
+            # Deadline reached; the slower request finishes in the background
+            pass
+        get_hedge_stats().record(hedged=True, hedge_won=False)
+        if len(errors) == 2:
+            raise errors[-1]
         return response
 
+    def _consume_response_stream(
+        self, events: Any, response_stream: ResponseStream
+    ) -> Any:
+        """Forward text deltas of a streamed response; returns the final response."""
+        response_stream.start()
+        final_response = None
+        for event in events:
+            event_type = getattr(event, "type", "")
+            if event_type == "response.output_text.delta":
+                response_stream.on_delta(getattr(event, "delta", "") or "")
+            elif event_type == "response.completed":
+                final_response = getattr(event, "response", None)
+        if final_response is None:
+            raise ConnectionError("Response stream ended without a completed response")
+        return final_response
+
+    def _get_llm_endpoint(self) -> str:
+        """LlamaStack endpoint used as the circuit breaker key."""
+        return str(getattr(self.llama_client, "base_url", "llamastack"))
+
     def _check_response_errors(self, response: Any) -> str:
         """Check for various error conditions in the LlamaStack response.
 
@@ -599,6 +928,10 @@ class Agent:
         skip_mcp_servers_only: bool = False,
         current_state_name: str | None = None,
         token_context: str | None = None,
+        model: str | None = None,
+        max_output_tokens: int | None = None,
+        request_timeout: float | None = None,
+        response_stream: ResponseStream | None = None,
     ) -> str:
         """Create a response using LlamaStack responses API.
 
@@ -611,24 +944,65 @@ class Agent:
             skip_all_tools: If True, skip all tools (MCP servers and knowledge base)
             skip_mcp_servers_only: If True, skip only MCP servers (keep knowledge base tools)
             current_state_name: Optional name of the current state from the state machine YAML
+            model: Optional model override (per-state model tier), defaults to the agent's model
+            max_output_tokens: Optional cap on generated tokens for this call
+            request_timeout: Optional timeout for this call, overriding the client timeout
+            response_stream: Optional stream receiving text deltas as they are
+                generated; ignored when the agent has output shields, since
+                unchecked text must not reach the user
         """
         try:
+            # Rebuild tools if any tool filtering is requested
+            tools_to_use: list[Any]
+            if skip_all_tools:
+                # Skip all tools (no MCP servers, no knowledge base tools)
+                tools_to_use = []
+            elif skip_mcp_servers_only:
+                # Skip MCP servers but keep knowledge base tools
+                tools_to_use = self._get_tools_to_use(
+                    False, authoritative_user_id, allowed_tools
+                )
+            elif authoritative_user_id or allowed_tools:
+                # Include MCP servers and knowledge base tools
+                tools_to_use = self._get_tools_to_use(
+                    True, authoritative_user_id, allowed_tools
+                )
+            else:
+                tools_to_use = self.tools
+
+            if self.output_shields:
+                response_stream = None
+
             # INPUT SHIELD: Check user input before processing
+            speculative_input_checks = None
             if self.input_shields and messages and len(messages) > 0:
-                # Check only the last message (most recent user input)
-                is_safe, error_message = self._run_moderation_shields(
-                    messages, self.input_shields, "input"
-                )
-                if not is_safe:
-                    logger.info(
-                        "Input blocked by shield",
-                        agent_name=self.agent_name,
-                        messages=repr(messages),
+                if (
+                    self.speculative_input_shield
+                    and response_stream is None
+                    and not any(tool.get("type") == "mcp" for tool in tools_to_use)
+                ):
+                    # Overlap the shield with the LLM call; the response is
+                    # discarded below if the input is flagged. Never done when
+                    # MCP tools are available, as tool calls may have side effects,
+                    # or when streaming, as the text would already be shown.
+                    speculative_input_checks = self._start_moderation_shields(
+                        messages, self.input_shields, "input"
                     )
-                    return (
-                        error_message
-                        or "I apologize, but I cannot process that request due to safety concerns."
+                else:
+                    # Check only the last message (most recent user input)
+                    is_safe, error_message = self._run_moderation_shields(
+                        messages, self.input_shields, "input"
                     )
+                    if not is_safe:
+                        logger.info(
+                            "Input blocked by shield",
+                            agent_name=self.agent_name,
+                            messages=repr(messages),
+                        )
+                        return (
+                            error_message
+                            or "I apologize, but I cannot process that request due to safety concerns."
+                        )
 
             # Start with the main system message
             messages_with_system = [{"role": "system", "content": self.system_message}]
@@ -645,41 +1019,49 @@ class Agent:
             response_config = dict(self.default_response_config)
             if temperature is not None:
                 response_config["temperature"] = temperature
-
-            # Rebuild tools if any tool filtering is requested
-            if skip_all_tools:
-                # Skip all tools (no MCP servers, no knowledge base tools)
-                tools_to_use = []
-            elif skip_mcp_servers_only:
-                # Skip MCP servers but keep knowledge base tools
-                # Pass None/empty list for mcp_servers to exclude them
-                tools_to_use = self._get_mcp_tools_to_use(
-                    None, authoritative_user_id, allowed_tools
-                )
-            elif authoritative_user_id or allowed_tools:
-                # Include MCP servers and knowledge base tools
-                mcp_server_configs = self.config.get("mcp_servers", [])
-                tools_to_use = self._get_mcp_tools_to_use(
-                    mcp_server_configs, authoritative_user_id, allowed_tools
-                )
-            else:
-                tools_to_use = self.tools
+            if max_output_tokens:
+                # Not a typed parameter of the client; sent in the request body
+                response_config["extra_body"] = {"max_output_tokens": max_output_tokens}
+            if request_timeout is not None:
+                response_config["timeout"] = request_timeout
+            if response_stream is not None:
+                response_config["stream"] = True
+            model = model or self.model
 
             # Use the existing LlamaStack client for response creation
             # Only pass tools if tools_to_use is not empty
-            if tools_to_use:
-                response = self.llama_client.responses.create(
-                    input=messages_with_system,
-                    model=self.model,
-                    **response_config,
-                    tools=tools_to_use,
-                )
-            else:
-                response = self.llama_client.responses.create(
-                    input=messages_with_system,
-                    model=self.model,
-                    **response_config,
-                )
+            breaker = get_circuit_breaker(self._get_llm_endpoint())
+            llm_start = time.perf_counter()
+            try:
+                if tools_to_use:
+                    response = self.llama_client.responses.create(
+                        input=messages_with_system,
+                        model=model,
+                        **response_config,
+                        tools=tools_to_use,
+                    )
+                else:
+                    response = self.llama_client.responses.create(
+                        input=messages_with_system,
+                        model=model,
+                        **response_config,
+                    )
+                if response_stream is not None:
+                    response = self._consume_response_stream(response, response_stream)
+            except Exception as e:
+                if is_endpoint_failure(e):
+                    breaker.record_failure()
+                else:
+                    # The endpoint answered (e.g. a 4xx); it is not unhealthy
+                    breaker.record_success()
+                raise
+            breaker.record_success()
+            get_state_latency_stats().record(
+                self.agent_name,
+                current_state_name,
+                model,
+                (time.perf_counter() - llm_start) * 1000,
+            )
 
             # Import token counting if available
             try:
@@ -689,11 +1071,28 @@ class Agent:
                 context = token_context or "chat_agent"
 
                 count_tokens_from_response(
-                    response, self.model, context, messages_with_system
+                    response, model, context, messages_with_system
                 )
             except ImportError:
                 pass  # Token counting is optional
 
+            if speculative_input_checks is not None:
+                is_safe, error_message = self._finish_moderation_shields(
+                    speculative_input_checks
+                )
+                if not is_safe:
+                    logger.info(
+                        "Input blocked by shield, discarding speculative response",
+                        agent_name=self.agent_name,
+                        messages=repr(messages),
+                    )
+                    if response_stream is not None:
+                        response_stream.discard()
+                    return (
+                        error_message
+                        or "I apologize, but I cannot process that request due to safety concerns."
+                    )
+
             # Check for error conditions in the response
             error_info = self._check_response_errors(response)
             if error_info:
@@ -828,6 +1227,7 @@ class ResponsesAgentManager:
         # Load the configuration using centralized path resolution
         try:
             config_path = resolve_agent_service_path("config")
+            self.config_path = config_path
             logger.info(
                 "ResponsesAgentManager found config", config_path=str(config_path)
             )
@@ -839,6 +1239,8 @@ class ResponsesAgentManager:
             )
             raise
 
+        # Captured before loading so an edit made during the load triggers a reload
+        self.config_fingerprint = _config_fingerprint(config_path)
         agent_configs = load_config_from_path(config_path)
 
         # Load global configuration (config.yaml)
@@ -875,3 +1277,103 @@ class ResponsesAgentManager:
     def agents(self) -> dict[str, str]:
         """Return a dict mapping agent names to agent names (for compatibility with AgentManager)."""
         return {name: name for name in self.agents_dict.keys()}
+
+
+def _config_fingerprint(config_path: Path) -> tuple[tuple[str, int, int], ...]:
+    """Return a cheap fingerprint of the YAML files read by ResponsesAgentManager.
+
+    Covers config.yaml, any other top-level YAML and the agents/ directory, using
+    (path, mtime_ns, size) so no file contents have to be parsed.
+    """
+    files = list(config_path.glob("*.yaml")) + list(
+        (config_path / "agents").glob("*.yaml")
+    )
+    fingerprint = []
+    for file in sorted(files):
+        try:
+            stat = file.stat()
+        except OSError:
+            continue
+        fingerprint.append((str(file), stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+# Process-wide agent manager shared by all requests
+_agent_manager: Optional[ResponsesAgentManager] = None
+_agent_manager_lock = threading.Lock()
+_agent_manager_last_check = 0.0
+
+# Minimum seconds between config directory checks (0 checks on every call,
+# a negative value disables hot reload)
+AGENT_CONFIG_RELOAD_INTERVAL = float(os.getenv("AGENT_CONFIG_RELOAD_INTERVAL", "30"))
+
+
+def get_agent_manager() -> ResponsesAgentManager:
+    """Get the process-wide ResponsesAgentManager, building it on first use.
+
+    Building the manager parses every agent YAML and creates one Agent (and
+    LlamaStack client) per agent, which involves several network round trips.
+    The instance is therefore shared across requests and only rebuilt when the
+    config directory changes. A failed reload keeps serving the previous manager.
+    """
+    global _agent_manager, _agent_manager_last_check
+
+    manager = _agent_manager
+    if manager is not None and not _reload_check_due():
+        return manager
+
+    with _agent_manager_lock:
+        if _agent_manager is None:
+            _agent_manager = ResponsesAgentManager()
+            _agent_manager_last_check = time.monotonic()
+            logger.info(
+                "Created shared ResponsesAgentManager",
+                agents=list(_agent_manager.agents_dict.keys()),
+            )
+            return _agent_manager
+
+        if not _reload_check_due():
+            return _agent_manager
+
+        _agent_manager_last_check = time.monotonic()
+        fingerprint = _config_fingerprint(_agent_manager.config_path)
+        if fingerprint == _agent_manager.config_fingerprint:
+            return _agent_manager
+
+        logger.info(
+            "Agent configuration changed, reloading ResponsesAgentManager",
+            config_path=str(_agent_manager.config_path),
+        )
+        try:
+            _agent_manager = ResponsesAgentManager()
+        except Exception as e:
+            # Remember the new fingerprint so a broken config is not retried
+            # on every request; the next edit will trigger another attempt
+            _agent_manager.config_fingerprint = fingerprint
+            logger.error(
+                "Failed to reload ResponsesAgentManager, keeping previous agents",
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+        return _agent_manager
+
+
+def reload_agent_manager() -> ResponsesAgentManager:
+    """Force a rebuild of the process-wide ResponsesAgentManager."""
+    global _agent_manager, _agent_manager_last_check
+
+    with _agent_manager_lock:
+        _agent_manager = ResponsesAgentManager()
+        _agent_manager_last_check = time.monotonic()
+        logger.info(
+            "Reloaded shared ResponsesAgentManager",
+            agents=list(_agent_manager.agents_dict.keys()),
+        )
+        return _agent_manager
+
+
+def _reload_check_due() -> bool:
+    """Return True if the config directory should be checked for changes."""
+    if AGENT_CONFIG_RELOAD_INTERVAL < 0:
+        return False
+    return time.monotonic() - _agent_manager_last_check >= AGENT_CONFIG_RELOAD_INTERVAL
@@ -0,0 +1,213 @@
+"""
+Rule-based routing fast path for the routing agent.
+
+Most conversations start with a message that names the request outright
+("I need a new laptop"). A routing rule table, referenced from the routing
+agent's config with `routing_rules`, lets the session manager send such
+messages straight to the specialist agent instead of first running the
+routing agent's classification LLM call. Messages no rule matches, or that
+match rules for different agents, go through LLM routing as before.
+
+Rule table (YAML):
+
+    enabled: true
+    # Any match sends the message to the LLM router (e.g. negations)
+    exclude_patterns: ["\\bdon'?t\\b"]
+    rules:
+      - agent: "laptop-refresh"
+        keywords: ["new laptop", "laptop refresh"]   # whole words, anywhere
+        patterns: ["^refresh$"]                      # regex search
+        integrations:                                # extra hints per channel
+          EMAIL:
+            keywords: ["laptop request"]
+
+Input is matched after lower-casing and collapsing whitespace. Tables are
+compiled once per file and recompiled when the file changes.
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from shared_models import configure_logging
+
+from .util import load_yaml, resolve_agent_service_path
+
+logger = configure_logging("agent-service")
+
+
+def normalize_routing_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def _compile_matchers(config: dict[str, Any], agent: str) -> list[re.Pattern[str]]:
+    """Compile a rule's keywords into one alternation plus its regex patterns."""
+    matchers: list[re.Pattern[str]] = []
+    keywords = [normalize_routing_text(str(k)) for k in config.get("keywords", []) if k]
+    if keywords:
+        # Longest first so overlapping keywords don't shadow each other
+        alternation = "|".join(
+            re.escape(k) for k in sorted(set(keywords), key=len, reverse=True)
+        )
+        matchers.append(re.compile(rf"\b(?:{alternation})\b"))
+    for pattern in config.get("patterns", []):
+        try:
+            matchers.append(re.compile(pattern, re.IGNORECASE))
+        except re.error as e:
+            logger.warning(
+                "Ignoring invalid routing rule pattern",
+                agent=agent,
+                pattern=pattern,
+                error=str(e),
+            )
+    return matchers
+
+
+class RoutingRule:
+    """Keyword and regex matchers for one target agent."""
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.agent = str(config.get("agent", ""))
+        self._matchers = _compile_matchers(config, self.agent)
+        self._integration_matchers = {
+            str(integration).upper(): _compile_matchers(hints or {}, self.agent)
+            for integration, hints in (config.get("integrations") or {}).items()
+        }
+
+    def matches(self, text: str, integration_type: Optional[str] = None) -> bool:
+        matchers = self._matchers
+        if integration_type:
+            matchers = matchers + self._integration_matchers.get(
+                integration_type.upper(), []
+            )
+        return any(matcher.search(text) for matcher in matchers)
+
+
+class RoutingRuleTable:
+    """Compiled routing rule table."""
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.enabled = bool(config.get("enabled", True))
+        self._exclude_patterns = [
+            re.compile(pattern, re.IGNORECASE)
+            for pattern in config.get("exclude_patterns", [])
+        ]
+        self.rules = [
+            RoutingRule(rule) for rule in config.get("rules", []) if rule.get("agent")
+        ]
+
+    def match(
+        self,
+        text: str,
+        available_agents: list[str],
+        integration_type: Optional[str] = None,
+    ) -> Optional[str]:
+        """Return the agent to route to, or None to use LLM routing."""
+        if not self.enabled:
+            return None
+        normalized = normalize_routing_text(text)
+        if not normalized:
+            return None
+        if any(pattern.search(normalized) for pattern in self._exclude_patterns):
+            return None
+
+        matched_agents = {
+            rule.agent
+            for rule in self.rules
+            if rule.agent in available_agents
+            and rule.matches(normalized, integration_type)
+        }
+        if len(matched_agents) != 1:
+            # No match, or rules for different agents - let the LLM decide
+            return None
+        return matched_agents.pop()
+
+
+# Compiled tables keyed by (path, mtime)
+_rule_tables: dict[tuple[str, int], RoutingRuleTable] = {}
+_rule_tables_lock = threading.Lock()
+
+
+def get_routing_rule_table(config_path: str) -> Optional[RoutingRuleTable]:
+    """Get the compiled rule table for a path relative to the agent-service root.
+
+    Returns None when the file can't be found or parsed, so callers fall back
+    to LLM routing.
+    """
+    try:
+        path = Path(config_path)
+        if not path.is_absolute():
+            path = resolve_agent_service_path(config_path)
+        key = (str(path), path.stat().st_mtime_ns)
+    except (FileNotFoundError, OSError) as e:
+        logger.warning(
+            "Routing rule table not found",
+            config_path=config_path,
+            error=str(e),
+        )
+        return None
+
+    table = _rule_tables.get(key)
+    if table is not None:
+        return table
+
+    with _rule_tables_lock:
+        table = _rule_tables.get(key)
+        if table is not None:
+            return table
+        try:
+            table = RoutingRuleTable(load_yaml(str(path)))
+        except Exception as e:
+            logger.warning(
+                "Failed to compile routing rule table",
+                config_path=str(path),
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            return None
+
+        for stale_key in [k for k in _rule_tables if k[0] == key[0]]:
+            del _rule_tables[stale_key]
+        _rule_tables[key] = table
+        logger.info(
+            "Compiled routing rule table",
+            config_path=str(path),
+            rules=len(table.rules),
+            enabled=table.enabled,
+        )
+        return table
+
+
+class RoutingRuleStats:
+    """Routing-session messages routed by rule vs. passed to the routing LLM."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rule_routed: dict[str, int] = {}
+        self._fell_through = 0
+
+    def record_rule(self, agent: str) -> None:
+        with self._lock:
+            self._rule_routed[agent] = self._rule_routed.get(agent, 0) + 1
+
+    def record_fall_through(self) -> None:
+        with self._lock:
+            self._fell_through += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            rule_total = sum(self._rule_routed.values())
+            total = rule_total + self._fell_through
+            return {
+                "rule_routed": dict(self._rule_routed),
+                "fell_through": self._fell_through,
+                "rule_rate": round(rule_total / total, 3) if total else 0.0,
+            }
+
+
+_routing_rule_stats = RoutingRuleStats()
+
+
+def get_routing_rule_stats() -> RoutingRuleStats:
+    return _routing_rule_stats
@@ -0,0 +1,189 @@
+"""
+In-memory cache of live conversation sessions.
+
+Resuming a conversation normally rebuilds its ConversationSession and reads
+the LangGraph checkpoint several times per turn. The cache keeps recently used
+sessions, keyed by the request manager session ID, together with the thread
+state their last turn produced, so the next request for an active user picks up
+the session object and state without rebuilding or re-reading them.
+
+Entries are validated against the session row read at the start of each
+request:
+- a different current agent, conversation thread or agent configuration drops
+  the entry (the conversation moved on, e.g. after routing or a reset)
+- so does a changed lg-prompt config file or a replaced checkpointer: the
+  session's state machine and compiled graph no longer match the current ones
+- each request increments the row's version once, so a version that moved by
+  more than one since our last turn means another replica (or the request
+  manager) changed the session; the session object is reused but its thread
+  state is read again from the checkpoint
+
+Sessions are checked out for the duration of a turn, so concurrent requests for
+the same session never share a session object.
+
+Configuration (environment variables):
+    SESSION_CACHE_MAX_SIZE: maximum cached sessions (default 1024, 0 disables)
+    SESSION_CACHE_TTL_SECONDS: idle time before an entry expires (default 900)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from shared_models import configure_logging
+
+logger = configure_logging("agent-service")
+
+
+class CachedSession:
+    """A live conversation session and what it was validated against."""
+
+    def __init__(
+        self,
+        conversation_session: Any,
+        agent_name: str,
+        session_name: str,
+        version: int,
+    ) -> None:
+        self.conversation_session = conversation_session
+        self.agent_name = agent_name
+        self.session_name = session_name
+        # Session row version seen by the turn that cached this entry
+        self.version = version
+        self.cached_at = time.monotonic()
+
+
+class SessionCache:
+    """Bounded LRU of live conversation sessions with check-out semantics."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 900.0) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedSession] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._invalidated = 0
+        self._stale_state = 0
+        self._evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def checkout(
+        self,
+        session_id: str,
+        agent: Any,
+        agent_name: str,
+        thread_id: str,
+        version: int,
+    ) -> Optional[CachedSession]:
+        """Take the cached session for a session row, if it is still valid.
+
+        The entry is removed until put back with `release`.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is None:
+                self._misses += 1
+                return None
+            session = entry.conversation_session
+            if (
+                time.monotonic() - entry.cached_at > self.ttl_seconds
+                or entry.agent_name != agent_name
+                or session.thread_id != thread_id
+                or session.agent is not agent
+            ):
+                self._invalidated += 1
+                self._misses += 1
+                return None
+
+        # Outside the lock: a changed config compiles the new graph here
+        if not session.uses_current_graph():
+            logger.info(
+                "State machine config changed, dropping cached session",
+                session_id=session_id,
+                config_path=str(session.config_path),
+            )
+            with self._lock:
+                self._invalidated += 1
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+            stale_state = version != entry.version + 1
+            if stale_state:
+                self._stale_state += 1
+
+        if stale_state:
+            logger.debug(
+                "Cached session changed elsewhere, reloading thread state",
+                session_id=session_id,
+                cached_version=entry.version,
+                version=version,
+            )
+            session.invalidate_state()
+        return entry
+
+    def release(
+        self,
+        session_id: str,
+        conversation_session: Any,
+        agent_name: str,
+        session_name: str,
+        version: int,
+    ) -> None:
+        """Put a session back after its turn."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self._entries[session_id] = CachedSession(
+                conversation_session, agent_name, session_name, version
+            )
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evicted += 1
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            if self._entries.pop(session_id, None) is not None:
+                self._invalidated += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "invalidated": self._invalidated,
+                "stale_state": self._stale_state,
+                "evicted": self._evicted,
+            }
+
+
+_session_cache: Optional[SessionCache] = None
+_session_cache_lock = threading.Lock()
+
+
+def get_session_cache() -> SessionCache:
+    """Get the global session cache (SESSION_CACHE_MAX_SIZE, SESSION_CACHE_TTL_SECONDS)."""
+    global _session_cache
+    if _session_cache is None:
+        with _session_cache_lock:
+            if _session_cache is None:
+                _session_cache = SessionCache(
+                    max_size=int(os.getenv("SESSION_CACHE_MAX_SIZE", "1024")),
+                    ttl_seconds=float(os.getenv("SESSION_CACHE_TTL_SECONDS", "900")),
+                )
+    return _session_cache
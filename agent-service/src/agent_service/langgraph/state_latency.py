@@ -0,0 +1,100 @@
+"""
+Per-state LLM latency reporting.
+
+Records the duration of every LLM call by (agent, state, model) so states can
+be moved to a smaller model (`model` in the lg-prompt YAML) where it pays off.
+Reported under `state_latency` in GET /health/detailed. The recent p95 is
+also the default delay before a hedged request is sent.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Any, Optional
+
+# Recent samples kept per key for percentiles
+_SAMPLE_WINDOW = 256
+
+LatencyKey = tuple[str, str, str]
+
+
+def _percentile(sorted_samples: list[float], fraction: float) -> float:
+    index = max(0, math.ceil(fraction * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+class StateLatencyStats:
+    """Call counts and latency percentiles per (agent, state, model)."""
+
+    def __init__(self, sample_window: int = _SAMPLE_WINDOW) -> None:
+        self.sample_window = sample_window
+        self._lock = threading.Lock()
+        # key -> [calls, total_ms, max_ms, recent samples]
+        self._entries: dict[LatencyKey, list[Any]] = {}
+
+    def record(
+        self,
+        agent_name: str,
+        state_name: Optional[str],
+        model: str,
+        elapsed_ms: float,
+    ) -> None:
+        key = (agent_name, state_name or "unknown", model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = [0, 0.0, 0.0, deque(maxlen=self.sample_window)]
+                self._entries[key] = entry
+            entry[0] += 1
+            entry[1] += elapsed_ms
+            entry[2] = max(entry[2], elapsed_ms)
+            entry[3].append(elapsed_ms)
+
+    def get_percentile(
+        self,
+        agent_name: str,
+        state_name: Optional[str],
+        model: str,
+        fraction: float,
+        min_samples: int = 20,
+    ) -> Optional[float]:
+        """Recent latency percentile in ms, or None with too few samples."""
+        key = (agent_name, state_name or "unknown", model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or len(entry[3]) < min_samples:
+                return None
+            samples = sorted(entry[3])
+        return _percentile(samples, fraction)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Nested as {agent: {state: {model: stats}}}."""
+        with self._lock:
+            snapshot = [
+                (key, calls, total_ms, max_ms, sorted(samples))
+                for key, (calls, total_ms, max_ms, samples) in self._entries.items()
+            ]
+
+        stats: dict[str, Any] = {}
+        for (
+            (agent_name, state_name, model),
+            calls,
+            total_ms,
+            max_ms,
+            samples,
+        ) in snapshot:
+            stats.setdefault(agent_name, {}).setdefault(state_name, {})[model] = {
+                "calls": calls,
+                "avg_ms": round(total_ms / calls, 1),
+                "p50_ms": round(_percentile(samples, 0.5), 1),
+                "p95_ms": round(_percentile(samples, 0.95), 1),
+                "max_ms": round(max_ms, 1),
+            }
+        return stats
+
+
+_state_latency_stats = StateLatencyStats()
+
+
+def get_state_latency_stats() -> StateLatencyStats:
+    return _state_latency_stats
@@ -0,0 +1,130 @@
+"""
+Precompiled placeholder templates for state machine prompts and messages.
+
+Prompt and message texts in the lg-prompt YAML use `{field}` and
+`{field.subfield}` placeholders filled from the conversation state; `{{` and
+`}}` produce literal braces. Templates are parsed once into literal and
+placeholder segments. Values derived from the conversation
+(`last_user_message`, `conversation_history`) are only computed when a
+template references them, and come from the incremental message index, so
+rendering cost doesn't grow with the length of the conversation.
+
+Placeholders whose data is missing are left in the text unchanged.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Optional, Union
+
+from shared_models import configure_logging
+
+from .message_index import conversation_history, last_human_message
+
+logger = configure_logging("agent-service")
+
+_ESCAPED_OPEN = "\x00ESCAPED_OPEN\x00"
+_ESCAPED_CLOSE = "\x00ESCAPED_CLOSE\x00"
+_PLACEHOLDER_PATTERN = re.compile(r"\{([^}]+)\}")
+
+
+def _restore_braces(text: str) -> str:
+    return text.replace(_ESCAPED_OPEN, "{").replace(_ESCAPED_CLOSE, "}")
+
+
+def last_user_message(state_data: dict[str, Any]) -> Any:
+    """Content of the most recent user message, or an empty string."""
+    msg = last_human_message(state_data)
+    return msg.content if msg is not None else ""
+
+
+# Placeholders computed from the state (they take precedence over state fields)
+DERIVED_PLACEHOLDERS: dict[str, Callable[[dict[str, Any]], Any]] = {
+    "last_user_message": last_user_message,
+    "conversation_history": conversation_history,
+}
+
+
+class _Placeholder:
+    """A `{field.subfield}` reference."""
+
+    __slots__ = ("raw", "field_path", "parts")
+
+    def __init__(self, raw: str, field_path: str) -> None:
+        self.raw = raw
+        self.field_path = field_path
+        self.parts = field_path.split(".")
+
+
+class TextTemplate:
+    """A template parsed into literal text and placeholder segments."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        escaped = text.replace("{{", _ESCAPED_OPEN).replace("}}", _ESCAPED_CLOSE)
+
+        segments: list[Union[str, _Placeholder]] = []
+        position = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(escaped):
+            if match.start() > position:
+                segments.append(_restore_braces(escaped[position : match.start()]))
+            segments.append(_Placeholder(_restore_braces(match.group(0)), match[1]))
+            position = match.end()
+        if position < len(escaped):
+            segments.append(_restore_braces(escaped[position:]))
+
+        self.segments = tuple(segments)
+        # Top-level names the template reads
+        self.placeholders = frozenset(
+            segment.parts[0]
+            for segment in self.segments
+            if isinstance(segment, _Placeholder)
+        )
+        self._static_text: Optional[str] = (
+            "".join(segment for segment in self.segments if isinstance(segment, str))
+            if not self.placeholders
+            else None
+        )
+
+    def render(
+        self,
+        state_data: dict[str, Any],
+        authoritative_user_id: Optional[str] = None,
+    ) -> str:
+        """Fill the placeholders from the state."""
+        if self._static_text is not None:
+            return self._static_text
+
+        derived: dict[str, Any] = {}
+        output = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                output.append(segment)
+                continue
+            try:
+                root = segment.parts[0]
+                if root in DERIVED_PLACEHOLDERS:
+                    if root not in derived:
+                        derived[root] = DERIVED_PLACEHOLDERS[root](state_data)
+                    value = derived[root]
+                elif root == "authoritative_user_id" and authoritative_user_id:
+                    value = authoritative_user_id
+                else:
+                    value = state_data[root]
+                for part in segment.parts[1:]:
+                    if isinstance(value, dict):
+                        value = value[part]
+                    else:
+                        value = getattr(value, part)
+                output.append(str(value))
+            except (KeyError, AttributeError, TypeError):
+                logger.warning(
+                    "Missing placeholder data", field_path=segment.field_path
+                )
+                output.append(segment.raw)
+        return "".join(output)
+
+
+@lru_cache(maxsize=1024)
+def get_text_template(text: str) -> TextTemplate:
+    """Get the compiled template for a text (compiled once per distinct text)."""
+    return TextTemplate(text)
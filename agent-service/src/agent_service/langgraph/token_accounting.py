@@ -0,0 +1,222 @@
+"""
+Write-behind persistence of per-session token counts.
+
+Every LLM call adds its token usage to the session's counters in
+request_sessions. Instead of one UPDATE per call, usage is added to an
+in-process accumulator keyed by session (a lock and a few integer additions
+on the LLM path, callable from any thread) and a background task writes the
+aggregated deltas of all sessions in a single UPDATE statement. It flushes
+every TOKEN_ACCOUNTING_FLUSH_INTERVAL_MS, as soon as
+TOKEN_ACCOUNTING_FLUSH_CALLS calls are pending, and once more at shutdown.
+Deltas from a failed flush are kept and retried with the next one.
+
+Counts reach the database up to one flush interval after the call.
+
+Configuration (environment variables):
+    TOKEN_ACCOUNTING_FLUSH_INTERVAL_MS: milliseconds between flushes (default 1000)
+    TOKEN_ACCOUNTING_FLUSH_CALLS: pending calls that trigger a flush (default 100)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from shared_models import configure_logging
+from shared_models.session_token_service import SessionTokenDelta
+
+logger = configure_logging("agent-service")
+
+
+class TokenAccumulator:
+    """Aggregates token usage per session until it is flushed to the database."""
+
+    def __init__(self, flush_interval_ms: float = 1000, flush_calls: int = 100) -> None:
+        self.flush_interval_ms = max(1.0, flush_interval_ms)
+        self.flush_calls = max(1, flush_calls)
+        self._lock = threading.Lock()
+        self._pending: dict[str, SessionTokenDelta] = {}
+        self._pending_calls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._recorded_calls = 0
+        self._flushes = 0
+        self._flushed_calls = 0
+        self._flushed_sessions = 0
+        self._failed_flushes = 0
+        self._last_flush_ms = 0.0
+
+    def record(self, session_id: str, input_tokens: int, output_tokens: int) -> None:
+        """Add the token usage of one LLM call for a session (thread-safe)."""
+        with self._lock:
+            delta = self._pending.get(session_id)
+            if delta is None:
+                delta = self._pending[session_id] = SessionTokenDelta(session_id)
+            delta.add_call(input_tokens, output_tokens)
+            self._pending_calls += 1
+            self._recorded_calls += 1
+            flush_due = self._pending_calls >= self.flush_calls
+
+        if flush_due and self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # Loop closed; the shutdown flush takes care of it
+
+    def _take_pending(self) -> list[SessionTokenDelta]:
+        with self._lock:
+            deltas = list(self._pending.values())
+            self._pending = {}
+            self._pending_calls = 0
+        return deltas
+
+    def _restore_pending(self, deltas: list[SessionTokenDelta]) -> None:
+        """Put back the deltas of a failed flush, merged with newer usage."""
+        with self._lock:
+            for delta in deltas:
+                # Count before merging; the newer calls are already pending
+                self._pending_calls += delta.call_count
+                newer = self._pending.get(delta.session_id)
+                if newer is not None:
+                    delta.merge(newer)
+                self._pending[delta.session_id] = delta
+
+    async def flush(self) -> int:
+        """Write all pending deltas in one statement.
+
+        Returns:
+            int: number of LLM calls flushed (0 if nothing was pending or the
+            write failed)
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            deltas = self._take_pending()
+            if not deltas:
+                return 0
+
+            calls = sum(delta.call_count for delta in deltas)
+            start = time.perf_counter()
+            try:
+                from shared_models.database import get_db_session
+                from shared_models.session_token_service import SessionTokenService
+
+                async with get_db_session() as db:
+                    await SessionTokenService.apply_token_deltas(db, deltas)
+            except Exception as e:
+                self._restore_pending(deltas)
+                with self._lock:
+                    self._failed_flushes += 1
+                logger.warning(
+                    "Failed to save token counts to database",
+                    sessions=len(deltas),
+                    calls=calls,
+                    error=str(e),
+                    error_type=type(e).__name__,
+                )
+                return 0
+
+            with self._lock:
+                self._flushes += 1
+                self._flushed_calls += calls
+                self._flushed_sessions += len(deltas)
+                self._last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+            return calls
+
+    def attach_loop(self) -> asyncio.Event:
+        """Let record() wake the flush task on the running loop from any thread."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    async def run(self) -> None:
+        """Flush on the interval or when enough calls are pending, until cancelled."""
+        wakeup = self._wakeup or self.attach_loop()
+        interval = self.flush_interval_ms / 1000
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            await self.flush()
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "flush_interval_ms": self.flush_interval_ms,
+                "flush_calls": self.flush_calls,
+                "pending_sessions": len(self._pending),
+                "pending_calls": self._pending_calls,
+                "recorded_calls": self._recorded_calls,
+                "flushes": self._flushes,
+                "flushed_calls": self._flushed_calls,
+                "avg_sessions_per_flush": (
+                    round(self._flushed_sessions / self._flushes, 2)
+                    if self._flushes
+                    else 0.0
+                ),
+                "failed_flushes": self._failed_flushes,
+                "last_flush_ms": self._last_flush_ms,
+            }
+
+
+# Global accumulator instance and flush task
+_token_accumulator: Optional[TokenAccumulator] = None
+_token_accumulator_lock = threading.Lock()
+_flush_task: Optional[asyncio.Task[None]] = None
+
+
+def get_token_accumulator() -> TokenAccumulator:
+    """Get the global token accumulator configured from the environment."""
+    global _token_accumulator
+    if _token_accumulator is None:
+        with _token_accumulator_lock:
+            if _token_accumulator is None:
+                _token_accumulator = TokenAccumulator(
+                    flush_interval_ms=float(
+                        os.getenv("TOKEN_ACCOUNTING_FLUSH_INTERVAL_MS", "1000")
+                    ),
+                    flush_calls=int(os.getenv("TOKEN_ACCOUNTING_FLUSH_CALLS", "100")),
+                )
+    return _token_accumulator
+
+
+def get_token_accounting_stats() -> dict[str, Any]:
+    return get_token_accumulator().get_stats()
+
+
+def start_token_accounting() -> None:
+    """Start the background flush task."""
+    global _flush_task
+
+    if _flush_task is not None:
+        return
+
+    accumulator = get_token_accumulator()
+    accumulator.attach_loop()
+    _flush_task = asyncio.create_task(accumulator.run())
+    logger.info(
+        "Started token accounting",
+        flush_interval_ms=accumulator.flush_interval_ms,
+        flush_calls=accumulator.flush_calls,
+    )
+
+
+async def stop_token_accounting() -> None:
+    """Stop the background flush task and flush what is still pending."""
+    global _flush_task
+
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+
+    if _token_accumulator is not None:
+        await _token_accumulator.flush()
@@ -11,6 +11,8 @@ from typing import Any, Dict, List, Optional
 
 from shared_models import configure_logging
 
+from .token_accounting import get_token_accumulator
+
 logger = configure_logging("agent-service")
 
 
@@ -287,29 +289,8 @@ def count_tokens_from_response(
                 # Extract session_id from context (format: "session_{session_id}")
                 session_id = context[8:]  # Remove "session_" prefix
 
-                # Schedule database save asynchronously (fire and forget)
-                import asyncio
-
-                async def _save_tokens() -> None:
-                    try:
-                        from shared_models.database import get_db_session
-                        from shared_models.session_token_service import (
-                            SessionTokenService,
-                        )
-
-                        async with get_db_session() as db:
-                            await SessionTokenService.update_token_counts(
-                                db, session_id, input_tokens, output_tokens
-                            )
-                    except Exception as e:
-                        logger.warning(
-                            "Failed to save token counts to database",
-                            session_id=session_id,
-                            error=str(e),
-                            error_type=type(e).__name__,
-                        )
-
-                asyncio.create_task(_save_tokens())
+                # Batched write-behind; no database round trip here
+                get_token_accumulator().record(session_id, input_tokens, output_tokens)
 
         return input_tokens, output_tokens
     except Exception:
@@ -0,0 +1,172 @@
+"""
+Bounded executor for running LangGraph conversation turns off the event loop.
+
+ConversationSession.send_message is synchronous: it makes blocking LlamaStack
+HTTP calls and PostgresSaver I/O. Calling it directly from an async handler
+stalls every other request (and health checks) for the duration of the turn.
+This module runs turns on a bounded thread pool and tracks queue depth and wait
+times so saturation is visible.
+
+Configuration (environment variables):
+    LANGGRAPH_EXECUTION_MODE: "thread" (default) runs turns in the pool,
+        "inline" runs them on the event loop as before
+    LANGGRAPH_MAX_WORKERS: maximum number of concurrent turns (default 8)
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+from shared_models import configure_logging
+
+logger = configure_logging("agent-service")
+
+T = TypeVar("T")
+
+EXECUTION_MODE_THREAD = "thread"
+EXECUTION_MODE_INLINE = "inline"
+
+
+class TurnExecutor:
+    """Runs blocking conversation turns on a bounded thread pool with metrics."""
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        mode: str = EXECUTION_MODE_THREAD,
+    ) -> None:
+        if mode not in (EXECUTION_MODE_THREAD, EXECUTION_MODE_INLINE):
+            logger.warning(
+                "Unknown LangGraph execution mode, using thread",
+                mode=mode,
+            )
+            mode = EXECUTION_MODE_THREAD
+
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self.mode == EXECUTION_MODE_THREAD:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="langgraph-turn"
+            )
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._total_run_ms = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking callable without blocking the event loop.
+
+        Context variables (e.g. tracing context) are copied into the worker.
+        """
+        if self._executor is None:
+            return self._timed(time.perf_counter(), partial(func, *args, **kwargs))
+
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        ctx = contextvars.copy_context()
+        call = partial(ctx.run, func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._timed, submitted_at, call
+        )
+
+    def _timed(self, submitted_at: float, call: Callable[[], T]) -> T:
+        started_at = time.perf_counter()
+        wait_ms = (started_at - submitted_at) * 1000
+        with self._lock:
+            if self._executor is not None:
+                self._queued -= 1
+            self._active += 1
+            self._total_wait_ms += wait_ms
+            self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+
+        failed = False
+        try:
+            return call()
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            run_ms = (time.perf_counter() - started_at) * 1000
+            with self._lock:
+                self._active -= 1
+                self._total_run_ms += run_ms
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return executor metrics (queue depth, wait and run times)."""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": (
+                    round(self._total_wait_ms / finished, 2) if finished else 0.0
+                ),
+                "max_wait_ms": round(self._max_wait_ms, 2),
+                "avg_run_ms": (
+                    round(self._total_run_ms / finished, 2) if finished else 0.0
+                ),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the underlying thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Global turn executor instance
+_turn_executor: Optional[TurnExecutor] = None
+
+
+def get_turn_executor() -> TurnExecutor:
+    """Get the global turn executor, creating it from the environment if needed."""
+    global _turn_executor
+    if _turn_executor is None:
+        _turn_executor = TurnExecutor(
+            max_workers=int(os.getenv("LANGGRAPH_MAX_WORKERS", "8")),
+            mode=os.getenv("LANGGRAPH_EXECUTION_MODE", EXECUTION_MODE_THREAD).lower(),
+        )
+        logger.info(
+            "Created LangGraph turn executor",
+            mode=_turn_executor.mode,
+            max_workers=_turn_executor.max_workers,
+        )
+    return _turn_executor
+
+
+async def run_turn(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking LangGraph call on the global turn executor."""
+    return await get_turn_executor().run(func, *args, **kwargs)
+
+
+def shutdown_turn_executor() -> None:
+    """Shut down the global turn executor (called on service shutdown)."""
+    global _turn_executor
+    if _turn_executor is not None:
+        _turn_executor.shutdown()
+        _turn_executor = None
@@ -1,5 +1,6 @@
 """CloudEvent-driven Agent Service."""
 
+import asyncio
 import os
 import uuid
 from datetime import datetime, timezone
@@ -35,6 +36,29 @@ from tracing_config.auto_tracing import (
 )
 
 from . import __version__
+from .knowledge.vector_store_resolver import get_vector_store_resolver
+from .langgraph.checkpoint_pruner import (
+    get_checkpoint_prune_stats,
+    start_checkpoint_pruner,
+    stop_checkpoint_pruner,
+)
+from .langgraph.context_window import shutdown_conversation_summarizer
+from .langgraph.llm_resilience import get_circuit_breaker_stats, get_hedge_stats
+from .langgraph.moderation_cache import get_moderation_cache
+from .langgraph.postgres_checkpoint import get_checkpoint_pool_stats
+from .langgraph.pre_classifier import get_pre_classifier_stats
+from .langgraph.response_cache import get_response_cache
+from .langgraph.response_streaming import ResponseStream, get_response_stream_stats
+from .langgraph.routing_rules import get_routing_rule_stats
+from .langgraph.session_cache import get_session_cache
+from .langgraph.state_latency import get_state_latency_stats
+from .langgraph.token_accounting import (
+    get_token_accounting_stats,
+    get_token_accumulator,
+    start_token_accounting,
+    stop_token_accounting,
+)
+from .langgraph.turn_executor import get_turn_executor, shutdown_turn_executor
 from .session_manager import ResponsesSessionManager
 
 # Configure structured logging and auto tracing
@@ -56,6 +80,14 @@ class AgentConfig:
                 "Configure BROKER_URL to point to your Knative broker or mock eventing service."
             )
 
+        # Integrations whose responses are always streamed (e.g. "SLACK");
+        # other requests stream when integration_context has "stream": true
+        self.stream_integrations = {
+            integration.strip().upper()
+            for integration in os.getenv("STREAM_RESPONSE_INTEGRATIONS", "").split(",")
+            if integration.strip()
+        }
+
 
 class AgentService:
     """Service for handling agent interactions."""
@@ -100,6 +132,7 @@ class AgentService:
                     agent_id=None,
                     conversation_thread_id=None,
                 )
+                get_session_cache().invalidate(request.session_id)
 
                 logger.info(
                     "Session reset completed",
@@ -135,6 +168,9 @@ class AgentService:
                 session_id=request.session_id,
             )
 
+            # Write counts still pending from recent LLM calls first
+            await get_token_accumulator().flush()
+
             # Query database for token counts
             async with get_db_session() as db:
                 token_counts = await SessionTokenService.get_token_counts(
@@ -432,6 +468,7 @@ class AgentService:
 
             # Get database session for responses session manager
             db_manager = get_database_manager()
+            response_stream = self._create_response_stream(request)
 
             async with db_manager.get_session() as db:
                 # Create responses session manager
@@ -444,7 +481,11 @@ class AgentService:
                 response_content = await session_manager.handle_responses_message(
                     text=request.content,
                     request_manager_session_id=request.session_id,
+                    integration_type=request.integration_type,
+                    response_stream=response_stream,
                 )
+                if response_stream is not None:
+                    get_response_stream_stats().record(response_stream)
 
                 # Create response with automatic timing calculation
                 if session_manager.current_agent_name is None:
@@ -460,6 +501,8 @@ class AgentService:
                             await session_manager.handle_responses_message(
                                 text=request.content,
                                 request_manager_session_id=request.session_id,
+                                integration_type=request.integration_type,
+                                response_stream=response_stream,
                             )
                         )
                         # Check again after retry
@@ -485,6 +528,8 @@ class AgentService:
                             content="Error: No agent assigned to handle this request",
                         )
 
+                session_manager.release_conversation_session()
+
                 return self._create_agent_response(
                     request=request,
                     content=response_content,
@@ -504,6 +549,69 @@ class AgentService:
                 content=f"Failed to process responses mode request: {str(e)}",
             )
 
+    def _create_response_stream(
+        self, request: NormalizedRequest
+    ) -> Optional[ResponseStream]:
+        """Create a stream publishing response chunks, if the request streams."""
+        integration_type = str(
+            getattr(request.integration_type, "value", request.integration_type)
+        ).upper()
+        if not (
+            request.integration_context.get("stream")
+            or integration_type in self.config.stream_integrations
+        ):
+            return None
+
+        loop = asyncio.get_running_loop()
+
+        def publish(chunk: Dict[str, Any]) -> None:
+            # Called from the turn executor thread; posting happens on the loop
+            asyncio.run_coroutine_threadsafe(
+                self._publish_response_chunk(request, integration_type, chunk), loop
+            )
+
+        return ResponseStream(publish)
+
+    async def _publish_response_chunk(
+        self, request: NormalizedRequest, integration_type: str, chunk: Dict[str, Any]
+    ) -> bool:
+        """Publish a partial (streamed) response as a CloudEvent."""
+        try:
+            event_data = {
+                "request_id": request.request_id,
+                "session_id": request.session_id,
+                "user_id": request.user_id,
+                "integration_type": integration_type,
+                "integration_context": request.integration_context,
+                **chunk,
+            }
+            builder = CloudEventBuilder("agent-service")
+            event = builder.create_response_chunk_event(
+                event_data, request.request_id, request.session_id
+            )
+            headers, body = to_structured(event)
+
+            if self.config.broker_url is None:
+                return False
+
+            response = await self.http_client.post(
+                self.config.broker_url,
+                headers=headers,
+                content=body,
+            )
+            response.raise_for_status()
+            return True
+
+        except Exception as e:
+            logger.warning(
+                "Failed to publish response chunk",
+                request_id=request.request_id,
+                sequence=chunk.get("sequence"),
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            return False
+
     async def _publish_processing_event(self, request: NormalizedRequest) -> bool:
         """Publish processing started event for user notification."""
         try:
@@ -607,6 +715,32 @@ async def _agent_service_startup() -> None:
     _agent_service = AgentService(config)
     logger.info("Agent Service initialized")
 
+    start_checkpoint_pruner()
+    start_token_accounting()
+
+    # Build the shared agent manager up front so the first request does not pay
+    # for loading agent configs and creating LlamaStack clients. Vector stores
+    # are listed once first so every agent resolves its knowledge bases from
+    # the cache. Each agent's state machine config is then compiled, so config
+    # errors are logged now rather than when a conversation reaches them.
+    try:
+        from .langgraph import get_agent_manager
+        from .langgraph.lg_flow_state_machine import (
+            compile_agent_state_machine_configs,
+        )
+
+        await asyncio.to_thread(get_vector_store_resolver().refresh)
+        agent_manager = await asyncio.to_thread(get_agent_manager)
+        await asyncio.to_thread(
+            compile_agent_state_machine_configs, agent_manager.agents_dict
+        )
+    except Exception as e:
+        logger.warning(
+            "Failed to prebuild agent manager, will retry on first request",
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+
 
 async def _agent_service_shutdown() -> None:
     """Custom shutdown logic for Agent Service."""
@@ -616,6 +750,11 @@ async def _agent_service_shutdown() -> None:
         await _agent_service.close()
         _agent_service = None
 
+    await stop_checkpoint_pruner()
+    await stop_token_accounting()
+    shutdown_turn_executor()
+    shutdown_conversation_summarizer()
+
 
 # Create lifespan using shared utility with custom startup/shutdown
 def lifespan(app: FastAPI) -> Any:
@@ -652,13 +791,28 @@ async def detailed_health_check(
     db: AsyncSession = Depends(get_db_session_dependency),
 ) -> Dict[str, Any]:
     """Detailed health check with database dependency for monitoring."""
-    return dict(
+    health = dict(
         await simple_health_check(
             service_name="agent-service",
             version=__version__,
             db=db,
         )
     )
+    health["turn_executor"] = get_turn_executor().get_stats()
+    health["checkpoint_pool"] = get_checkpoint_pool_stats()
+    health["checkpoint_pruning"] = get_checkpoint_prune_stats()
+    health["vector_stores"] = get_vector_store_resolver().get_stats()
+    health["moderation_cache"] = get_moderation_cache().get_stats()
+    health["response_cache"] = get_response_cache().get_stats()
+    health["pre_classifier"] = get_pre_classifier_stats().get_stats()
+    health["routing_rules"] = get_routing_rule_stats().get_stats()
+    health["state_latency"] = get_state_latency_stats().get_stats()
+    health["llm_circuit_breakers"] = get_circuit_breaker_stats()
+    health["llm_hedging"] = get_hedge_stats().get_stats()
+    health["response_streaming"] = get_response_stream_stats().get_stats()
+    health["session_cache"] = get_session_cache().get_stats()
+    health["token_accounting"] = get_token_accounting_stats()
+    return health
 
 
 @app.post("/api/v1/events/cloudevents")
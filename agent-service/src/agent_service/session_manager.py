@@ -11,6 +11,12 @@ from shared_models.user_utils import is_uuid
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .langgraph.response_streaming import ResponseStream
+from .langgraph.routing_rules import get_routing_rule_stats, get_routing_rule_table
+from .langgraph.session_cache import get_session_cache
+from .langgraph.token_accounting import get_token_accumulator
+from .langgraph.turn_executor import run_turn
+
 logger = configure_logging("agent-service")
 
 # Configure logging to suppress verbose output
@@ -64,20 +70,22 @@ class ResponsesSessionManager(BaseSessionManager):
         self.agent_manager: Any | None = None
         self.agents: list[Any] = []
         self.request_manager_session_id: str | None = None
+        self.integration_type: str | None = None
+        self.response_stream: ResponseStream | None = None
+        # Session row version read when the session was resumed
+        self.session_version: int | None = None
 
         self._initialize_conversation_state()
 
     def _initialize_conversation_state(self) -> None:
         """Initialize conversation state for responses mode."""
         try:
-            from .langgraph import ResponsesAgentManager
+            from .langgraph import get_agent_manager
 
-            self.agent_manager = ResponsesAgentManager()
-            assert (
-                self.agent_manager is not None
-            )  # ResponsesAgentManager() never returns None
+            # Shared across requests; rebuilt only when the agent config changes
+            self.agent_manager = get_agent_manager()
             self.agents = list(self.agent_manager.agents_dict.keys())
-            logger.info("Loaded agents for responses mode", agents=self.agents)
+            logger.debug("Loaded agents for responses mode", agents=self.agents)
         except ImportError as e:
             logger.warning(
                 "LangGraph components not available",
@@ -100,8 +108,14 @@ class ResponsesSessionManager(BaseSessionManager):
         text: str,
         request_manager_session_id: Optional[str] = None,
         session_name: Optional[str] = None,
+        integration_type: Optional[str] = None,
+        response_stream: Optional[ResponseStream] = None,
     ) -> str:
-        """Handle a message in responses mode with full conversation management."""
+        """Handle a message in responses mode with full conversation management.
+
+        With a response_stream, states configured with `stream: true` publish
+        the reply incrementally while it is generated.
+        """
         if not self.user_id:
             logger.error("Responses mode not available", user_id=self.user_id)
             return "Error: Responses mode not available"
@@ -113,6 +127,12 @@ class ResponsesSessionManager(BaseSessionManager):
         # Store the request manager session ID for database updates
         if request_manager_session_id:
             self.request_manager_session_id = request_manager_session_id
+        if integration_type:
+            # IntegrationType is a str enum; keep the plain value
+            self.integration_type = str(
+                getattr(integration_type, "value", integration_type)
+            ).upper()
+        self.response_stream = response_stream
 
         logger.debug(
             "Handling responses message",
@@ -155,6 +175,13 @@ class ResponsesSessionManager(BaseSessionManager):
                             user_id=self.user_id,
                         )
 
+                # Obvious requests go straight to the specialist, without
+                # creating a routing session or calling the routing LLM
+                if not self.current_session:
+                    rule_agent = self._match_routing_rule(text)
+                    if rule_agent:
+                        return await self._route_to_specialist(rule_agent, text)
+
                 # If session not resumed, create a new one
                 if not self.current_session:
                     logger.debug(
@@ -176,19 +203,14 @@ class ResponsesSessionManager(BaseSessionManager):
             should_reset = False
             if self.conversation_session:
                 try:
-                    state = self.conversation_session.app.get_state(
-                        self.conversation_session.thread_config
-                    )
+                    state_values = await self._get_conversation_state_values()
                     # Check for the _should_return_to_routing flag in state
-                    if hasattr(state, "values"):
-                        should_return = state.values.get(
-                            "_should_return_to_routing", False
+                    should_return = state_values.get("_should_return_to_routing", False)
+                    if should_return:
+                        should_reset = True
+                        logger.info(
+                            "Found _should_return_to_routing flag in state - routing back to routing agent"
                         )
-                        if should_return:
-                            should_reset = True
-                            logger.info(
-                                "Found _should_return_to_routing flag in state - routing back to routing agent"
-                            )
                 except Exception as e:
                     logger.debug(
                         "Could not check conversation state",
@@ -205,7 +227,11 @@ class ResponsesSessionManager(BaseSessionManager):
                 await self._reset_conversation_state()
                 # Recursively call with the actual user message to create new routing session
                 return await self.handle_responses_message(
-                    text, request_manager_session_id, session_name
+                    text,
+                    request_manager_session_id,
+                    session_name,
+                    integration_type=self.integration_type,
+                    response_stream=self.response_stream,
                 )
 
             # Intercept special commands before passing to conversation
@@ -217,6 +243,11 @@ class ResponsesSessionManager(BaseSessionManager):
                 )
                 return await self._handle_tokens_query()
 
+            if self._is_routing_session():
+                rule_agent = self._match_routing_rule(text)
+                if rule_agent:
+                    return await self._route_to_specialist(rule_agent, text)
+
             # Send message to current session
             logger.debug(
                 "Sending message to LangGraph session",
@@ -234,9 +265,12 @@ class ResponsesSessionManager(BaseSessionManager):
                 logger.error("Conversation session not initialized")
                 return "Error: Conversation session not initialized"
 
-            response = self.conversation_session.send_message(
+            # Run the blocking LangGraph turn off the event loop
+            response = await run_turn(
+                self.conversation_session.send_message,
                 text,
                 token_context=token_context,
+                response_stream=self.response_stream,
             )
             processed_response = self._process_agent_response(response)
 
@@ -327,9 +361,7 @@ class ResponsesSessionManager(BaseSessionManager):
             logger.info(
                 "StateMachine configuration",
                 config_path=str(session.config_path),
-                initial_state=session.state_machine.config.get("settings", {}).get(
-                    "initial_state"
-                ),
+                initial_state=session.state_machine.compiled.initial_state,
             )
 
             # Set up the new session
@@ -401,8 +433,10 @@ class ResponsesSessionManager(BaseSessionManager):
             current_agent_id = db_session.current_agent_id
             conversation_thread_id = db_session.conversation_thread_id
             conversation_context = db_session.conversation_context or {}
+            self.session_version = db_session.version
 
             if not conversation_thread_id or not current_agent_id:
+                get_session_cache().invalidate(request_manager_session_id)
                 logger.debug(
                     "Session found but missing required fields",
                     request_manager_session_id=request_manager_session_id,
@@ -436,16 +470,28 @@ class ResponsesSessionManager(BaseSessionManager):
                 )
                 return False
 
-            # Create session for agent with existing thread_id
-            session_name = conversation_context.get(
-                "session_name", f"session-{self.user_id}"
-            )
-            session = self._create_session_for_agent(
+            # Reuse the live session from an earlier turn on this instance, or
+            # create one for the agent with the existing thread_id
+            cached = get_session_cache().checkout(
+                request_manager_session_id,
                 agent,
                 current_agent_id,
-                session_name=session_name,
-                resume_thread_id=conversation_thread_id,
+                conversation_thread_id,
+                db_session.version,
             )
+            if cached:
+                session = cached.conversation_session
+                session_name = cached.session_name
+            else:
+                session_name = conversation_context.get(
+                    "session_name", f"session-{self.user_id}"
+                )
+                session = self._create_session_for_agent(
+                    agent,
+                    current_agent_id,
+                    session_name=session_name,
+                    resume_thread_id=conversation_thread_id,
+                )
 
             # Set up the resumed session
             self.conversation_session = session
@@ -457,23 +503,22 @@ class ResponsesSessionManager(BaseSessionManager):
             # Check if the conversation is in a terminal state
             # If it's a specialist agent session that's completed, reset and return to routing
             try:
-                state = session.app.get_state(session.thread_config)
-                if hasattr(state, "values"):
-                    current_state = state.values.get("current_state")
-                    if (
-                        current_agent_id != self.ROUTING_AGENT_NAME
-                        and session.state_machine.is_terminal_state(current_state)
-                    ):
-                        logger.info(
-                            "Resumed specialist session is in terminal state - resetting to routing agent",
-                            request_manager_session_id=request_manager_session_id,
-                            current_agent_id=current_agent_id,
-                            current_state=current_state,
-                        )
-                        # Reset the conversation state
-                        await self._reset_conversation_state()
-                        # Return False so a new routing session gets created
-                        return False
+                state_values = await self._get_conversation_state_values()
+                current_state = state_values.get("current_state")
+                if (
+                    current_agent_id != self.ROUTING_AGENT_NAME
+                    and session.state_machine.is_terminal_state(current_state)
+                ):
+                    logger.info(
+                        "Resumed specialist session is in terminal state - resetting to routing agent",
+                        request_manager_session_id=request_manager_session_id,
+                        current_agent_id=current_agent_id,
+                        current_state=current_state,
+                    )
+                    # Reset the conversation state
+                    await self._reset_conversation_state()
+                    # Return False so a new routing session gets created
+                    return False
             except Exception as e:
                 logger.debug(
                     "Could not check conversation state when resuming session",
@@ -487,6 +532,7 @@ class ResponsesSessionManager(BaseSessionManager):
                 request_manager_session_id=request_manager_session_id,
                 current_agent=self.current_agent_name,
                 thread_id=conversation_thread_id,
+                from_cache=bool(cached),
             )
 
             return True
@@ -517,6 +563,9 @@ class ResponsesSessionManager(BaseSessionManager):
                 user_id=self.user_id,
             )
 
+            # Write counts still pending from recent LLM calls first
+            await get_token_accumulator().flush()
+
             async with get_db_session() as db:
                 token_counts = await SessionTokenService.get_token_counts(
                     db, self.request_manager_session_id
@@ -630,6 +679,51 @@ class ResponsesSessionManager(BaseSessionManager):
         """Check if current session is with the routing agent."""
         return self.current_agent_name == self.ROUTING_AGENT_NAME
 
+    def _match_routing_rule(self, text: str) -> str | None:
+        """Match a message against the routing agent's rule table.
+
+        Returns the specialist agent to route to, or None to use LLM routing.
+        """
+        if self.agent_manager is None:
+            return None
+        routing_agent = self.agent_manager.get_agent(self.ROUTING_AGENT_NAME)
+        rules_path = (
+            routing_agent.config.get("routing_rules") if routing_agent else None
+        )
+        if not rules_path:
+            return None
+
+        table = get_routing_rule_table(rules_path)
+        if table is None:
+            return None
+
+        agent_name = table.match(
+            text,
+            [name for name in self.agents if name != self.ROUTING_AGENT_NAME],
+            self.integration_type,
+        )
+        if agent_name is None:
+            get_routing_rule_stats().record_fall_through()
+            return None
+
+        get_routing_rule_stats().record_rule(agent_name)
+        logger.info(
+            "Routing rule matched, skipping routing LLM",
+            user_id=self.user_id,
+            target_agent=agent_name,
+            integration_type=self.integration_type,
+            message_preview=text[:100],
+        )
+        return agent_name
+
+    async def _get_conversation_state_values(self) -> dict[str, Any]:
+        """Get the current thread state values, reading the checkpoint only if needed."""
+        if self.conversation_session is None:
+            return {}
+        if self.conversation_session.state_values is not None:
+            return dict(self.conversation_session.state_values)
+        return dict(await run_turn(self.conversation_session.get_state_values))
+
     def _process_agent_response(
         self, response: str, fallback_message: str = "No response received from agent"
     ) -> str:
@@ -650,12 +744,11 @@ class ResponsesSessionManager(BaseSessionManager):
             is_routing_session=self._is_routing_session(),
         )
 
+        # State left by this turn's graph run; read once for logging and routing
+        current_values: dict[str, Any] | None = None
         if self.conversation_session:
             try:
-                current_state = self.conversation_session.app.get_state(
-                    self.conversation_session.thread_config
-                )
-                current_values = current_state.values
+                current_values = await self._get_conversation_state_values()
                 current_state_name = current_values.get("current_state", "unknown")
                 routing_decision = current_values.get("routing_decision")
                 user_intent = current_values.get("user_intent")
@@ -690,12 +783,8 @@ class ResponsesSessionManager(BaseSessionManager):
         routed_agent = None
 
         # Check conversation state for routing decision from StateMachine
-        if self.conversation_session:
+        if current_values is not None:
             try:
-                current_state = self.conversation_session.app.get_state(
-                    self.conversation_session.thread_config
-                )
-                current_values = current_state.values
                 routing_decision = current_values.get("routing_decision")
                 user_intent = current_values.get("user_intent")
                 current_state_name = current_values.get("current_state")
@@ -762,7 +851,11 @@ class ResponsesSessionManager(BaseSessionManager):
                     current_agent=self.current_agent_name,
                 )
                 await self._reset_conversation_state()
-                return await self.handle_responses_message("hi")
+                return await self.handle_responses_message(
+                    "hi",
+                    integration_type=self.integration_type,
+                    response_stream=self.response_stream,
+                )
 
             # Handle routing to specialist agents
             if routed_agent != self.ROUTING_AGENT_NAME and self._is_routing_session():
@@ -828,7 +921,11 @@ class ResponsesSessionManager(BaseSessionManager):
                     # Send placeholder message - ConversationSession will override with routing agent's
                     # configured initial_user_message from YAML (routing.yaml: settings.initial_user_message)
                     return await self.handle_responses_message(
-                        "hi", self.request_manager_session_id, None
+                        "hi",
+                        self.request_manager_session_id,
+                        None,
+                        integration_type=self.integration_type,
+                        response_stream=self.response_stream,
                     )
 
         return processed_response
@@ -917,9 +1014,11 @@ class ResponsesSessionManager(BaseSessionManager):
             )
 
             token_context = get_session_token_context(self.request_manager_session_id)
-            response = session.send_message(
+            response = await run_turn(
+                session.send_message,
                 text,
                 token_context=token_context,
+                response_stream=self.response_stream,
             )
 
             logger.info(
@@ -1134,6 +1233,24 @@ class ResponsesSessionManager(BaseSessionManager):
                 user_id=self.user_id,
             )
 
+    def release_conversation_session(self) -> None:
+        """Keep the live conversation session for the next request of this session."""
+        if (
+            not self.request_manager_session_id
+            or self.conversation_session is None
+            or self.current_agent_name is None
+            or self.current_session is None
+            or self.session_version is None
+        ):
+            return
+        get_session_cache().release(
+            self.request_manager_session_id,
+            self.conversation_session,
+            self.current_agent_name,
+            self.current_session["session_name"],
+            self.session_version,
+        )
+
     def get_current_thread_id(self) -> Optional[str]:
         """Get the current thread ID for the user session."""
         if self.conversation_session:
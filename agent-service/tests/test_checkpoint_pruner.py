@@ -0,0 +1,387 @@
+"""Tests for checkpoint pruning."""
+
+from contextlib import nullcontext
+from types import SimpleNamespace
+from typing import Annotated, Any, Iterator, TypedDict
+from unittest.mock import MagicMock, patch
+
+import pytest
+from agent_service.langgraph import checkpoint_pruner, postgres_checkpoint
+from agent_service.langgraph.checkpoint_pruner import CheckpointPruner
+from agent_service.langgraph.checkpoint_serde import MESSAGE_BLOB_CHANNEL
+from agent_service.langgraph.postgres_checkpoint import DeltaPostgresSaver
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import START, StateGraph
+from langgraph.graph.message import add_messages
+from psycopg import Connection
+from psycopg.rows import DictRow
+from psycopg_pool import ConnectionPool
+
+from .conftest import requires_database
+
+
+class _State(TypedDict):
+    messages: Annotated[list[Any], add_messages]
+
+
+def _reply(state: _State) -> dict[str, Any]:
+    return {"messages": [AIMessage(content=f"Reply {len(state['messages'])}")]}
+
+
+class _FakeCursor:
+    """Cursor that records statements and answers them from a _FakeDatabase."""
+
+    def __init__(self, db: "_FakeDatabase") -> None:
+        self.db = db
+        self.rows: list[dict[str, Any]] = []
+        self.rowcount = 0
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self.db.executed.append((sql, params))
+        self.rows, self.rowcount = self.db.respond(sql, params)
+
+    def fetchone(self) -> dict[str, Any] | None:
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self) -> list[dict[str, Any]]:
+        return self.rows
+
+
+class _FakeDatabase:
+    """Thread lists for the pruner's selects; deletes remove the threads."""
+
+    def __init__(self) -> None:
+        self.locked = True
+        self.inactive: list[str] = []
+        self.orphans: list[str] = []
+        # One entry per (thread, namespace) with more than keep_latest checkpoints
+        self.compactable: list[str] = []
+        self.executed: list[tuple[str, Any]] = []
+
+    def connection(self) -> Any:
+        conn = SimpleNamespace(
+            transaction=nullcontext, cursor=lambda: _FakeCursor(self)
+        )
+        return nullcontext(conn)
+
+    def respond(self, sql: str, params: Any) -> tuple[list[dict[str, Any]], int]:
+        if "pg_try_advisory_xact_lock" in sql:
+            return [{"locked": self.locked}], 1
+        if sql == checkpoint_pruner._INACTIVE_THREADS_SQL:
+            threads = self.inactive[: params["limit"]]
+            return [{"conversation_thread_id": t} for t in threads], len(threads)
+        if sql == checkpoint_pruner._ORPHAN_THREADS_SQL:
+            threads = self.orphans[: params["limit"]]
+            return [{"thread_id": t} for t in threads], len(threads)
+        if sql == checkpoint_pruner._COMPACTABLE_THREADS_SQL:
+            threads = self.compactable[: params["limit"]]
+            return [{"thread_id": t} for t in threads], len(threads)
+        if sql == checkpoint_pruner._DELETE_THREAD_SQL["checkpoints"]:
+            deleted = set(params["threads"])
+            self.inactive = [t for t in self.inactive if t not in deleted]
+            self.orphans = [t for t in self.orphans if t not in deleted]
+        if sql == checkpoint_pruner._COMPACT_CHECKPOINTS_SQL:
+            compacted = set(params["threads"])
+            self.compactable = [t for t in self.compactable if t not in compacted]
+        # Every delete reports two rows per thread
+        return [], 2 * len(params["threads"])
+
+    def statements(self, sql: str) -> list[Any]:
+        return [params for executed, params in self.executed if executed == sql]
+
+
+class TestCheckpointPrunerBatches:
+    """Test cases for CheckpointPruner thread selection and batching."""
+
+    @pytest.fixture(autouse=True)
+    def _setup(self) -> Iterator[None]:
+        self.db = _FakeDatabase()
+        self.forget = MagicMock()
+        with (
+            patch.object(
+                checkpoint_pruner,
+                "get_database_manager",
+                lambda: SimpleNamespace(get_sync_pool=lambda: self.db),
+            ),
+            patch.object(checkpoint_pruner, "forget_checkpoint_threads", self.forget),
+        ):
+            yield
+
+    def _prune(self, **kwargs: Any) -> checkpoint_pruner.PruneResult:
+        return CheckpointPruner(batch_size=2, **kwargs).run()
+
+    def test_inactive_threads_deleted_in_batches(self) -> None:
+        """Test inactive threads are deleted batch by batch until a short batch."""
+        self.db.inactive = ["thread-1", "thread-2", "thread-3"]
+
+        result = self._prune(orphan_ttl_hours=0)
+
+        deletes = self.db.statements(
+            checkpoint_pruner._DELETE_THREAD_SQL["checkpoints"]
+        )
+        assert [params["threads"] for params in deletes] == [
+            ["thread-1", "thread-2"],
+            ["thread-3"],
+        ]
+        assert result.threads_deleted == 3
+        assert result.checkpoints_deleted == result.writes_deleted == 6
+        assert result.blobs_deleted == 6
+        assert result.batches == 2
+        assert not result.skipped
+
+    def test_deleted_threads_forgotten_after_each_batch(self) -> None:
+        """Test the checkpointer is told about each committed delete batch."""
+        self.db.inactive = ["thread-1", "thread-2", "thread-3"]
+
+        self._prune(orphan_ttl_hours=0)
+
+        assert [call.args[0] for call in self.forget.call_args_list] == [
+            ["thread-1", "thread-2"],
+            ["thread-3"],
+        ]
+
+    def test_orphan_threads_use_ttl(self) -> None:
+        """Test orphaned threads are selected by the TTL and deleted."""
+        self.db.orphans = ["orphan-1"]
+
+        result = self._prune(orphan_ttl_hours=2)
+
+        (params,) = self.db.statements(checkpoint_pruner._ORPHAN_THREADS_SQL)
+        assert params == {"idle_seconds": 7200, "limit": 2}
+        assert result.threads_deleted == 1
+        self.forget.assert_called_once_with(["orphan-1"])
+
+    def test_orphan_pruning_disabled(self) -> None:
+        """Test a zero orphan TTL skips the orphan select."""
+        self._prune(orphan_ttl_hours=0)
+
+        assert not self.db.statements(checkpoint_pruner._ORPHAN_THREADS_SQL)
+
+    def test_compactable_threads_deduplicated(self) -> None:
+        """Test a thread with several compactable namespaces is compacted once."""
+        self.db.compactable = ["thread-1", "thread-1"]
+
+        result = self._prune(keep_latest=4, idle_seconds=30, orphan_ttl_hours=0)
+
+        (select,) = self.db.statements(checkpoint_pruner._COMPACTABLE_THREADS_SQL)
+        assert select == {"keep": 4, "idle_seconds": 30, "limit": 2}
+        compactions = self.db.statements(checkpoint_pruner._COMPACT_CHECKPOINTS_SQL)
+        assert compactions == [{"threads": ["thread-1"], "keep": 4}]
+        assert result.threads_compacted == 1
+        # Compaction keeps the thread, so the cached message keys stay valid
+        self.forget.assert_not_called()
+
+    def test_compaction_deletes_checkpoints_then_writes_then_blobs(self) -> None:
+        """Test compaction removes old checkpoints before what they referenced."""
+        self.db.compactable = ["thread-1"]
+
+        self._prune(orphan_ttl_hours=0)
+
+        compaction = [
+            sql for sql, _ in self.db.executed if sql.lstrip().startswith("DELETE")
+        ]
+        assert compaction == [
+            checkpoint_pruner._COMPACT_CHECKPOINTS_SQL,
+            checkpoint_pruner._COMPACT_WRITES_SQL,
+            checkpoint_pruner._COMPACT_BLOBS_SQL,
+        ]
+        assert f"b.channel <> '{MESSAGE_BLOB_CHANNEL}'" in (
+            checkpoint_pruner._COMPACT_BLOBS_SQL
+        )
+
+    def test_lock_held_elsewhere_skips_run(self) -> None:
+        """Test nothing is selected while another worker holds the prune lock."""
+        self.db.locked = False
+        self.db.inactive = ["thread-1"]
+        self.db.compactable = ["thread-2"]
+
+        result = self._prune()
+
+        assert result.skipped
+        assert result.batches == 0
+        assert len(self.db.executed) == 1
+        self.forget.assert_not_called()
+
+    def test_batches_per_run_bounded(self) -> None:
+        """Test one run stops after the maximum number of batches."""
+        self.db.inactive = [f"thread-{i}" for i in range(10)]
+
+        with patch.object(checkpoint_pruner, "_MAX_BATCHES_PER_RUN", 3):
+            result = self._prune(orphan_ttl_hours=0)
+
+        assert result.threads_deleted == 6
+        assert len(self.db.inactive) == 4
+
+
+@requires_database
+class TestCheckpointPruner:
+    """Test cases for CheckpointPruner."""
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, pool: ConnectionPool[Connection[DictRow]]) -> Iterator[None]:
+        self.pool = pool
+        with pool.connection() as conn:
+            # Just the columns the pruner reads
+            conn.execute("""
+                CREATE TABLE request_sessions (
+                    conversation_thread_id VARCHAR(255),
+                    status VARCHAR(32) NOT NULL,
+                    expires_at TIMESTAMPTZ
+                )
+                """)
+        self.saver = DeltaPostgresSaver(pool)
+        builder = StateGraph(_State)
+        builder.add_node("reply", _reply)
+        builder.add_edge(START, "reply")
+        self.app = builder.compile(checkpointer=self.saver)
+        with patch.object(
+            checkpoint_pruner,
+            "get_database_manager",
+            lambda: SimpleNamespace(get_sync_pool=lambda: pool),
+        ):
+            yield
+
+    def _send(
+        self, thread_id: str, text: str, message_id: str | None = None
+    ) -> list[Any]:
+        config: RunnableConfig = {"configurable": {"thread_id": thread_id}}
+        message = HumanMessage(content=text, id=message_id)
+        result = self.app.invoke({"messages": [message]}, config)
+        messages: list[Any] = result["messages"]
+        return messages
+
+    def _history(self, thread_id: str) -> list[str]:
+        state = self.app.get_state({"configurable": {"thread_id": thread_id}})
+        return [message.content for message in state.values["messages"]]
+
+    def _count(self, sql: str, *params: Any) -> int:
+        with self.pool.connection() as conn:
+            row: Any = conn.execute(sql, params).fetchone()
+            return int(row["count"])
+
+    def _checkpoints(self, thread_id: str) -> int:
+        return self._count(
+            "SELECT count(*) FROM checkpoints WHERE thread_id = %s", thread_id
+        )
+
+    def _message_blobs(self, thread_id: str) -> int:
+        return self._count(
+            "SELECT count(*) FROM checkpoint_blobs WHERE thread_id = %s AND channel = %s",
+            thread_id,
+            MESSAGE_BLOB_CHANNEL,
+        )
+
+    def _prune(self, keep_latest: int = 2) -> checkpoint_pruner.PruneResult:
+        pruner = CheckpointPruner(
+            keep_latest=keep_latest, idle_seconds=0, orphan_ttl_hours=0
+        )
+        return pruner.run()
+
+    def test_compaction_keeps_latest_checkpoints(self) -> None:
+        """Test idle threads are compacted to the latest checkpoints."""
+        for i in range(4):
+            self._send("thread-long", f"Message {i}")
+        self._send("thread-short", "Hello")
+        history = self._history("thread-long")
+        short_checkpoints = self._checkpoints("thread-short")
+        assert self._checkpoints("thread-long") > short_checkpoints > 0
+
+        result = self._prune(keep_latest=short_checkpoints)
+
+        assert not result.skipped
+        assert result.threads_compacted == 1
+        assert result.checkpoints_deleted > 0
+        assert self._checkpoints("thread-long") == short_checkpoints
+        assert self._checkpoints("thread-short") == short_checkpoints
+        assert self._history("thread-long") == history
+
+        # Nothing left that only deleted checkpoints referenced
+        assert self._count("""
+                SELECT count(*) FROM checkpoint_writes w
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = w.thread_id
+                      AND c.checkpoint_ns = w.checkpoint_ns
+                      AND c.checkpoint_id = w.checkpoint_id
+                )
+                """) == 0
+        assert (
+            self._count(
+                """
+                SELECT count(*) FROM checkpoint_blobs b
+                WHERE b.channel <> %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM checkpoints c
+                      WHERE c.thread_id = b.thread_id
+                        AND c.checkpoint_ns = b.checkpoint_ns
+                        AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+                  )
+                """,
+                MESSAGE_BLOB_CHANNEL,
+            )
+            == 0
+        )
+
+    def test_compaction_keeps_message_blobs(self) -> None:
+        """Test compaction never deletes the shared per-message blobs."""
+        for i in range(4):
+            self._send("thread-1", f"Message {i}")
+        message_blobs = self._message_blobs("thread-1")
+        assert message_blobs == 8
+
+        result = self._prune(keep_latest=1)
+
+        assert result.threads_compacted == 1
+        assert self._checkpoints("thread-1") == 1
+        assert self._message_blobs("thread-1") == message_blobs
+        assert self._history("thread-1")[-2:] == ["Message 3", "Reply 7"]
+
+    def test_compaction_skips_threads_within_keep(self) -> None:
+        """Test threads with no more than keep_latest checkpoints are left alone."""
+        self._send("thread-1", "Hello")
+        checkpoints = self._checkpoints("thread-1")
+
+        result = self._prune(keep_latest=checkpoints)
+
+        assert result.threads_compacted == 0
+        assert self._checkpoints("thread-1") == checkpoints
+
+    def _end_session(self, thread_id: str) -> None:
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO request_sessions VALUES (%s, 'INACTIVE', NULL)",
+                (thread_id,),
+            )
+
+    def test_deleted_thread_written_again(self) -> None:
+        """Test a thread deleted by this worker can be written and read again."""
+        self._send("thread-1", "Hello", message_id="message-1")
+        self._end_session("thread-1")
+
+        with patch.object(postgres_checkpoint, "_checkpointer", self.saver):
+            result = self._prune()
+
+        assert result.threads_deleted == 1
+        assert self._checkpoints("thread-1") == 0
+        assert not any(key[0] == "thread-1" for key in self.saver._written)
+
+        # Same message (e.g. history carried over) so its blob key repeats
+        self._send("thread-1", "Hello", message_id="message-1")
+        assert self._history("thread-1") == ["Hello", "Reply 1"]
+
+    def test_thread_deleted_by_other_worker_written_again(self) -> None:
+        """Test stale message keys cached by another worker are not trusted."""
+        self._send("thread-1", "Hello", message_id="message-1")
+        self._end_session("thread-1")
+
+        # This saver isn't the process checkpointer, so it isn't told
+        result = self._prune()
+
+        assert result.threads_deleted == 1
+        assert any(key[0] == "thread-1" for key in self.saver._written)
+
+        # Same message (e.g. history carried over) so its blob key repeats
+        self._send("thread-1", "Hello", message_id="message-1")
+        assert self._history("thread-1") == ["Hello", "Reply 1"]
+        assert self._message_blobs("thread-1") == 2
@@ -0,0 +1,232 @@
+"""Tests for compiling lg-prompt state machine configs."""
+
+from pathlib import Path
+from typing import Any, Iterator
+from unittest.mock import patch
+
+import pytest
+import yaml
+from agent_service.langgraph import config_compiler
+from agent_service.langgraph.config_compiler import (
+    DEFAULT_EMPTY_RESPONSE_RETRY_COUNT,
+    StateMachineConfigError,
+    compile_state_machine_config,
+    prompt_rules,
+)
+from agent_service.langgraph.phrase_matcher import get_phrase_matcher
+
+LG_PROMPTS_DIR = Path(__file__).parents[1] / "config" / "lg-prompts"
+
+STATE_MACHINE_CONFIGS = sorted(
+    path for path in LG_PROMPTS_DIR.glob("*.yaml") if path.name != "routing-rules.yaml"
+)
+
+
+def _config(**overrides: Any) -> dict[str, Any]:
+    config: dict[str, Any] = {
+        "settings": {"initial_state": "ask", "terminal_state": "end"},
+        "states": {
+            "ask": {
+                "type": "llm_processor",
+                "prompt": "Hello {user_name}",
+                "response_analysis": {
+                    "conditions": [
+                        {
+                            "trigger_phrases": ["yes", "confirm"],
+                            "actions": [{"type": "transition", "target": "end"}],
+                        }
+                    ],
+                    "default_transition": "ask",
+                },
+                "transitions": {"done": "end"},
+            },
+            "end": {"type": "terminal"},
+        },
+    }
+    config.update(overrides)
+    return config
+
+
+class TestCompileStateMachineConfig:
+    """Test cases for compile_state_machine_config."""
+
+    @pytest.fixture(autouse=True)
+    def _compiled_configs(self, tmp_path: Path) -> Iterator[None]:
+        self.tmp_path = tmp_path
+        with patch.dict(config_compiler._compiled_configs, clear=True):
+            yield
+
+    def _write(self, config: Any, name: str = "config.yaml") -> Path:
+        path = self.tmp_path / name
+        path.write_text(yaml.safe_dump(config))
+        return path
+
+    @pytest.mark.parametrize(
+        "config_path", STATE_MACHINE_CONFIGS, ids=lambda path: path.name
+    )
+    def test_shipped_configs_valid(self, config_path: Path) -> None:
+        """Test every lg-prompt config in the repo compiles."""
+        compiled = compile_state_machine_config(config_path)
+
+        assert compiled.initial_state in compiled.states
+        assert compiled.is_terminal_state(compiled.terminal_state)
+
+    def test_compiled(self) -> None:
+        """Test states, settings and precompiled matchers of a config."""
+        compiled = compile_state_machine_config(self._write(_config()))
+
+        assert list(compiled.states) == ["ask", "end"]
+        ask = compiled.states["ask"]
+        assert ask.transitions == {"done": "end"}
+        assert ask.default_prompt == "Hello {user_name}"
+        assert not compiled.is_waiting_state("ask")
+        assert compiled.checkpoint_durability == "async"
+        assert compiled.empty_response_retry_count == (
+            DEFAULT_EMPTY_RESPONSE_RETRY_COUNT
+        )
+        assert "Hello {user_name}" in compiled.text_templates
+        assert compiled.phrase_matchers[("yes", "confirm")] is get_phrase_matcher(
+            ("yes", "confirm")
+        )
+
+    def test_memoized_by_contents(self) -> None:
+        """Test files with the same contents share one compiled config."""
+        first = compile_state_machine_config(self._write(_config(), "a.yaml"))
+
+        assert compile_state_machine_config(self._write(_config(), "b.yaml")) is first
+
+    def test_edited_file_compiled_anew(self) -> None:
+        """Test a changed file is compiled again."""
+        path = self._write(_config())
+        first = compile_state_machine_config(path)
+
+        config = _config()
+        config["states"]["ask"]["prompt"] = "Hi again"
+        path.write_text(yaml.safe_dump(config))
+        compiled = compile_state_machine_config(path)
+
+        assert compiled is not first
+        assert compiled.states["ask"].default_prompt == "Hi again"
+
+    def test_all_errors_reported(self) -> None:
+        """Test every problem in a config is reported at once."""
+        config = _config()
+        config["settings"]["initial_state"] = "missing_start"
+        config["states"]["ask"]["type"] = "unknown_type"
+        config["states"]["ask"]["transitions"]["retry"] = "missing_state"
+        config["states"]["ask"]["extract_data"] = {"pattern": "(unclosed"}
+
+        with pytest.raises(StateMachineConfigError) as exc_info:
+            compile_state_machine_config(self._write(config))
+
+        message = str(exc_info.value)
+        assert "settings.initial_state: unknown state 'missing_start'" in message
+        assert "states.ask.type: unknown state type 'unknown_type'" in message
+        assert "states.ask.transitions.retry: unknown state 'missing_state'" in message
+        assert "invalid pattern '(unclosed'" in message
+        assert config_compiler._compiled_configs == {}
+
+    def test_invalid_action_targets(self) -> None:
+        """Test transition targets in analysis and intent actions are checked."""
+        config = _config()
+        config["states"]["ask"]["response_analysis"]["conditions"][0]["actions"] = [
+            {"type": "transition", "target": "nowhere"}
+        ]
+        config["states"]["classify"] = {
+            "type": "intent_classifier",
+            "intent_actions": {"YES": {"next_state": "also_nowhere"}},
+        }
+
+        with pytest.raises(StateMachineConfigError) as exc_info:
+            compile_state_machine_config(self._write(config))
+
+        message = str(exc_info.value)
+        assert "unknown state 'nowhere'" in message
+        assert "states.classify.intent_actions.YES.next_state" in message
+
+    def test_phrase_list_must_be_list(self) -> None:
+        """Test a phrase list given as a string is an error."""
+        config = _config()
+        config["states"]["ask"]["response_analysis"]["conditions"][0][
+            "trigger_phrases"
+        ] = "yes"
+
+        with pytest.raises(StateMachineConfigError, match="trigger_phrases"):
+            compile_state_machine_config(self._write(config))
+
+    @pytest.mark.parametrize(
+        "settings, durability, retry_count",
+        [
+            ({"checkpoint_durability": "exit"}, "exit", 3),
+            ({"checkpoint_durability": "STEP"}, "async", 3),
+            ({"checkpoint_durability": "sometimes"}, "async", 3),
+            ({"empty_response_retry_count": "5"}, "async", 5),
+        ],
+    )
+    def test_settings(
+        self, settings: dict[str, Any], durability: str, retry_count: int
+    ) -> None:
+        """Test checkpoint durability and retry count settings."""
+        config = _config()
+        config["settings"].update(settings)
+
+        compiled = compile_state_machine_config(self._write(config))
+
+        assert compiled.checkpoint_durability == durability
+        assert compiled.empty_response_retry_count == retry_count
+
+    def test_invalid_retry_count(self) -> None:
+        """Test a retry count that isn't an integer is an error."""
+        config = _config()
+        config["settings"]["empty_response_retry_count"] = "often"
+
+        with pytest.raises(StateMachineConfigError, match="empty_response_retry"):
+            compile_state_machine_config(self._write(config))
+
+    def test_no_states(self) -> None:
+        """Test a config without states is an error."""
+        with pytest.raises(StateMachineConfigError, match="no states defined"):
+            compile_state_machine_config(self._write({"settings": {}}))
+
+    def test_unreadable_file(self) -> None:
+        """Test a missing file raises StateMachineConfigError."""
+        with pytest.raises(StateMachineConfigError, match="Failed to load"):
+            compile_state_machine_config(self.tmp_path / "missing.yaml")
+
+    def test_invalid_yaml(self) -> None:
+        """Test a file that isn't valid YAML raises StateMachineConfigError."""
+        path = self.tmp_path / "config.yaml"
+        path.write_text("states: [unclosed\n")
+
+        with pytest.raises(StateMachineConfigError, match="Failed to load"):
+            compile_state_machine_config(path)
+
+
+class TestPromptRules:
+    """Test cases for prompt_rules."""
+
+    def test_plain_prompt(self) -> None:
+        """Test a state without conditional prompts uses its prompt."""
+        assert prompt_rules({"prompt": "Hello"}) == ((), "Hello")
+
+    def test_conditional_prompts(self) -> None:
+        """Test conditions keep their order and "default" is the fallback."""
+        first = {"condition": "has_name", "prompt": "Hi {name}"}
+        second = {"condition": "has_id", "prompt": "Hi {id}"}
+        state_config = {
+            "prompt": "Unused",
+            "conditional_prompts": [
+                first,
+                {"condition": "default", "prompt": "Hello"},
+                second,
+            ],
+        }
+
+        assert prompt_rules(state_config) == ((first, second), "Hello")
+
+    def test_conditional_prompts_without_default(self) -> None:
+        """Test the state's prompt is the fallback when there's no default."""
+        condition = {"condition": "has_name", "prompt": "Hi {name}"}
+        state_config = {"prompt": "Hello", "conditional_prompts": [condition]}
+
+        assert prompt_rules(state_config) == ((condition,), "Hello")
@@ -0,0 +1,329 @@
+"""Tests for LlamaStack call resilience (circuit breaker, hedging, deadlines)."""
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Iterator
+from unittest.mock import patch
+
+import pytest
+from agent_service.langgraph import llm_resilience, responses_agent
+from agent_service.langgraph.llm_resilience import (
+    CircuitBreaker,
+    HedgeStats,
+    backoff_delay,
+    is_endpoint_failure,
+)
+from agent_service.langgraph.responses_agent import (
+    RESPONSE_UNAVAILABLE_MESSAGE,
+    Agent,
+)
+
+ENDPOINT = "http://resilience-test"
+
+
+class _Clock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _FakeCalls:
+    """Fake create_response: each call sleeps, then returns or raises."""
+
+    def __init__(self, *outcomes: tuple[float, Any]) -> None:
+        self.outcomes = list(outcomes)
+        self.timeouts: list[float | None] = []
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, messages: list[Any], request_timeout: float | None = None, **kwargs: Any
+    ) -> str:
+        with self._lock:
+            self.timeouts.append(request_timeout)
+            delay, outcome = self.outcomes.pop(0)
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return str(outcome)
+
+
+def _agent() -> Agent:
+    # Only what the retry and hedging code needs; create_response is faked
+    agent = Agent.__new__(Agent)
+    agent.agent_name = "test-agent"
+    agent.model = "test-model"
+    agent.llama_client = SimpleNamespace(base_url=ENDPOINT)
+    return agent
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+
+    @pytest.fixture(autouse=True)
+    def _clock(self) -> Iterator[None]:
+        self.clock = _Clock()
+        with patch.object(
+            llm_resilience, "time", SimpleNamespace(monotonic=self.clock)
+        ):
+            yield
+
+    def _open(self, breaker: CircuitBreaker) -> None:
+        for _ in range(breaker.failure_threshold):
+            assert breaker.allow_request()
+            breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        """Test the circuit opens only after the threshold of failures in a row."""
+        breaker = CircuitBreaker(ENDPOINT, failure_threshold=3, reset_seconds=30)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.get_stats()["state"] == "closed"
+
+        breaker.record_failure()
+        assert breaker.get_stats()["state"] == "open"
+        assert not breaker.allow_request()
+        assert breaker.get_stats()["rejected"] == 1
+
+    def test_open_half_open_closed(self) -> None:
+        """Test one probe is let through after the reset time and closes the circuit."""
+        breaker = CircuitBreaker(ENDPOINT, failure_threshold=2, reset_seconds=30)
+        self._open(breaker)
+
+        self.clock.now += 29
+        assert not breaker.allow_request()
+
+        self.clock.now += 1
+        assert breaker.allow_request()
+        assert breaker.get_stats()["state"] == "half_open"
+        # Only one probe at a time
+        assert not breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.get_stats() == {
+            "state": "closed",
+            "consecutive_failures": 0,
+            "times_opened": 1,
+            "rejected": 2,
+        }
+        assert breaker.allow_request()
+
+    def test_failed_probe_reopens(self) -> None:
+        """Test a failing probe re-opens the circuit for another reset period."""
+        breaker = CircuitBreaker(ENDPOINT, failure_threshold=2, reset_seconds=30)
+        self._open(breaker)
+        self.clock.now += 30
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.get_stats()["state"] == "open"
+        assert breaker.get_stats()["times_opened"] == 2
+        self.clock.now += 29
+        assert not breaker.allow_request()
+        self.clock.now += 1
+        assert breaker.allow_request()
+
+    def test_release_probe_by_owner_only(self) -> None:
+        """Test only the thread that took the probe can hand it back."""
+        breaker = CircuitBreaker(ENDPOINT, failure_threshold=1, reset_seconds=30)
+        self._open(breaker)
+        self.clock.now += 30
+        assert breaker.allow_request()
+
+        other = threading.Thread(target=breaker.release_probe)
+        other.start()
+        other.join()
+        assert breaker.get_stats()["state"] == "half_open"
+        assert not breaker.allow_request()
+
+        breaker.release_probe()
+        assert breaker.get_stats()["state"] == "open"
+        assert breaker.allow_request()
+
+    def test_release_without_probe_is_noop(self) -> None:
+        """Test releasing when no probe is in flight changes nothing."""
+        breaker = CircuitBreaker(ENDPOINT, failure_threshold=1, reset_seconds=30)
+        breaker.release_probe()
+        self._open(breaker)
+
+        breaker.release_probe()
+
+        assert breaker.get_stats()["state"] == "open"
+        assert not breaker.allow_request()
+
+    def test_disabled(self) -> None:
+        """Test a zero threshold never opens the circuit."""
+        breaker = CircuitBreaker(ENDPOINT, failure_threshold=0)
+
+        for _ in range(10):
+            breaker.record_failure()
+
+        assert breaker.allow_request()
+        assert breaker.get_stats()["state"] == "closed"
+
+
+class TestRetryHelpers:
+    """Test cases for backoff and failure classification."""
+
+    @pytest.mark.parametrize("attempt, ceiling", [(0, 1), (1, 2), (2, 4), (5, 8)])
+    def test_backoff_within_ceiling(self, attempt: int, ceiling: float) -> None:
+        """Test backoff is jittered up to the capped exponential ceiling."""
+        delays = [backoff_delay(attempt) for _ in range(50)]
+
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+    @pytest.mark.parametrize(
+        "error, failure",
+        [
+            (TimeoutError(), True),
+            (ConnectionError(), True),
+            (SimpleNamespace(status_code=503), True),
+            (SimpleNamespace(status_code=429), True),
+            (SimpleNamespace(status_code=400), False),
+            (ValueError("bad input"), False),
+            (RuntimeError("Read timeout"), True),
+        ],
+    )
+    def test_endpoint_failure(self, error: Any, failure: bool) -> None:
+        """Test only errors meaning the endpoint is unhealthy count as failures."""
+        assert is_endpoint_failure(error) is failure
+
+
+class TestHedgedResponses:
+    """Test cases for Agent._create_response_hedged."""
+
+    @pytest.fixture(autouse=True)
+    def _stats(self) -> Iterator[None]:
+        self.agent = _agent()
+        self.stats = HedgeStats()
+        with patch.object(responses_agent, "get_hedge_stats", return_value=self.stats):
+            yield
+
+    def _hedged(
+        self, calls: _FakeCalls, remaining: float | None = None, after_ms: float = 50
+    ) -> str:
+        with patch.object(self.agent, "create_response", calls):
+            return self.agent._create_response_hedged(
+                [{"role": "user", "content": "Hello"}],
+                {"current_state_name": "classify"},
+                remaining,
+                after_ms,
+            )
+
+    def test_fast_primary_not_hedged(self) -> None:
+        """Test no second request is sent when the first beats the hedge delay."""
+        calls = _FakeCalls((0, "primary"), (0, "hedge"))
+
+        assert self._hedged(calls) == "primary"
+        assert len(calls.timeouts) == 1
+        assert self.stats.get_stats() == {"calls": 1, "hedged": 0, "hedge_wins": 0}
+
+    def test_hedge_wins(self) -> None:
+        """Test the hedged request's response is used when it finishes first."""
+        calls = _FakeCalls((0.5, "primary"), (0, "hedge"))
+
+        assert self._hedged(calls) == "hedge"
+        assert self.stats.get_stats() == {"calls": 1, "hedged": 1, "hedge_wins": 1}
+
+    def test_hedge_loses(self) -> None:
+        """Test a slow primary still wins when the hedge is slower."""
+        calls = _FakeCalls((0.1, "primary"), (0.5, "hedge"))
+
+        assert self._hedged(calls) == "primary"
+        assert self.stats.get_stats() == {"calls": 1, "hedged": 1, "hedge_wins": 0}
+
+    def test_failed_request_waits_for_other(self) -> None:
+        """Test an error from one request falls back to the other's response."""
+        calls = _FakeCalls((0.1, ConnectionError("reset")), (0.2, "hedge"))
+
+        assert self._hedged(calls) == "hedge"
+
+    def test_both_fail(self) -> None:
+        """Test the error is raised when both requests fail."""
+        calls = _FakeCalls(
+            (0.1, ConnectionError("primary")), (0, ConnectionError("hedge"))
+        )
+
+        with pytest.raises(ConnectionError):
+            self._hedged(calls)
+
+    def test_deadline_expires(self) -> None:
+        """Test hedging gives up when the remaining budget runs out."""
+        calls = _FakeCalls((0.5, "primary"), (0.5, "hedge"))
+
+        start = time.monotonic()
+        assert self._hedged(calls, remaining=0.2) == ""
+        assert time.monotonic() - start < 0.4
+        assert calls.timeouts == [0.2, 0.2]
+
+    def test_no_time_to_hedge(self) -> None:
+        """Test a single request is sent when the hedge delay exceeds the budget."""
+        calls = _FakeCalls((0, "primary"))
+
+        assert self._hedged(calls, remaining=0.04, after_ms=50) == "primary"
+        assert len(calls.timeouts) == 1
+        assert self.stats.get_stats()["calls"] == 0
+
+
+class TestRetryDeadlineAndCircuit:
+    """Test cases for deadlines and the circuit breaker in create_response_with_retry."""
+
+    @pytest.fixture(autouse=True)
+    def _breaker(self) -> Iterator[None]:
+        self.agent = _agent()
+        self.clock = _Clock()
+        self.breaker = CircuitBreaker(ENDPOINT, failure_threshold=1, reset_seconds=30)
+        with (
+            patch.dict(llm_resilience._circuit_breakers, {ENDPOINT: self.breaker}),
+            patch.object(llm_resilience, "time", SimpleNamespace(monotonic=self.clock)),
+            patch.object(responses_agent, "backoff_delay", return_value=0),
+        ):
+            yield
+
+    def _retry(self, calls: _FakeCalls, **kwargs: Any) -> str:
+        with patch.object(self.agent, "create_response", calls):
+            return self.agent.create_response_with_retry(
+                [{"role": "user", "content": "Hello"}], max_retries=2, **kwargs
+            )
+
+    def test_open_circuit_fails_fast(self) -> None:
+        """Test no call is made while the circuit is open."""
+        self.breaker.record_failure()
+        calls = _FakeCalls()
+
+        assert self._retry(calls) == RESPONSE_UNAVAILABLE_MESSAGE
+        assert calls.timeouts == []
+
+    def test_probe_without_outcome_released(self) -> None:
+        """Test a probe call that never reached the endpoint is handed back."""
+        self.breaker.record_failure()
+        self.clock.now += 30
+        # The faked create_response records no outcome, like a call blocked
+        # by an input shield
+        calls = _FakeCalls((0, "Blocked by shield"))
+
+        assert self._retry(calls) == "Blocked by shield"
+        assert self.breaker.get_stats()["state"] == "open"
+        assert self.breaker.allow_request()
+
+    def test_deadline_bounds_call_timeouts(self) -> None:
+        """Test each attempt gets the remaining budget and retries stop at the deadline."""
+        calls = _FakeCalls((0.05, ""), (0.05, ""), (0.05, ""))
+
+        response = self._retry(calls, deadline_seconds=0.08)
+
+        assert response == RESPONSE_UNAVAILABLE_MESSAGE
+        assert len(calls.timeouts) == 2
+        first, second = calls.timeouts
+        assert first is not None and second is not None
+        assert 0 < second < first <= 0.08
@@ -0,0 +1,97 @@
+"""Tests for precompiled phrase and pattern matching."""
+
+import re
+
+import pytest
+from agent_service.langgraph.phrase_matcher import (
+    PhraseMatcher,
+    get_pattern,
+    get_phrase_matcher,
+)
+
+
+class TestPhraseMatcher:
+    """Test cases for PhraseMatcher."""
+
+    @pytest.mark.parametrize(
+        "text, matches",
+        [
+            ("please submit the request", True),
+            ("i will cancel it", True),
+            ("nothing relevant here", False),
+            ("", False),
+        ],
+    )
+    def test_substring_match(self, text: str, matches: bool) -> None:
+        """Test any phrase occurring anywhere in the text matches."""
+        matcher = PhraseMatcher(["submit", "cancel"])
+
+        assert matcher.search(text) is matches
+
+    def test_phrases_lower_cased(self) -> None:
+        """Test phrases are compared lower-cased against the lower-cased text."""
+        matcher = PhraseMatcher(["Laptop Refresh", "YES"])
+
+        assert matcher.search("i want a laptop refresh")
+        assert matcher.search("yes please")
+        # The text is expected to be lower-cased by the caller
+        assert not matcher.search("YES PLEASE")
+
+    def test_overlapping_phrases(self) -> None:
+        """Test a phrase contained in a longer one doesn't shadow it."""
+        matcher = PhraseMatcher(["not", "not sure"])
+
+        assert matcher.search("i am not sure")
+        assert matcher.search("that is not it")
+
+    def test_metacharacters_escaped(self) -> None:
+        """Test regex metacharacters in phrases match literally."""
+        matcher = PhraseMatcher(["(y/n)", "a.b", "$5?"])
+
+        assert matcher.search("answer (y/n)")
+        assert matcher.search("costs $5?")
+        assert not matcher.search("axb")
+
+    def test_empty_phrase_matches_everything(self) -> None:
+        """Test an empty phrase matches any text, like a substring test."""
+        matcher = PhraseMatcher(["never", ""])
+
+        assert matcher.search("anything")
+        assert matcher.search("")
+
+    def test_no_phrases_match_nothing(self) -> None:
+        """Test an empty phrase list never matches."""
+        matcher = PhraseMatcher([])
+
+        assert not matcher.search("anything")
+        assert not matcher.search("")
+
+    def test_non_string_phrases(self) -> None:
+        """Test non-string phrases from YAML are matched as their text."""
+        matcher = PhraseMatcher([42, True])
+
+        assert matcher.search("order 42")
+        assert matcher.search("true")
+
+
+class TestMatcherCaches:
+    """Test cases for get_phrase_matcher and get_pattern."""
+
+    def test_phrase_matcher_shared_by_phrases(self) -> None:
+        """Test equal phrase tuples share one compiled matcher."""
+        first = get_phrase_matcher(("yes", "confirm"))
+
+        assert get_phrase_matcher(("yes", "confirm")) is first
+        assert get_phrase_matcher(("confirm", "yes")) is not first
+
+    def test_pattern_cached(self) -> None:
+        """Test patterns are compiled once."""
+        pattern = get_pattern(r"\d{4}")
+
+        assert get_pattern(r"\d{4}") is pattern
+        assert pattern.search("code 1234")
+
+    def test_invalid_pattern_raises(self) -> None:
+        """Test an invalid pattern raises re.error."""
+        with pytest.raises(re.error):
+            get_pattern("(unclosed")
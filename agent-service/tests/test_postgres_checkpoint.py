@@ -0,0 +1,107 @@
+"""Tests for the delta checkpoint saver."""
+
+from typing import Annotated, Any, TypedDict
+
+import pytest
+from agent_service.langgraph.checkpoint_serde import (
+    MESSAGE_REFS_TYPE,
+    MESSAGES_CHANNEL,
+)
+from agent_service.langgraph.postgres_checkpoint import DeltaPostgresSaver
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import START, StateGraph
+from langgraph.graph.message import add_messages
+from psycopg import Connection
+from psycopg.rows import DictRow
+from psycopg_pool import ConnectionPool
+
+from .conftest import requires_database
+
+
+class _State(TypedDict):
+    messages: Annotated[list[Any], add_messages]
+
+
+def _reply_with_state(state: _State) -> _State:
+    # Like the state machine nodes: append to the state and return all of it
+    state["messages"].append(AIMessage(content=f"Reply {len(state['messages'])}"))
+    return state
+
+
+@requires_database
+class TestDeltaPostgresSaver:
+    """Test cases for DeltaPostgresSaver."""
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, pool: ConnectionPool[Connection[DictRow]]) -> None:
+        self.pool = pool
+        self.saver = DeltaPostgresSaver(pool)
+        builder = StateGraph(_State)
+        builder.add_node("reply", _reply_with_state)
+        builder.add_edge(START, "reply")
+        self.app = builder.compile(checkpointer=self.saver)
+        self.config: RunnableConfig = {"configurable": {"thread_id": "thread-1"}}
+
+    def _send(self, text: str) -> None:
+        self.app.invoke({"messages": [HumanMessage(content=text)]}, self.config)
+
+    def _history(self) -> list[str]:
+        state = self.app.get_state(self.config)
+        return [message.content for message in state.values["messages"]]
+
+    def _message_write_types(self) -> list[str]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT type FROM checkpoint_writes WHERE channel = %s",
+                (MESSAGES_CHANNEL,),
+            ).fetchall()
+        return [row["type"] for row in rows]
+
+    def test_history_round_trip(self) -> None:
+        """Test history written as message keys reads back as messages."""
+        for i in range(3):
+            self._send(f"Message {i}")
+
+        assert self._history() == [
+            "Message 0",
+            "Reply 1",
+            "Message 1",
+            "Reply 3",
+            "Message 2",
+            "Reply 5",
+        ]
+
+    def test_full_state_writes_stored_as_keys(self) -> None:
+        """Test writes repeating stored messages don't re-serialize them."""
+        self._send("Message 0")
+        self._send("Message 1")
+
+        types = self._message_write_types()
+        assert MESSAGE_REFS_TYPE in types
+        # The input write of only a new message stays inline
+        assert any(type_ != MESSAGE_REFS_TYPE for type_ in types)
+
+    def test_pending_writes_resolved(self) -> None:
+        """Test pending writes stored as message keys are resolved on read."""
+        self._send("Message 0")
+        checkpoint_config = self.app.get_state(self.config).config
+        messages = self.app.get_state(self.config).values["messages"]
+
+        self.saver.put_writes(
+            checkpoint_config,
+            [(MESSAGES_CHANNEL, [*messages, AIMessage(content="Pending")])],
+            "task-1",
+        )
+        checkpoint_tuple = self.saver.get_tuple(checkpoint_config)
+
+        assert checkpoint_tuple is not None
+        assert checkpoint_tuple.pending_writes
+        task_id, channel, value = checkpoint_tuple.pending_writes[0]
+        assert (task_id, channel) == ("task-1", MESSAGES_CHANNEL)
+        assert [message.content for message in value] == [
+            "Message 0",
+            "Reply 1",
+            "Pending",
+        ]
+        assert self._message_write_types()[-1] == MESSAGE_REFS_TYPE
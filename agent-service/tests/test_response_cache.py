@@ -0,0 +1,263 @@
+"""Tests for the LLM response cache."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Iterator, Optional
+from unittest.mock import MagicMock, patch
+
+import pytest
+from agent_service.langgraph import response_cache
+from agent_service.langgraph.response_cache import (
+    DEFAULT_HISTORY_MESSAGES,
+    ResponseCache,
+    ResponseCacheConfig,
+    get_response_cache_config,
+    make_response_cache_key,
+)
+
+
+class _Clock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _FakePool:
+    """Sync connection pool recording the statements executed on it."""
+
+    def __init__(self) -> None:
+        self.rows: dict[str, str] = {}
+        self.statements: list[tuple[str, Optional[dict[str, Any]]]] = []
+        self.error: Optional[Exception] = None
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        if self.error is not None:
+            raise self.error
+        yield SimpleNamespace(execute=self._execute)
+
+    def _execute(self, sql: str, params: Optional[dict[str, Any]] = None) -> Any:
+        self.statements.append((sql, params))
+        row = None
+        if sql == response_cache._SELECT_SQL and params is not None:
+            response = self.rows.get(params["cache_key"])
+            row = {"response": response} if response is not None else None
+        return SimpleNamespace(fetchone=lambda: row)
+
+    def executed(self, sql: str) -> int:
+        return sum(1 for statement, _ in self.statements if statement == sql)
+
+
+def _key(prompt: str = "Classify: yes", **overrides: Any) -> str:
+    args: dict[str, Any] = {
+        "model": "test-model",
+        "system_prompt": "You are a classifier",
+        "prompt": prompt,
+        "history": [{"role": "user", "content": "yes"}],
+        "temperature": 0.1,
+        "tool_settings": {},
+    }
+    args.update(overrides)
+    return make_response_cache_key(**args)
+
+
+class TestResponseCacheConfig:
+    """Test cases for reading a state's cache setting."""
+
+    @pytest.mark.parametrize("setting", [None, False, {}])
+    def test_disabled(self, setting: Any) -> None:
+        """Test states without a truthy cache setting are not cached."""
+        assert get_response_cache_config({"cache": setting}) is None
+        assert get_response_cache_config({}) is None
+
+    def test_enabled_with_defaults(self) -> None:
+        """Test `cache: true` uses the cache's default TTL."""
+        with patch.object(
+            response_cache,
+            "get_response_cache",
+            return_value=ResponseCache(default_ttl_seconds=600),
+        ):
+            config = get_response_cache_config({"cache": True})
+
+        assert config == ResponseCacheConfig(
+            ttl_seconds=600, history_messages=DEFAULT_HISTORY_MESSAGES
+        )
+
+    def test_options(self) -> None:
+        """Test a cache mapping overrides the TTL and history length."""
+        config = get_response_cache_config(
+            {"cache": {"ttl_seconds": "60", "history_messages": 0}}
+        )
+
+        assert config == ResponseCacheConfig(ttl_seconds=60, history_messages=0)
+
+
+class TestResponseCacheKey:
+    """Test cases for make_response_cache_key."""
+
+    def test_stable(self) -> None:
+        """Test equal requests get the same key regardless of dict order."""
+        first = _key(tool_settings={"tools": [], "tool_choice": "none"})
+        second = _key(tool_settings={"tool_choice": "none", "tools": []})
+
+        assert first == second
+        assert len(first) == 64
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [
+            {"model": "other-model"},
+            {"system_prompt": "You are a validator"},
+            {"prompt": "Classify: no"},
+            {"history": [{"role": "user", "content": "no"}]},
+            {"temperature": 0.2},
+            {"tool_settings": {"tool_choice": "auto"}},
+        ],
+    )
+    def test_sensitive_to_each_input(self, overrides: dict[str, Any]) -> None:
+        """Test changing any input changes the key."""
+        assert _key(**overrides) != _key()
+
+
+class TestResponseCache:
+    """Test cases for the in-memory tier of ResponseCache."""
+
+    @pytest.fixture(autouse=True)
+    def _clock(self) -> Iterator[None]:
+        self.clock = _Clock()
+        with patch.object(
+            response_cache, "time", SimpleNamespace(monotonic=self.clock)
+        ):
+            yield
+
+    def test_hit_and_miss(self) -> None:
+        """Test a stored response is returned and unknown keys miss."""
+        cache = ResponseCache()
+        cache.put("key-1", "APPROVE", model="test-model")
+
+        assert cache.get("key-1") == "APPROVE"
+        assert cache.get("key-2") is None
+        stats = cache.get_stats()
+        assert (stats["memory_hits"], stats["misses"]) == (1, 1)
+
+    def test_ttl_expiry(self) -> None:
+        """Test entries expire after their TTL."""
+        cache = ResponseCache(default_ttl_seconds=60)
+        cache.put("default-ttl", "A", model="test-model")
+        cache.put("long-ttl", "B", model="test-model", ttl_seconds=120)
+
+        self.clock.now += 59
+        assert cache.get("default-ttl") == "A"
+
+        self.clock.now += 1
+        assert cache.get("default-ttl") is None
+        assert cache.get("long-ttl") == "B"
+        assert cache.get_stats()["size"] == 1
+
+    def test_least_recently_used_evicted(self) -> None:
+        """Test the least recently read entry is evicted beyond max_entries."""
+        cache = ResponseCache(max_entries=2)
+        cache.put("key-1", "A", model="test-model")
+        cache.put("key-2", "B", model="test-model")
+        assert cache.get("key-1") == "A"
+
+        cache.put("key-3", "C", model="test-model")
+
+        assert cache.get("key-2") is None
+        assert cache.get("key-1") == "A"
+        assert cache.get("key-3") == "C"
+
+    def test_put_replaces_entry(self) -> None:
+        """Test storing a key again replaces its response."""
+        cache = ResponseCache()
+        cache.put("key-1", "A", model="test-model")
+        cache.put("key-1", "B", model="test-model")
+
+        assert cache.get("key-1") == "B"
+        assert cache.get_stats()["size"] == 1
+
+
+class TestResponseCachePostgres:
+    """Test cases for the Postgres tier of ResponseCache."""
+
+    @pytest.fixture(autouse=True)
+    def _database(self) -> Iterator[None]:
+        self.pool = _FakePool()
+        database_manager = MagicMock()
+        database_manager.get_sync_pool.return_value = self.pool
+        with patch.object(
+            response_cache, "get_database_manager", return_value=database_manager
+        ):
+            yield
+
+    def test_memory_miss_reads_postgres(self) -> None:
+        """Test a response stored by another worker is found in Postgres."""
+        self.pool.rows["key-1"] = "APPROVE"
+        cache = ResponseCache(use_postgres=True)
+
+        assert cache.get("key-1") == "APPROVE"
+        # Kept in memory, so the next read doesn't query Postgres
+        assert cache.get("key-1") == "APPROVE"
+        assert self.pool.executed(response_cache._SELECT_SQL) == 1
+        stats = cache.get_stats()
+        assert (stats["postgres_hits"], stats["memory_hits"]) == (1, 1)
+
+    def test_miss_in_both_tiers(self) -> None:
+        """Test a key in neither tier is a miss."""
+        cache = ResponseCache(use_postgres=True)
+
+        assert cache.get("key-1") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_put_writes_through(self) -> None:
+        """Test a stored response is upserted with its TTL and state."""
+        cache = ResponseCache(use_postgres=True)
+
+        cache.put("key-1", "APPROVE", "test-model", "classify", ttl_seconds=60)
+
+        ((sql, params),) = self.pool.statements
+        assert sql == response_cache._UPSERT_SQL
+        assert params == {
+            "cache_key": "key-1",
+            "model": "test-model",
+            "state_name": "classify",
+            "response": "APPROVE",
+            "ttl_seconds": 60,
+        }
+
+    def test_expired_rows_deleted_periodically(self) -> None:
+        """Test expired rows are deleted once every _EXPIRE_EVERY_PUTS writes."""
+        cache = ResponseCache(use_postgres=True)
+
+        with patch.object(response_cache, "_EXPIRE_EVERY_PUTS", 3):
+            for i in range(7):
+                cache.put(f"key-{i}", "APPROVE", model="test-model")
+
+        assert self.pool.executed(response_cache._UPSERT_SQL) == 7
+        assert self.pool.executed(response_cache._EXPIRE_SQL) == 2
+
+    def test_postgres_errors_fall_back_to_memory(self) -> None:
+        """Test an unavailable database doesn't fail reads or writes."""
+        cache = ResponseCache(use_postgres=True)
+        self.pool.error = ConnectionError("database unavailable")
+
+        cache.put("key-1", "APPROVE", model="test-model")
+
+        assert cache.get("key-1") == "APPROVE"
+        assert cache.get("key-2") is None
+        stats = cache.get_stats()
+        assert stats["postgres_errors"] == 2
+        assert stats["misses"] == 1
+
+    def test_postgres_disabled(self) -> None:
+        """Test the memory-only cache never touches the database."""
+        cache = ResponseCache()
+
+        cache.put("key-1", "APPROVE", model="test-model")
+        assert cache.get("key-2") is None
+
+        assert self.pool.statements == []
@@ -0,0 +1,166 @@
+"""Tests for streamed LLM responses."""
+
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from agent_service.langgraph import responses_agent
+from agent_service.langgraph.response_streaming import ResponseStream
+from agent_service.langgraph.responses_agent import Agent
+
+
+def _agent() -> Agent:
+    # Only what create_response_with_retry needs; create_response is faked
+    agent = Agent.__new__(Agent)
+    agent.agent_name = "test-agent"
+    agent.model = "test-model"
+    agent.llama_client = SimpleNamespace(base_url="http://streaming-test")
+    return agent
+
+
+def _events(text: str) -> list[Any]:
+    deltas = [
+        SimpleNamespace(type="response.output_text.delta", delta=f"{word} ")
+        for word in text.split()
+    ]
+    completed = SimpleNamespace(
+        type="response.completed", response=SimpleNamespace(output_text=text)
+    )
+    return [*deltas, completed]
+
+
+class TestResponseStream:
+    """Test cases for ResponseStream."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.chunks: list[dict[str, Any]] = []
+        self.stream = ResponseStream(
+            self.chunks.append, interval_seconds=0, min_chars=0
+        )
+
+    def test_chunks_carry_full_text(self) -> None:
+        """Test each chunk carries the text so far and its new delta."""
+        self.stream.start()
+        self.stream.on_delta("Hello ")
+        self.stream.on_delta("world")
+
+        assert [chunk["content"] for chunk in self.chunks] == ["Hello ", "Hello world"]
+        assert self.chunks[-1]["delta"] == "world"
+        assert [chunk["sequence"] for chunk in self.chunks] == [1, 2]
+
+    def test_discard_publishes_reset(self) -> None:
+        """Test discarding published text clears it on clients right away."""
+        self.stream.start()
+        self.stream.on_delta("Partial")
+        self.stream.discard()
+
+        assert self.chunks[-1] == {
+            "sequence": 2,
+            "delta": "",
+            "content": "",
+            "reset": True,
+        }
+
+    def test_discard_without_published_text(self) -> None:
+        """Test discarding text clients never saw publishes nothing."""
+        stream = ResponseStream(self.chunks.append, interval_seconds=0, min_chars=40)
+        stream.start()
+        stream.on_delta("Short")
+        stream.discard()
+
+        assert self.chunks == []
+
+    def test_restart_resets_next_chunk(self) -> None:
+        """Test a response restarted by a later state sets reset on its first chunk."""
+        self.stream.start()
+        self.stream.on_delta("First")
+        self.stream.start()
+        self.stream.on_delta("Second")
+
+        assert self.chunks[-1]["reset"] is True
+        assert self.chunks[-1]["content"] == "Second"
+
+
+class TestStreamedRetries:
+    """Test cases for streaming across create_response_with_retry attempts."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.agent = _agent()
+        self.chunks: list[dict[str, Any]] = []
+        self.stream = ResponseStream(
+            self.chunks.append, interval_seconds=0, min_chars=0
+        )
+
+    def _retry(self, attempts: list[Any]) -> str:
+        def create_response(
+            messages: list[Any], response_stream: ResponseStream, **kwargs: Any
+        ) -> str:
+            attempt = attempts.pop(0)
+            response = self.agent._consume_response_stream(
+                _events(attempt["text"]), response_stream
+            )
+            if attempt.get("raise"):
+                raise attempt["raise"]
+            # A failed response (e.g. status "failed") comes back empty
+            return "" if attempt.get("failed") else str(response.output_text)
+
+        with (
+            patch.object(self.agent, "create_response", create_response),
+            patch.object(responses_agent, "backoff_delay", return_value=0),
+        ):
+            return self.agent.create_response_with_retry(
+                [{"role": "user", "content": "Hello"}],
+                response_stream=self.stream,
+            )
+
+    def _chunks_after_reset(self) -> list[dict[str, Any]]:
+        resets = [i for i, chunk in enumerate(self.chunks) if chunk["reset"]]
+        assert len(resets) == 1
+        return self.chunks[resets[0] :]
+
+    def test_failed_attempt_discarded_before_retry(self) -> None:
+        """Test text of a failed attempt is cleared before the retry streams."""
+        response = self._retry(
+            [
+                {"text": "Sorry the partial answer", "failed": True},
+                {"text": "Here is your answer"},
+            ]
+        )
+
+        assert response == "Here is your answer"
+        assert self.chunks[0]["content"] == "Sorry "
+        reset, *retried = self._chunks_after_reset()
+        assert reset["content"] == ""
+        assert retried[-1]["content"] == "Here is your answer "
+        assert not any("partial" in chunk["content"] for chunk in retried)
+        # Appending deltas after the reset gives the retried text only
+        assert "".join(chunk["delta"] for chunk in retried) == "Here is your answer "
+
+    def test_attempt_raising_discarded_before_retry(self) -> None:
+        """Test text of an attempt that raised is cleared before the retry streams."""
+        response = self._retry(
+            [
+                {"text": "Cut off", "raise": ConnectionError("stream broken")},
+                {"text": "Complete answer"},
+            ]
+        )
+
+        assert response == "Complete answer"
+        reset, *retried = self._chunks_after_reset()
+        assert reset["content"] == ""
+        assert [chunk["content"] for chunk in retried] == [
+            "Complete ",
+            "Complete answer ",
+        ]
+
+    @pytest.mark.parametrize("failed", [True, False])
+    def test_successful_first_attempt_not_reset(self, failed: bool) -> None:
+        """Test only a failed attempt publishes a reset."""
+        attempts = [{"text": "First try", "failed": failed}, {"text": "Second try"}]
+
+        self._retry(attempts)
+
+        assert any(chunk["reset"] for chunk in self.chunks) is failed
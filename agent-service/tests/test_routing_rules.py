@@ -0,0 +1,236 @@
+"""Tests for the rule-based routing fast path."""
+
+import os
+from pathlib import Path
+from typing import Any, Iterator
+from unittest.mock import patch
+
+import pytest
+from agent_service.langgraph import routing_rules
+from agent_service.langgraph.routing_rules import (
+    RoutingRuleStats,
+    RoutingRuleTable,
+    get_routing_rule_table,
+    normalize_routing_text,
+)
+
+AGENTS = ["laptop-refresh", "password-reset"]
+
+RULES: dict[str, Any] = {
+    "enabled": True,
+    "exclude_patterns": [r"\bdon'?t\b"],
+    "rules": [
+        {
+            "agent": "laptop-refresh",
+            "keywords": ["new laptop", "laptop", "Laptop Refresh"],
+            "patterns": ["^refresh$"],
+            "integrations": {"email": {"keywords": ["hardware request"]}},
+        },
+        {"agent": "password-reset", "keywords": ["password", "locked out"]},
+    ],
+}
+
+
+class TestRoutingRuleTable:
+    """Test cases for RoutingRuleTable."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.table = RoutingRuleTable(RULES)
+
+    @pytest.mark.parametrize(
+        "text, agent",
+        [
+            ("I need a new laptop", "laptop-refresh"),
+            ("  LAPTOP   refresh please ", "laptop-refresh"),
+            ("refresh", "laptop-refresh"),
+            ("I forgot my password.", "password-reset"),
+            ("hello", None),
+            ("", None),
+            ("   ", None),
+        ],
+    )
+    def test_match(self, text: str, agent: str | None) -> None:
+        """Test messages route to the one agent whose rules match."""
+        assert self.table.match(text, AGENTS) == agent
+
+    def test_whole_words_only(self) -> None:
+        """Test keywords don't match inside longer words."""
+        assert self.table.match("my laptops", AGENTS) is None
+        assert self.table.match("passwords", AGENTS) is None
+
+    def test_patterns_searched_case_insensitively(self) -> None:
+        """Test regex patterns see the normalized message."""
+        assert self.table.match("Refresh", AGENTS) == "laptop-refresh"
+        assert self.table.match("refresh now", AGENTS) is None
+
+    def test_several_agents_fall_through(self) -> None:
+        """Test a message matching rules for different agents goes to the LLM."""
+        assert self.table.match("laptop password", AGENTS) is None
+
+    def test_exclude_pattern_falls_through(self) -> None:
+        """Test an exclude pattern sends the message to the LLM."""
+        assert self.table.match("I don't want a new laptop", AGENTS) is None
+
+    def test_unavailable_agent_ignored(self) -> None:
+        """Test rules for agents that aren't loaded don't match."""
+        assert self.table.match("new laptop", ["password-reset"]) is None
+        assert (
+            self.table.match("new laptop password", ["password-reset"])
+            == "password-reset"
+        )
+
+    def test_integration_hints(self) -> None:
+        """Test integration keywords only apply to that integration."""
+        assert self.table.match("hardware request", AGENTS) is None
+        assert self.table.match("hardware request", AGENTS, "SLACK") is None
+        assert self.table.match("hardware request", AGENTS, "EMAIL") == (
+            "laptop-refresh"
+        )
+        assert self.table.match("Hardware Request", AGENTS, "email") == (
+            "laptop-refresh"
+        )
+
+    def test_disabled(self) -> None:
+        """Test a disabled table never matches."""
+        table = RoutingRuleTable({**RULES, "enabled": False})
+
+        assert table.match("new laptop", AGENTS) is None
+
+    def test_invalid_rule_pattern_ignored(self) -> None:
+        """Test an invalid rule pattern is skipped, keeping the rule's keywords."""
+        table = RoutingRuleTable(
+            {
+                "rules": [
+                    {
+                        "agent": "laptop-refresh",
+                        "patterns": ["("],
+                        "keywords": ["laptop"],
+                    }
+                ]
+            }
+        )
+
+        assert table.match("laptop", AGENTS) == "laptop-refresh"
+
+    def test_rules_without_agent_skipped(self) -> None:
+        """Test rules that don't name an agent are dropped."""
+        table = RoutingRuleTable({"rules": [{"keywords": ["laptop"]}]})
+
+        assert table.rules == []
+        assert table.match("laptop", AGENTS) is None
+
+    def test_normalize(self) -> None:
+        """Test whitespace is collapsed and case folded."""
+        assert normalize_routing_text("  New\n\tLAPTOP  ") == "new laptop"
+
+
+class TestShippedRoutingRules:
+    """Test cases for the routing agent's rule table."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        table = get_routing_rule_table("config/lg-prompts/routing-rules.yaml")
+        assert table is not None
+        self.table = table
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "I need a new laptop",
+            "Can you refresh my laptop?",
+            "refresh",
+            "My laptop is old, I'd like a replacement",
+        ],
+    )
+    def test_laptop_requests_routed(self, text: str) -> None:
+        """Test obvious laptop requests skip the routing LLM."""
+        assert self.table.match(text, ["laptop-refresh"]) == "laptop-refresh"
+
+    @pytest.mark.parametrize(
+        "text", ["I don't need a new laptop", "What can you help with?"]
+    )
+    def test_other_messages_fall_through(self, text: str) -> None:
+        """Test negations and unrelated messages go to the routing LLM."""
+        assert self.table.match(text, ["laptop-refresh"]) is None
+
+    def test_rule_agents_exist(self) -> None:
+        """Test every rule targets an agent from config/agents."""
+        agents_dir = Path(__file__).parents[1] / "config" / "agents"
+        agent_names = {
+            line.split(":", 1)[1].strip().strip('"')
+            for path in agents_dir.glob("*.yaml")
+            for line in path.read_text().splitlines()
+            if line.startswith("name:")
+        }
+
+        assert {rule.agent for rule in self.table.rules} <= agent_names
+
+
+class TestRoutingRuleTableCache:
+    """Test cases for get_routing_rule_table."""
+
+    @pytest.fixture(autouse=True)
+    def _tables(self) -> Iterator[None]:
+        with patch.dict(routing_rules._rule_tables, clear=True):
+            yield
+
+    def _write(self, path: Path, keyword: str, mtime_ns: int) -> None:
+        path.write_text(
+            f'rules:\n  - agent: "laptop-refresh"\n    keywords: ["{keyword}"]\n'
+        )
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_compiled_once(self, tmp_path: Path) -> None:
+        """Test an unchanged file reuses the compiled table."""
+        path = tmp_path / "rules.yaml"
+        self._write(path, "laptop", 1_000_000_000)
+
+        table = get_routing_rule_table(str(path))
+
+        assert table is not None
+        assert get_routing_rule_table(str(path)) is table
+
+    def test_recompiled_when_changed(self, tmp_path: Path) -> None:
+        """Test an edited file is recompiled and the old table dropped."""
+        path = tmp_path / "rules.yaml"
+        self._write(path, "laptop", 1_000_000_000)
+        old_table = get_routing_rule_table(str(path))
+
+        self._write(path, "notebook", 2_000_000_000)
+        table = get_routing_rule_table(str(path))
+
+        assert table is not None and table is not old_table
+        assert table.match("notebook", AGENTS) == "laptop-refresh"
+        assert list(routing_rules._rule_tables) == [(str(path), 2_000_000_000)]
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        """Test a missing file falls back to LLM routing."""
+        assert get_routing_rule_table(str(tmp_path / "missing.yaml")) is None
+
+    def test_invalid_file(self, tmp_path: Path) -> None:
+        """Test a table that fails to compile falls back to LLM routing."""
+        path = tmp_path / "rules.yaml"
+        path.write_text('exclude_patterns: ["("]\n')
+
+        assert get_routing_rule_table(str(path)) is None
+        assert routing_rules._rule_tables == {}
+
+
+class TestRoutingRuleStats:
+    """Test cases for RoutingRuleStats."""
+
+    def test_rule_rate(self) -> None:
+        """Test rule-routed and fall-through messages are counted."""
+        stats = RoutingRuleStats()
+        assert stats.get_stats()["rule_rate"] == 0.0
+
+        stats.record_rule("laptop-refresh")
+        stats.record_rule("laptop-refresh")
+        stats.record_fall_through()
+
+        assert stats.get_stats() == {
+            "rule_routed": {"laptop-refresh": 2},
+            "fell_through": 1,
+            "rule_rate": 0.667,
+        }
@@ -0,0 +1,218 @@
+"""Tests for the in-memory conversation session cache."""
+
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import shared_models
+from agent_service import main
+from agent_service.langgraph import session_cache
+from agent_service.langgraph.session_cache import SessionCache
+from shared_models.models import IntegrationType, NormalizedRequest
+
+
+class _FakeSession:
+    """ConversationSession stand-in with the attributes the cache checks."""
+
+    def __init__(self, agent: Any, thread_id: str = "thread-1") -> None:
+        self.agent = agent
+        self.thread_id = thread_id
+        self.config_path = "config/lg-prompts/lg-prompt-small.yaml"
+        self.current_graph = True
+        self.state_invalidations = 0
+
+    def uses_current_graph(self) -> bool:
+        return self.current_graph
+
+    def invalidate_state(self) -> None:
+        self.state_invalidations += 1
+
+
+class TestSessionCache:
+    """Test cases for SessionCache."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.cache = SessionCache(max_size=2, ttl_seconds=60)
+        self.agent = object()
+        self.session = _FakeSession(self.agent)
+
+    def _release(self, session_id: str = "session-1", version: int = 1) -> None:
+        self.cache.release(session_id, self.session, "routing-agent", "s1", version)
+
+    def _checkout(
+        self,
+        session_id: str = "session-1",
+        version: int = 2,
+        agent: Any = None,
+        agent_name: str = "routing-agent",
+        thread_id: str = "thread-1",
+    ) -> Any:
+        return self.cache.checkout(
+            session_id, agent or self.agent, agent_name, thread_id, version
+        )
+
+    def test_hit(self) -> None:
+        """Test the next request of a session gets the live session back."""
+        self._release(version=1)
+
+        entry = self._checkout(version=2)
+
+        assert entry.conversation_session is self.session
+        assert entry.session_name == "s1"
+        assert self.session.state_invalidations == 0
+        assert self.cache.get_stats()["hits"] == 1
+
+    def test_miss(self) -> None:
+        """Test an unknown session is a miss."""
+        assert self._checkout() is None
+        assert self.cache.get_stats()["misses"] == 1
+
+    def test_stale_version_reloads_state(self) -> None:
+        """Test a version moved on by another request reloads the thread state."""
+        self._release(version=1)
+
+        # Another replica handled version 2 in between
+        entry = self._checkout(version=3)
+
+        assert entry.conversation_session is self.session
+        assert self.session.state_invalidations == 1
+        assert self.cache.get_stats()["stale_state"] == 1
+
+    def test_checked_out_session_not_shared(self) -> None:
+        """Test a concurrent request for a checked out session doesn't get it."""
+        self._release()
+
+        assert self._checkout() is not None
+        assert self._checkout() is None
+
+    def test_not_released_after_failed_turn(self) -> None:
+        """Test a session whose turn raised isn't handed out again."""
+        self._release(version=1)
+
+        entry = self._checkout(version=2)
+        assert entry is not None
+        # The turn raised, so release() was never called
+        assert self._checkout(version=3) is None
+
+        self.session = _FakeSession(self.agent)
+        self._release(version=3)
+        entry = self._checkout(version=4)
+        assert entry.conversation_session is self.session
+        assert self.session.state_invalidations == 0
+
+    @pytest.mark.parametrize(
+        "changed",
+        [
+            {"agent_name": "laptop-refresh"},
+            {"thread_id": "thread-2"},
+            {"agent": object()},
+        ],
+    )
+    def test_changed_session_row_invalidates(self, changed: dict[str, Any]) -> None:
+        """Test a different agent or thread drops the entry."""
+        self._release()
+
+        assert self._checkout(**changed) is None
+        assert self.cache.get_stats()["invalidated"] == 1
+        # Dropped, not put back
+        assert self._checkout() is None
+
+    def test_changed_config_invalidates(self) -> None:
+        """Test a session built from an outdated config is dropped."""
+        self._release()
+        self.session.current_graph = False
+
+        assert self._checkout() is None
+        assert self.cache.get_stats()["invalidated"] == 1
+
+    def test_expired_entry_invalidated(self) -> None:
+        """Test an entry idle longer than the TTL is dropped."""
+        self._release()
+
+        with patch.object(
+            session_cache, "time", SimpleNamespace(monotonic=lambda: 1e12)
+        ):
+            assert self._checkout() is None
+
+    def test_least_recently_used_evicted(self) -> None:
+        """Test the oldest entry is evicted beyond max_size."""
+        for session_id in ["session-1", "session-2", "session-3"]:
+            self._release(session_id)
+
+        assert self._checkout("session-1") is None
+        assert self._checkout("session-3") is not None
+        assert self.cache.get_stats()["evicted"] == 1
+
+    def test_invalidate(self) -> None:
+        """Test invalidating drops the entry."""
+        self._release()
+
+        self.cache.invalidate("session-1")
+
+        assert self._checkout() is None
+
+    def test_disabled(self) -> None:
+        """Test a zero max_size caches nothing."""
+        cache = SessionCache(max_size=0)
+        cache.release("session-1", self.session, "routing-agent", "s1", 1)
+
+        assert cache.checkout("session-1", self.agent, "routing-agent", "t", 2) is None
+        assert cache.get_stats()["size"] == 0
+
+
+class TestSessionRelease:
+    """Test cases for putting sessions back after a turn."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        with patch.dict(os.environ, {"BROKER_URL": "http://broker"}):
+            self.service = main.AgentService(main.AgentConfig())
+        self.session_manager = MagicMock()
+        self.session_manager.current_agent_name = "routing-agent"
+        self.request = NormalizedRequest(
+            request_id="req-123",
+            session_id="session-123",
+            user_id="user123",
+            integration_type=IntegrationType.WEB,
+            request_type="message",
+            content="Hello",
+            target_agent_id=None,
+        )
+
+    async def _handle(self) -> Any:
+        with (
+            patch.object(self.service, "_handle_session_management", AsyncMock()),
+            patch.object(shared_models, "get_database_manager", MagicMock()),
+            patch.object(
+                main, "ResponsesSessionManager", return_value=self.session_manager
+            ),
+        ):
+            return await self.service._handle_responses_mode_request(
+                self.request, datetime.now(timezone.utc)
+            )
+
+    @pytest.mark.asyncio
+    async def test_released_after_turn(self) -> None:
+        """Test the session is put back after a successful turn."""
+        self.session_manager.handle_responses_message = AsyncMock(return_value="Hi")
+
+        response = await self._handle()
+
+        assert response.content == "Hi"
+        self.session_manager.release_conversation_session.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_not_released_after_exception(self) -> None:
+        """Test a session whose turn raised is not put back in the cache."""
+        self.session_manager.handle_responses_message = AsyncMock(
+            side_effect=RuntimeError("turn failed")
+        )
+
+        response = await self._handle()
+
+        assert response.content.startswith("Failed to process")
+        self.session_manager.release_conversation_session.assert_not_called()
@@ -0,0 +1,194 @@
+"""Tests for write-behind token accounting."""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterator, Sequence
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from agent_service import session_manager
+from agent_service.langgraph.token_accounting import TokenAccumulator
+from agent_service.session_manager import ResponsesSessionManager
+from shared_models import database
+from shared_models.session_token_service import SessionTokenDelta, SessionTokenService
+
+
+class _FakeDatabase:
+    """Records the deltas written by each apply_token_deltas call."""
+
+    def __init__(self) -> None:
+        self.writes: list[list[SessionTokenDelta]] = []
+        self.fail_next = False
+        # Called inside the write, e.g. to record usage while it is in flight
+        self.during_write: Any = None
+
+    async def apply_token_deltas(
+        self, db: Any, deltas: Sequence[SessionTokenDelta]
+    ) -> int:
+        if self.during_write is not None:
+            self.during_write()
+        if self.fail_next:
+            self.fail_next = False
+            raise ConnectionError("database unavailable")
+        self.writes.append([SessionTokenDelta(**vars(delta)) for delta in deltas])
+        return len(deltas)
+
+
+def _by_session(deltas: list[SessionTokenDelta]) -> dict[str, SessionTokenDelta]:
+    return {delta.session_id: delta for delta in deltas}
+
+
+class TestTokenAccumulator:
+    """Test cases for TokenAccumulator."""
+
+    @pytest.fixture(autouse=True)
+    def _database(self) -> Iterator[None]:
+        self.db = _FakeDatabase()
+
+        @asynccontextmanager
+        async def get_db_session() -> AsyncIterator[Any]:
+            yield MagicMock()
+
+        with (
+            patch.object(database, "get_db_session", get_db_session),
+            patch.object(
+                SessionTokenService, "apply_token_deltas", self.db.apply_token_deltas
+            ),
+        ):
+            yield
+
+    def test_record_aggregates_per_session(self) -> None:
+        """Test calls are summed per session, keeping the largest call."""
+        accumulator = TokenAccumulator()
+
+        accumulator.record("session-1", 100, 20)
+        accumulator.record("session-1", 300, 10)
+        accumulator.record("session-2", 50, 5)
+
+        pending = _by_session(accumulator._take_pending())
+        assert pending["session-1"] == SessionTokenDelta(
+            "session-1",
+            input_tokens=400,
+            output_tokens=30,
+            total_tokens=430,
+            call_count=2,
+            max_input_tokens=300,
+            max_output_tokens=20,
+            max_total_tokens=310,
+        )
+        assert pending["session-2"].call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_all_sessions_at_once(self) -> None:
+        """Test one flush writes the deltas of every session in one call."""
+        accumulator = TokenAccumulator()
+        accumulator.record("session-1", 100, 20)
+        accumulator.record("session-2", 50, 5)
+
+        assert await accumulator.flush() == 2
+
+        (write,) = self.db.writes
+        assert set(_by_session(write)) == {"session-1", "session-2"}
+        assert accumulator.get_stats()["pending_calls"] == 0
+        assert await accumulator.flush() == 0
+        assert len(self.db.writes) == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_on_threshold(self) -> None:
+        """Test reaching the pending call threshold flushes before the interval."""
+        accumulator = TokenAccumulator(flush_interval_ms=60_000, flush_calls=3)
+        task = asyncio.create_task(accumulator.run())
+        await asyncio.sleep(0)
+        try:
+            # LLM calls record from turn executor threads
+            def record_twice() -> None:
+                for _ in range(2):
+                    accumulator.record("session-1", 10, 1)
+
+            recorder = threading.Thread(target=record_twice)
+            recorder.start()
+            recorder.join()
+            await asyncio.sleep(0.05)
+            assert self.db.writes == []
+
+            await asyncio.to_thread(accumulator.record, "session-1", 10, 1)
+            for _ in range(100):
+                if self.db.writes:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+        (write,) = self.db.writes
+        assert write[0].call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_restore_on_failure(self) -> None:
+        """Test deltas of a failed write are merged with newer usage and retried."""
+        accumulator = TokenAccumulator()
+        accumulator.record("session-1", 100, 20)
+        accumulator.record("session-2", 50, 5)
+        self.db.fail_next = True
+        # Usage recorded while the failing UPDATE is in flight
+        self.db.during_write = lambda: accumulator.record("session-1", 500, 1)
+
+        assert await accumulator.flush() == 0
+        assert accumulator.get_stats()["failed_flushes"] == 1
+        assert accumulator.get_stats()["pending_calls"] == 3
+
+        self.db.during_write = None
+        assert await accumulator.flush() == 3
+
+        (write,) = self.db.writes
+        merged = _by_session(write)
+        assert merged["session-1"] == SessionTokenDelta(
+            "session-1",
+            input_tokens=600,
+            output_tokens=21,
+            total_tokens=621,
+            call_count=2,
+            max_input_tokens=500,
+            max_output_tokens=20,
+            max_total_tokens=501,
+        )
+        assert merged["session-2"].total_tokens == 55
+
+    @pytest.mark.asyncio
+    async def test_tokens_query_flushes_first(self) -> None:
+        """Test the tokens command writes pending usage before reading counts."""
+        accumulator = TokenAccumulator()
+        accumulator.record("session-123", 100, 20)
+        manager = ResponsesSessionManager.__new__(ResponsesSessionManager)
+        manager.request_manager_session_id = "session-123"
+        manager.user_id = "user123"
+
+        async def get_token_counts(db: Any, session_id: str) -> dict[str, int]:
+            # Counts are read after the pending usage was written
+            (write,) = self.db.writes
+            return {
+                key: write[0].total_tokens
+                for key in [
+                    "total_input_tokens",
+                    "total_output_tokens",
+                    "total_tokens",
+                    "llm_call_count",
+                    "max_input_tokens",
+                    "max_output_tokens",
+                    "max_total_tokens",
+                ]
+            }
+
+        with (
+            patch.object(
+                session_manager, "get_token_accumulator", return_value=accumulator
+            ),
+            patch.object(
+                SessionTokenService,
+                "get_token_counts",
+                AsyncMock(side_effect=get_token_counts),
+            ),
+        ):
+            summary = await manager._handle_tokens_query()
+
+        assert summary.startswith("CURRENT_TOKEN_SUMMARY:INPUT:120:")
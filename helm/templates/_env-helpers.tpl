@@ -48,8 +48,13 @@ Generate database environment variables from pgvector secret
 {{/* Sync Connection Pool (PostgresSaver/LangGraph) */}}
 - name: DB_SYNC_POOL_MIN_SIZE
   value: {{ if hasKey .Values.requestManagement "database" }}{{ .Values.requestManagement.database.syncPoolMinSize | default "1" | quote }}{{ else }}"1"{{ end }}
+{{- /* Defaults to one connection per concurrent LangGraph turn plus one spare */}}
+{{- $langgraphMaxWorkers := 8 }}
+{{- if and (hasKey .Values.requestManagement "agentService") (hasKey .Values.requestManagement.agentService "langgraph") }}
+{{- $langgraphMaxWorkers = .Values.requestManagement.agentService.langgraph.maxWorkers | default 8 }}
+{{- end }}
 - name: DB_SYNC_POOL_MAX_SIZE
-  value: {{ if hasKey .Values.requestManagement "database" }}{{ .Values.requestManagement.database.syncPoolMaxSize | default "5" | quote }}{{ else }}"5"{{ end }}
+  value: {{ if hasKey .Values.requestManagement "database" }}{{ .Values.requestManagement.database.syncPoolMaxSize | default (add1 $langgraphMaxWorkers) | quote }}{{ else }}{{ add1 $langgraphMaxWorkers | quote }}{{ end }}
 - name: DB_SYNC_POOL_TIMEOUT
   value: {{ if hasKey .Values.requestManagement "database" }}{{ .Values.requestManagement.database.syncPoolTimeout | default "30" | quote }}{{ else }}"30"{{ end }}
 {{- end }}
@@ -64,7 +69,7 @@ Generate common environment variables for all services
 - name: SQL_DEBUG
   value: "false"
 - name: EXPECTED_MIGRATION_VERSION
-  value: {{ .Values.database.expectedMigrationVersion | default "001" | quote }}
+  value: {{ .Values.database.expectedMigrationVersion | default "004" | quote }}
 {{/* Eventing Configuration - Always enabled (mock or full Knative) */}}
 - name: BROKER_URL
   value: {{ if .Values.requestManagement.knative.eventing.enabled }}{{ printf "%s/%s/%s" .Values.requestManagement.knative.broker.url .Release.Namespace .Values.requestManagement.knative.broker.name | quote }}{{ else }}{{ printf "http://%s-mock-eventing.%s.svc.cluster.local:8080/%s/%s" (include "self-service-agent.fullname" .) .Release.Namespace .Release.Namespace .Values.requestManagement.knative.broker.name | quote }}{{ end }}
@@ -174,6 +179,30 @@ Generate Agent Service specific environment variables
   value: {{ if hasKey .Values "agent" }}{{ .Values.agent.timeout | default "120" | quote }}{{ else }}"120"{{ end }}
 - name: ALWAYS_REFRESH_AGENT_MAPPING
   value: {{ if hasKey .Values "agent" }}{{ .Values.agent.alwaysRefreshMapping | default "true" | quote }}{{ else }}"true"{{ end }}
+{{/* LangGraph Turn Execution */}}
+- name: LANGGRAPH_EXECUTION_MODE
+  value: {{ if hasKey .Values.requestManagement.agentService "langgraph" }}{{ .Values.requestManagement.agentService.langgraph.executionMode | default "thread" | quote }}{{ else }}"thread"{{ end }}
+- name: LANGGRAPH_MAX_WORKERS
+  value: {{ if hasKey .Values.requestManagement.agentService "langgraph" }}{{ .Values.requestManagement.agentService.langgraph.maxWorkers | default "8" | quote }}{{ else }}"8"{{ end }}
+- name: CHECKPOINT_SERIALIZER
+  value: {{ if hasKey .Values.requestManagement.agentService "langgraph" }}{{ .Values.requestManagement.agentService.langgraph.checkpointSerializer | default "default" | quote }}{{ else }}"default"{{ end }}
+{{/* LangGraph Checkpoint Pruning */}}
+- name: CHECKPOINT_PRUNE_ENABLED
+  value: {{ if hasKey .Values.requestManagement.agentService "checkpointPruning" }}{{ .Values.requestManagement.agentService.checkpointPruning.enabled | toString | quote }}{{ else }}"true"{{ end }}
+- name: CHECKPOINT_PRUNE_INTERVAL_SECONDS
+  value: {{ if hasKey .Values.requestManagement.agentService "checkpointPruning" }}{{ .Values.requestManagement.agentService.checkpointPruning.intervalSeconds | default "3600" | quote }}{{ else }}"3600"{{ end }}
+- name: CHECKPOINT_KEEP_LATEST
+  value: {{ if hasKey .Values.requestManagement.agentService "checkpointPruning" }}{{ .Values.requestManagement.agentService.checkpointPruning.keepLatest | default "3" | quote }}{{ else }}"3"{{ end }}
+- name: CHECKPOINT_ORPHAN_TTL_HOURS
+  value: {{ if hasKey .Values.requestManagement.agentService "checkpointPruning" }}{{ .Values.requestManagement.agentService.checkpointPruning.orphanTtlHours | default "24" | quote }}{{ else }}"24"{{ end }}
+{{/* Session Token Accounting */}}
+- name: TOKEN_ACCOUNTING_FLUSH_INTERVAL_MS
+  value: {{ if hasKey .Values.requestManagement.agentService "tokenAccounting" }}{{ .Values.requestManagement.agentService.tokenAccounting.flushIntervalMs | default "1000" | quote }}{{ else }}"1000"{{ end }}
+- name: TOKEN_ACCOUNTING_FLUSH_CALLS
+  value: {{ if hasKey .Values.requestManagement.agentService "tokenAccounting" }}{{ .Values.requestManagement.agentService.tokenAccounting.flushCalls | default "100" | quote }}{{ else }}"100"{{ end }}
+{{/* Response Streaming */}}
+- name: STREAM_RESPONSE_INTEGRATIONS
+  value: {{ .Values.requestManagement.agentService.streamResponseIntegrations | default "" | quote }}
 {{/* LangGraph Prompt Configuration Overrides */}}
 {{- if .Values.requestManagement.agentService.promptOverrides }}
 {{- range $key, $value := .Values.requestManagement.agentService.promptOverrides }}
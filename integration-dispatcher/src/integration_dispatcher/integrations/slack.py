@@ -1,6 +1,9 @@
 """Slack integration handler."""
 
+import asyncio
 import os
+import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional
 
 from shared_models import configure_logging
@@ -12,6 +15,9 @@ from .base import BaseIntegrationHandler, IntegrationResult
 
 logger = configure_logging("integration-dispatcher")
 
+# Streamed responses tracked at once (oldest are forgotten first)
+_MAX_STREAMED_MESSAGES = 1024
+
 
 class SlackIntegrationHandler(BaseIntegrationHandler):
     """Handler for Slack message delivery."""
@@ -30,6 +36,17 @@ class SlackIntegrationHandler(BaseIntegrationHandler):
             self.bot_token = None
             self.client = None
 
+        # Streamed responses: request_id -> {"channel", "ts", "sequence", "updated_at"}
+        # or None once the final response was delivered
+        self._streamed_messages: OrderedDict[str, Optional[Dict[str, Any]]] = (
+            OrderedDict()
+        )
+        self._stream_locks: Dict[str, asyncio.Lock] = {}
+        # Slack rate-limits chat.update, so partial updates are spaced out
+        self.stream_update_interval = (
+            float(os.getenv("SLACK_STREAM_UPDATE_INTERVAL_MS", "1000")) / 1000
+        )
+
     async def deliver(
         self,
         request: DeliveryRequest,
@@ -79,17 +96,29 @@ class SlackIntegrationHandler(BaseIntegrationHandler):
                 dict(slack_config) if slack_config else {},
             )
 
-            # Send message
-            response = await self.client.chat_postMessage(
-                channel=channel,
-                text=template_content.get("subject", "Agent Response"),
-                blocks=blocks,
-                thread_ts=(
-                    slack_config.get("thread_ts")
-                    if slack_config.get("thread_replies")
-                    else None
-                ),
-            )
+            # Replace the streamed partial response, if there is one
+            async with self._stream_lock(request.request_id):
+                streamed = self._streamed_messages.get(request.request_id)
+                self._finish_stream(request.request_id)
+                if streamed:
+                    response = await self.client.chat_update(
+                        channel=streamed["channel"],
+                        ts=streamed["ts"],
+                        text=template_content.get("subject", "Agent Response"),
+                        blocks=blocks,
+                    )
+                else:
+                    # Send message
+                    response = await self.client.chat_postMessage(
+                        channel=channel,
+                        text=template_content.get("subject", "Agent Response"),
+                        blocks=blocks,
+                        thread_ts=(
+                            slack_config.get("thread_ts")
+                            if slack_config.get("thread_replies")
+                            else None
+                        ),
+                    )
 
             if response["ok"]:
                 return IntegrationResult(
@@ -123,6 +152,97 @@ class SlackIntegrationHandler(BaseIntegrationHandler):
                 message=f"Unexpected error: {str(e)}",
             )
 
+    async def stream_chunk(self, chunk_data: Dict[str, Any]) -> bool:
+        """Show a partial (streamed) response: post one message, then update it.
+
+        Chunks carry the full text so far; stale or too frequent chunks are
+        skipped. deliver() later replaces the message with the final response.
+
+        Returns:
+            True if the Slack message was posted or updated
+        """
+        request_id = chunk_data.get("request_id")
+        content = chunk_data.get("content")
+        if not self.client or not request_id or not content:
+            return False
+
+        sequence = int(chunk_data.get("sequence", 0))
+        async with self._stream_lock(request_id):
+            if request_id in self._streamed_messages:
+                streamed = self._streamed_messages[request_id]
+                if streamed is None:
+                    # Final response already delivered
+                    return False
+                if (
+                    sequence <= streamed["sequence"]
+                    or time.monotonic() - streamed["updated_at"]
+                    < self.stream_update_interval
+                ):
+                    return False
+
+            try:
+                if request_id not in self._streamed_messages:
+                    channel = await self._get_stream_channel(
+                        chunk_data.get("integration_context") or {}
+                    )
+                    if not channel:
+                        return False
+                    response = await self.client.chat_postMessage(
+                        channel=channel, text=content
+                    )
+                    streamed = {"channel": response["channel"], "ts": response["ts"]}
+                else:
+                    streamed = self._streamed_messages[request_id]
+                    assert streamed is not None
+                    await self.client.chat_update(
+                        channel=streamed["channel"], ts=streamed["ts"], text=content
+                    )
+            except SlackApiError as e:
+                logger.warning(
+                    "Failed to stream Slack message",
+                    request_id=request_id,
+                    sequence=sequence,
+                    error=e.response.get("error"),
+                )
+                return False
+
+            streamed["sequence"] = sequence
+            streamed["updated_at"] = time.monotonic()
+            self._remember_stream(request_id, streamed)
+            return True
+
+    async def _get_stream_channel(
+        self, integration_context: Dict[str, Any]
+    ) -> Optional[str]:
+        """Channel for a streamed response: the request's channel or the user's DM."""
+        channel = integration_context.get("channel_id")
+        if channel:
+            return str(channel)
+        slack_user_id = integration_context.get("slack_user_id")
+        if slack_user_id:
+            return await self._get_user_dm_channel_by_id(slack_user_id)
+        return None
+
+    def _stream_lock(self, request_id: str) -> asyncio.Lock:
+        lock = self._stream_locks.get(request_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._stream_locks[request_id] = lock
+        return lock
+
+    def _remember_stream(
+        self, request_id: str, streamed: Optional[Dict[str, Any]]
+    ) -> None:
+        self._streamed_messages[request_id] = streamed
+        self._streamed_messages.move_to_end(request_id)
+        while len(self._streamed_messages) > _MAX_STREAMED_MESSAGES:
+            evicted, _ = self._streamed_messages.popitem(last=False)
+            self._stream_locks.pop(evicted, None)
+
+    def _finish_stream(self, request_id: str) -> None:
+        """Mark a request's response as delivered so late chunks are ignored."""
+        self._remember_stream(request_id, None)
+
     async def validate_config(self, config: Dict[str, Any]) -> bool:
         """Validate Slack configuration."""
         # Must have either channel_id, user_email, or slack_user_id
@@ -10,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from shared_models import (
+    CloudEventHandler,
     DatabaseUtils,
     EventTypes,
     HealthChecker,
@@ -555,23 +556,26 @@ async def handle_notification_event(
     request: Request,
     db: AsyncSession = Depends(get_db_session_dependency),
 ) -> Dict[str, Any]:
-    """Handle notification CloudEvents (request acknowledgments, status updates)."""
+    """Handle notification CloudEvents (status updates, streamed response chunks)."""
     try:
-        headers = dict(request.headers)
-        body = await request.body()
+        event_data = await parse_cloudevent_from_request(request)
+        event_type = event_data.get("type")
+
+        # Streamed response chunks are frequent; keep them out of the info log
+        if event_type == EventTypes.AGENT_RESPONSE_CHUNK:
+            return await _handle_response_chunk_event(
+                CloudEventHandler.extract_event_data(event_data)
+            )
 
         logger.info(
             "Notification CloudEvent received",
-            event_type=headers.get("ce-type"),
-            source=headers.get("ce-source"),
-            event_id=headers.get("ce-id"),
+            event_type=event_type,
+            source=event_data.get("source"),
+            event_id=event_data.get("id"),
         )
 
-        event_type = headers.get("ce-type")
-        event_data = json.loads(body)
-
         # Handle different notification types
-        # Note: Currently no notification handlers are implemented
+        # Note: No handlers for acknowledgment/status notifications yet
         logger.info(
             "Notification event ignored",
             event_type=event_type,
@@ -583,7 +587,9 @@ async def handle_notification_event(
         logger.error(
             "Failed to handle notification CloudEvent",
             error=str(e),
-            event_type=headers.get("ce-type") if "headers" in locals() else "unknown",
+            event_type=(
+                event_data.get("type") if "event_data" in locals() else "unknown"
+            ),
         )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -591,6 +597,25 @@ async def handle_notification_event(
         )
 
 
+async def _handle_response_chunk_event(chunk_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Progressively update the user's Slack message with a streamed response."""
+    if str(chunk_data.get("integration_type", "")).upper() != IntegrationType.SLACK:
+        return {"status": "ignored", "reason": "streaming not supported"}
+
+    handler = dispatcher.handlers.get(IntegrationType.SLACK)
+    if not isinstance(handler, SlackIntegrationHandler):
+        return {"status": "ignored", "reason": "slack integration not available"}
+
+    updated = await handler.stream_chunk(chunk_data)
+    logger.debug(
+        "Response chunk handled",
+        request_id=chunk_data.get("request_id"),
+        sequence=chunk_data.get("sequence"),
+        updated=updated,
+    )
+    return {"status": "processed" if updated else "skipped"}
+
+
 @app.post("/")
 async def handle_cloudevent(
     request: Request,
@@ -0,0 +1,98 @@
+"""Tests for streamed Slack responses."""
+
+from typing import Any, Dict
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from integration_dispatcher.integrations.slack import SlackIntegrationHandler
+from shared_models.models import DeliveryRequest, DeliveryStatus
+
+
+def _slack_response(**kwargs: Any) -> Dict[str, Any]:
+    return {"ok": True, "channel": "C123456789", "ts": "1700000000.000100", **kwargs}
+
+
+def _chunk(sequence: int, content: str) -> Dict[str, Any]:
+    return {
+        "request_id": "req-123",
+        "sequence": sequence,
+        "content": content,
+        "integration_context": {"channel_id": "C123456789"},
+    }
+
+
+class TestSlackStreaming:
+    """Test cases for Slack partial response updates."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.handler = SlackIntegrationHandler()
+        self.client = MagicMock()
+        self.client.chat_postMessage = AsyncMock(return_value=_slack_response())
+        self.client.chat_update = AsyncMock(return_value=_slack_response())
+        self.handler.client = self.client
+        self.handler.stream_update_interval = 0
+        self.request = DeliveryRequest(
+            request_id="req-123",
+            session_id="session-123",
+            user_id="user123",
+            content="Your laptop refresh request was submitted.",
+        )
+        self.config = MagicMock()
+        self.config.config = {"channel_id": "C123456789"}
+
+    async def _deliver(self) -> None:
+        result = await self.handler.deliver(
+            self.request,
+            self.config,
+            {"subject": "Agent Response", "body": self.request.content},
+        )
+        assert result.status == DeliveryStatus.DELIVERED
+
+    @pytest.mark.asyncio
+    async def test_chunks_post_then_update(self) -> None:
+        """Test the first chunk posts a message and later chunks update it."""
+        assert await self.handler.stream_chunk(_chunk(1, "Your"))
+        assert await self.handler.stream_chunk(_chunk(2, "Your laptop"))
+
+        self.client.chat_postMessage.assert_awaited_once()
+        self.client.chat_update.assert_awaited_once()
+        assert self.client.chat_update.await_args.kwargs["text"] == "Your laptop"
+
+    @pytest.mark.asyncio
+    async def test_stale_chunk_ignored(self) -> None:
+        """Test a chunk older than the one shown is skipped."""
+        assert await self.handler.stream_chunk(_chunk(2, "Your laptop"))
+        assert not await self.handler.stream_chunk(_chunk(1, "Your"))
+
+        self.client.chat_update.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_deliver_replaces_streamed_message(self) -> None:
+        """Test the final response updates the streamed message in place."""
+        await self.handler.stream_chunk(_chunk(1, "Your"))
+        await self._deliver()
+
+        self.client.chat_postMessage.assert_awaited_once()
+        update = self.client.chat_update.await_args.kwargs
+        assert update["ts"] == "1700000000.000100"
+        assert update["blocks"][0]["text"]["text"] == self.request.content
+
+    @pytest.mark.asyncio
+    async def test_late_chunk_after_deliver_ignored(self) -> None:
+        """Test chunks arriving after the final response don't overwrite it."""
+        await self.handler.stream_chunk(_chunk(1, "Your"))
+        await self._deliver()
+        updates = self.client.chat_update.await_count
+
+        assert not await self.handler.stream_chunk(_chunk(2, "Your laptop"))
+        assert self.client.chat_update.await_count == updates
+
+    @pytest.mark.asyncio
+    async def test_late_first_chunk_after_deliver_ignored(self) -> None:
+        """Test a first chunk arriving after the final response posts nothing."""
+        await self._deliver()
+
+        assert not await self.handler.stream_chunk(_chunk(1, "Your"))
+        self.client.chat_postMessage.assert_awaited_once()
+        self.client.chat_update.assert_not_awaited()
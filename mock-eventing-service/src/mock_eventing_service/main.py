@@ -1,11 +1,14 @@
 """Mock Knative Eventing Service for testing and CI environments."""
 
 import asyncio
+import bisect
+import hashlib
 import json
 import os
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from cloudevents.http import CloudEvent
 from fastapi import FastAPI, HTTPException, Request, status
@@ -23,20 +26,57 @@ auto_tracing_run(SERVICE_NAME, logger)
 
 
 class EventSubscription(BaseModel):
-    """Event subscription configuration."""
+    """Event subscription configuration.
+
+    With replica_urls, each event goes to one replica chosen by consistent hash
+    of its `partitionkey` (events without one go to subscriber_url).
+    """
 
     event_type: str
     subscriber_url: str
     filter_attributes: Dict[str, str] = {}
+    replica_urls: List[str] = []
+
+
+class ConsistentHashRing:
+    """Maps partition keys to replicas.
+
+    Each replica owns many points on the ring, so keys spread evenly and adding
+    or removing a replica only moves the keys that replica owned.
+    """
+
+    def __init__(self, nodes: List[str], virtual_nodes: int = 100) -> None:
+        self._ring: List[Tuple[int, str]] = sorted(
+            (self._hash(f"{node}#{i}"), node)
+            for node in nodes
+            for i in range(virtual_nodes)
+        )
+        self._points = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def get_node(self, key: str) -> str:
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
 
 
 class MockEventingService:
-    """Mock Knative Eventing service that simulates broker behavior."""
+    """Mock Knative Eventing service that simulates broker behavior.
+
+    Like the Kafka broker, events with the same `partitionkey` are delivered to
+    a subscriber one at a time, in publish order (within one worker process).
+    """
 
     def __init__(self) -> None:
         self.subscriptions: List[EventSubscription] = []
         self.event_history: List[Dict[str, Any]] = []
         self.delivery_attempts: Dict[str, int] = {}
+        self.replica_deliveries: Dict[str, int] = {}
+        self._hash_rings: Dict[Tuple[str, ...], ConsistentHashRing] = {}
+        # (subscription, partition key) -> [lock, holders and waiters]
+        self._partition_locks: Dict[Tuple[str, str], List[Any]] = {}
 
     def add_subscription(self, subscription: EventSubscription) -> None:
         """Add an event subscription."""
@@ -63,6 +103,44 @@ class MockEventingService:
             subscriber_url=subscriber_url,
         )
 
+    def select_subscriber_url(
+        self, event: CloudEvent, subscription: EventSubscription
+    ) -> str:
+        """Pick the replica for an event by consistent hash of its partition key."""
+        partition_key = event.get("partitionkey")
+        if not subscription.replica_urls or not partition_key:
+            return subscription.subscriber_url
+
+        replicas = tuple(subscription.replica_urls)
+        ring = self._hash_rings.get(replicas)
+        if ring is None:
+            ring = ConsistentHashRing(list(replicas))
+            self._hash_rings[replicas] = ring
+        return ring.get_node(str(partition_key))
+
+    @asynccontextmanager
+    async def _partition_lock(
+        self, subscription: EventSubscription, partition_key: Optional[str]
+    ) -> AsyncIterator[None]:
+        """Serialize deliveries of one partition key to one subscription."""
+        if not partition_key:
+            yield
+            return
+
+        lock_key = (subscription.subscriber_url, str(partition_key))
+        entry = self._partition_locks.get(lock_key)
+        if entry is None:
+            entry = [asyncio.Lock(), 0]
+            self._partition_locks[lock_key] = entry
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._partition_locks[lock_key]
+
     async def publish_event(self, event: CloudEvent) -> bool:
         """Publish an event to all matching subscribers."""
         event_type = event.get("type")
@@ -110,7 +188,8 @@ class MockEventingService:
 
         # Deliver to all matching subscribers asynchronously
         for subscription in matching_subscriptions:
-            # Create async task for each delivery (non-blocking)
+            # Create async task for each delivery (non-blocking); tasks start in
+            # creation order, so same-key deliveries queue in publish order
             asyncio.create_task(self._deliver_event_async(event, subscription))
 
         # Return immediately - events are processed in background
@@ -120,10 +199,21 @@ class MockEventingService:
         self, event: CloudEvent, subscription: EventSubscription
     ) -> None:
         """Deliver an event to a specific subscriber asynchronously."""
+        async with self._partition_lock(subscription, event.get("partitionkey")):
+            await self._deliver_event(event, subscription)
+
+    async def _deliver_event(
+        self, event: CloudEvent, subscription: EventSubscription
+    ) -> None:
         import httpx
 
         event_id = event.get("id", str(uuid.uuid4()))
-        delivery_key = f"{event_id}:{subscription.subscriber_url}"
+        subscriber_url = self.select_subscriber_url(event, subscription)
+        if subscription.replica_urls:
+            self.replica_deliveries[subscriber_url] = (
+                self.replica_deliveries.get(subscriber_url, 0) + 1
+            )
+        delivery_key = f"{event_id}:{subscriber_url}"
 
         # Track delivery attempts
         self.delivery_attempts[delivery_key] = (
@@ -134,7 +224,8 @@ class MockEventingService:
         logger.info(
             "Delivering event to subscriber (async)",
             event_id=event_id,
-            subscriber_url=subscription.subscriber_url,
+            subscriber_url=subscriber_url,
+            partition_key=event.get("partitionkey"),
             attempt=attempt_count,
         )
 
@@ -159,14 +250,14 @@ class MockEventingService:
             logger.info(
                 "Sending CloudEvent to subscriber",
                 event_id=event_id,
-                subscriber_url=subscription.subscriber_url,
+                subscriber_url=subscriber_url,
                 body_length=len(body),
                 body_preview=body[:200] if body else "empty",
             )
 
             async with httpx.AsyncClient(timeout=30.0) as client:
                 response = await client.post(
-                    subscription.subscriber_url,
+                    subscriber_url,
                     headers=headers,
                     content=body,
                 )
@@ -176,7 +267,7 @@ class MockEventingService:
                 logger.info(
                     "Event delivered successfully",
                     event_id=event_id,
-                    subscriber_url=subscription.subscriber_url,
+                    subscriber_url=subscriber_url,
                     status_code=response.status_code,
                 )
 
@@ -184,7 +275,7 @@ class MockEventingService:
             logger.error(
                 "Failed to deliver event",
                 event_id=event_id,
-                subscriber_url=subscription.subscriber_url,
+                subscriber_url=subscriber_url,
                 attempt=attempt_count,
                 error=str(e),
             )
@@ -206,6 +297,16 @@ async def initialize_default_subscriptions() -> None:
         service_name = os.getenv("SERVICE_NAME", "self-service-agent")
         namespace = os.getenv("NAMESPACE", "default")
 
+        # Agent service replicas addressed individually (e.g. pod DNS names of a
+        # headless service): requests are routed to one of them by consistent
+        # hash of the session partition key, so consecutive turns of a session
+        # reach the replica that has it cached
+        agent_service_replica_urls = [
+            f"{url.strip().rstrip('/')}/api/v1/events/cloudevents"
+            for url in os.getenv("AGENT_SERVICE_REPLICA_URLS", "").split(",")
+            if url.strip()
+        ]
+
         # Default subscriptions that should always exist
         default_subscriptions: list[dict[str, Any]] = [
             # Integration Dispatcher → Request Manager (for Slack/Email requests)
@@ -219,12 +320,14 @@ async def initialize_default_subscriptions() -> None:
                 "event_type": "com.self-service-agent.request.created",
                 "subscriber_url": f"http://{service_name}-agent-service.{namespace}.svc.cluster.local/api/v1/events/cloudevents",
                 "filter_attributes": {"source": "request-manager"},
+                "replica_urls": agent_service_replica_urls,
             },
             # Request Manager → Agent Service (for routing requests)
             {
                 "event_type": "com.self-service-agent.request.created",
                 "subscriber_url": f"http://{service_name}-agent-service.{namespace}.svc.cluster.local/api/v1/events/cloudevents",
                 "filter_attributes": {"requiresrouting": "true"},
+                "replica_urls": agent_service_replica_urls,
             },
             {
                 "event_type": "com.self-service-agent.agent.response-ready",
@@ -246,6 +349,17 @@ async def initialize_default_subscriptions() -> None:
                 "subscriber_url": f"http://{service_name}-integration-dispatcher.{namespace}.svc.cluster.local/notifications",
                 "filter_attributes": {},
             },
+            # Streamed response chunks → Slack updates and SSE requests
+            {
+                "event_type": "com.self-service-agent.agent.response-chunk",
+                "subscriber_url": f"http://{service_name}-integration-dispatcher.{namespace}.svc.cluster.local/notifications",
+                "filter_attributes": {"source": "agent-service"},
+            },
+            {
+                "event_type": "com.self-service-agent.agent.response-chunk",
+                "subscriber_url": f"http://{service_name}-request-manager.{namespace}.svc.cluster.local/api/v1/events/cloudevents",
+                "filter_attributes": {"source": "agent-service"},
+            },
             {
                 "event_type": "com.self-service-agent.request.database-update",
                 "subscriber_url": f"http://{service_name}-agent-service.{namespace}.svc.cluster.local/api/v1/events/cloudevents",
@@ -477,11 +591,18 @@ async def list_events(limit: int = 100) -> Dict[str, Any]:
     }
 
 
+@app.get("/routing")
+async def get_routing() -> Dict[str, Any]:
+    """Deliveries per replica for subscriptions with replica_urls."""
+    return {"replica_deliveries": dict(mock_service.replica_deliveries)}
+
+
 @app.delete("/events")
 async def clear_events() -> dict[str, str]:
     """Clear event history."""
     mock_service.event_history.clear()
     mock_service.delivery_attempts.clear()
+    mock_service.replica_deliveries.clear()
     return {"status": "cleared", "message": "Event history cleared"}
 
 
@@ -491,6 +612,7 @@ async def reset_service() -> dict[str, str]:
     mock_service.subscriptions.clear()
     mock_service.event_history.clear()
     mock_service.delivery_attempts.clear()
+    mock_service.replica_deliveries.clear()
     return {"status": "reset", "message": "Mock service reset to initial state"}
 
 
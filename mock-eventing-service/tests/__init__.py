@@ -0,0 +1 @@
+"""Tests for Mock Eventing Service."""
@@ -0,0 +1,150 @@
+"""Tests for partitioned event delivery."""
+
+import asyncio
+from collections import Counter
+from typing import List, Tuple
+from unittest.mock import patch
+
+from cloudevents.http import CloudEvent
+from mock_eventing_service.main import (
+    ConsistentHashRing,
+    EventSubscription,
+    MockEventingService,
+)
+
+REPLICAS = [
+    "http://agent-service-0.agent-service:8080",
+    "http://agent-service-1.agent-service:8080",
+    "http://agent-service-2.agent-service:8080",
+]
+KEYS = [f"session-{i}" for i in range(3000)]
+
+
+class TestConsistentHashRing:
+    """Test cases for ConsistentHashRing."""
+
+    def test_same_key_same_replica(self) -> None:
+        """Test a key maps to the same replica on every ring with the same nodes."""
+        ring = ConsistentHashRing(REPLICAS)
+        other = ConsistentHashRing(list(reversed(REPLICAS)))
+
+        for key in KEYS[:100]:
+            assert ring.get_node(key) == ring.get_node(key) == other.get_node(key)
+
+    def test_keys_spread_across_replicas(self) -> None:
+        """Test keys spread roughly evenly across replicas."""
+        ring = ConsistentHashRing(REPLICAS)
+
+        counts = Counter(ring.get_node(key) for key in KEYS)
+
+        assert set(counts) == set(REPLICAS)
+        for count in counts.values():
+            assert 0.2 < count / len(KEYS) < 0.47
+
+    def test_adding_replica_moves_only_its_keys(self) -> None:
+        """Test a new replica only takes keys, it doesn't shuffle the others."""
+        ring = ConsistentHashRing(REPLICAS)
+        new_replica = "http://agent-service-3.agent-service:8080"
+        grown = ConsistentHashRing(REPLICAS + [new_replica])
+
+        moved = [key for key in KEYS if ring.get_node(key) != grown.get_node(key)]
+
+        assert all(grown.get_node(key) == new_replica for key in moved)
+        assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+    def test_single_replica(self) -> None:
+        """Test a ring with one replica maps every key to it."""
+        ring = ConsistentHashRing(REPLICAS[:1])
+
+        assert {ring.get_node(key) for key in KEYS[:100]} == {REPLICAS[0]}
+
+
+def _event(partition_key: str | None, event_id: str) -> CloudEvent:
+    attributes = {
+        "type": "com.self-service-agent.request.created",
+        "source": "request-manager",
+        "id": event_id,
+    }
+    if partition_key:
+        attributes["partitionkey"] = partition_key
+    return CloudEvent(attributes, {"content": event_id})
+
+
+class TestPartitionedDelivery:
+    """Test cases for per-partition-key delivery ordering."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.service = MockEventingService()
+        self.subscription = EventSubscription(
+            event_type="com.self-service-agent.request.created",
+            subscriber_url="http://agent-service:8080/api/v1/events/cloudevents",
+            replica_urls=REPLICAS,
+        )
+        self.service.add_subscription(self.subscription)
+        # (event id, "start" | "end") in the order deliveries ran
+        self.deliveries: List[Tuple[str, str]] = []
+
+    async def _fake_deliver(
+        self, event: CloudEvent, subscription: EventSubscription
+    ) -> None:
+        event_id = str(event["id"])
+        self.deliveries.append((event_id, "start"))
+        # Yield to the loop so overlapping deliveries would interleave
+        await asyncio.sleep(0.01)
+        self.deliveries.append((event_id, "end"))
+
+    async def _publish_all(self, events: List[CloudEvent]) -> None:
+        with patch.object(self.service, "_deliver_event", self._fake_deliver):
+            for event in events:
+                await self.service.publish_event(event)
+            while len(self.deliveries) < 2 * len(events):
+                await asyncio.sleep(0.005)
+
+    async def test_same_key_serialized_in_publish_order(self) -> None:
+        """Test deliveries for one partition key run one at a time, in order."""
+        events = [_event("session-1", f"event-{i}") for i in range(5)]
+
+        await self._publish_all(events)
+
+        expected = []
+        for i in range(5):
+            expected += [(f"event-{i}", "start"), (f"event-{i}", "end")]
+        assert self.deliveries == expected
+        assert self.service._partition_locks == {}
+
+    async def test_different_keys_concurrent(self) -> None:
+        """Test deliveries for different partition keys don't wait on each other."""
+        events = [_event(f"session-{i}", f"event-{i}") for i in range(3)]
+
+        await self._publish_all(events)
+
+        assert [phase for _, phase in self.deliveries[:3]] == ["start"] * 3
+        assert self.service._partition_locks == {}
+
+    async def test_events_without_key_not_serialized(self) -> None:
+        """Test events without a partition key are delivered without a lock."""
+        events = [_event(None, f"event-{i}") for i in range(3)]
+
+        await self._publish_all(events)
+
+        assert [phase for _, phase in self.deliveries[:3]] == ["start"] * 3
+
+    def test_replica_selection(self) -> None:
+        """Test a partition key always selects the same replica."""
+        keyed = _event("session-1", "event-1")
+        replica = self.service.select_subscriber_url(keyed, self.subscription)
+
+        assert replica in REPLICAS
+        assert (
+            self.service.select_subscriber_url(
+                _event("session-1", "event-2"), self.subscription
+            )
+            == replica
+        )
+        assert (
+            self.service.select_subscriber_url(
+                _event(None, "event-3"), self.subscription
+            )
+            == self.subscription.subscriber_url
+        )
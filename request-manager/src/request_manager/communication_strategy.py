@@ -4,10 +4,16 @@ import asyncio
 import os
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, AsyncGenerator, Dict, Optional
 
 from fastapi import HTTPException, status
-from shared_models import CloudEventSender, SessionResponse, configure_logging
+from shared_clients.stream_processor import LlamaStackStreamProcessor
+from shared_models import (
+    CloudEventSender,
+    SessionResponse,
+    configure_logging,
+    session_partition_key,
+)
 from shared_models.models import NormalizedRequest
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -18,6 +24,8 @@ logger = configure_logging("request-manager")
 # Global registry for response futures (event-driven approach)
 _response_futures_registry: dict[str, Any] = {}
 _session_futures_registry: dict[str, Any] = {}
+# Partial response chunks for streaming (SSE) requests waiting on this pod
+_response_stream_registry: dict[str, asyncio.Queue[Dict[str, Any]]] = {}
 
 
 def _should_filter_sessions_by_integration_type() -> bool:
@@ -86,6 +94,22 @@ def resolve_response_future(request_id: str, response_data: Dict[str, Any]) -> b
         return False
 
 
+def publish_response_chunk(request_id: str, chunk_data: Dict[str, Any]) -> bool:
+    """Hand a streamed response chunk to the SSE request waiting on this pod.
+
+    Best effort: chunks for requests streaming from another pod are dropped;
+    the complete response still arrives through the normal response path.
+
+    Returns:
+        True if a streaming request on this pod received the chunk
+    """
+    queue = _response_stream_registry.get(request_id)
+    if queue is None:
+        return False
+    queue.put_nowait(chunk_data)
+    return True
+
+
 async def create_or_get_session_shared(
     request: Any, db: AsyncSession
 ) -> Optional[SessionResponse]:
@@ -488,11 +512,16 @@ class EventingStrategy(CommunicationStrategy):
         """Send request via CloudEvent."""
         request_event_data = normalized_request.model_dump(mode="json")
 
+        # Same partition key for every turn of a session: ordered delivery and
+        # replica affinity for the agent service's in-memory session cache
         success = await self.event_sender.send_request_event(
             request_event_data,
             normalized_request.request_id,
             normalized_request.user_id,
             normalized_request.session_id,
+            partition_key=session_partition_key(
+                normalized_request.session_id, normalized_request.user_id
+            ),
         )
 
         if not success:
@@ -759,6 +788,94 @@ class UnifiedRequestProcessor:
 
         return response
 
+    async def process_request_stream(
+        self,
+        request: Any,
+        db: AsyncSession,
+        timeout: int = int(os.getenv("AGENT_TIMEOUT", "120")),
+    ) -> AsyncGenerator[str, None]:
+        """Prepare a streaming request and return its SSE event generator.
+
+        The generator yields a start event, chunk events with the text
+        generated so far (for agent states configured to stream), then the
+        final response and a complete event. Chunks are only a preview; the
+        response event carries the authoritative content.
+        """
+        # Prepared before streaming starts, while the request's db session is open
+        normalized_request, _, _ = await self._prepare_request(request, db)
+        normalized_request.integration_context["stream"] = True
+        return self._stream_response(normalized_request, timeout)
+
+    async def _stream_response(
+        self, normalized_request: NormalizedRequest, timeout: int
+    ) -> AsyncGenerator[str, None]:
+        """Send a prepared request and yield SSE events until its response arrives."""
+        request_id = normalized_request.request_id
+        chunks: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+        _response_stream_registry[request_id] = chunks
+        response_task: Optional[asyncio.Task[Dict[str, Any]]] = None
+        try:
+            yield LlamaStackStreamProcessor.create_sse_start_event(request_id)
+
+            if not await self.strategy.send_request(normalized_request):
+                yield LlamaStackStreamProcessor.create_sse_error_event(
+                    "Failed to send request"
+                )
+                return
+
+            response_task = asyncio.create_task(
+                self.strategy.wait_for_response(request_id, timeout)
+            )
+            last_sequence = 0
+            while not response_task.done():
+                chunk_task = asyncio.create_task(chunks.get())
+                await asyncio.wait(
+                    {chunk_task, response_task}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not chunk_task.done():
+                    chunk_task.cancel()
+                    break
+                chunk = chunk_task.result()
+                # Chunks carry the full text so far; late arrivals are stale
+                sequence = int(chunk.get("sequence", 0))
+                if sequence <= last_sequence:
+                    continue
+                last_sequence = sequence
+                yield LlamaStackStreamProcessor.create_sse_chunk_event(
+                    sequence,
+                    chunk.get("delta", ""),
+                    chunk.get("content", ""),
+                    bool(chunk.get("reset")),
+                )
+
+            response = await response_task
+            yield LlamaStackStreamProcessor.create_sse_response_event(response)
+            yield LlamaStackStreamProcessor.create_sse_complete_event(
+                response["response"].get("agent_id") or "",
+                response["response"].get("processing_time_ms") or 0,
+            )
+
+            logger.info(
+                "Streaming request processed successfully",
+                request_id=request_id,
+                session_id=normalized_request.session_id,
+                chunks=last_sequence,
+            )
+        except Exception as e:
+            logger.error(
+                "Failed to process streaming request",
+                request_id=request_id,
+                error=str(e),
+            )
+            yield LlamaStackStreamProcessor.create_sse_error_event(
+                "Failed to process request"
+            )
+        finally:
+            _response_stream_registry.pop(request_id, None)
+            if response_task is not None and not response_task.done():
+                # Client disconnected
+                response_task.cancel()
+
     async def _prepare_request(
         self, request: Any, db: AsyncSession, set_pod_name: bool = True
     ) -> tuple[NormalizedRequest, str, str]:
@@ -10,10 +10,11 @@ from typing import Any, Dict, Optional, Union
 import jwt
 from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt.exceptions import InvalidTokenError
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from shared_clients.stream_processor import LlamaStackStreamProcessor
 from shared_models import (
     CloudEventHandler,
     CloudEventSender,
@@ -37,6 +38,7 @@ from .communication_strategy import (
     UnifiedRequestProcessor,
     check_communication_strategy,
     get_communication_strategy,
+    publish_response_chunk,
 )
 from .normalizer import RequestNormalizer
 from .response_handler import UnifiedResponseHandler
@@ -455,6 +457,53 @@ async def handle_cli_request(
     return await _process_request_adaptive(cli_request, db)
 
 
+@app.post("/api/v1/requests/web/stream")
+async def handle_web_request_stream(
+    web_request: WebRequest,
+    db: AsyncSession = Depends(get_db_session_dependency),
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user),
+) -> StreamingResponse:
+    """Handle web interface requests, streaming the response as server-sent events."""
+    _verify_request_user(current_user, web_request.user_id, "web")
+    return await _process_request_stream(web_request, db)
+
+
+@app.post("/api/v1/requests/cli/stream")
+async def handle_cli_request_stream(
+    cli_request: CLIRequest,
+    db: AsyncSession = Depends(get_db_session_dependency),
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user),
+) -> StreamingResponse:
+    """Handle CLI requests, streaming the response as server-sent events."""
+    _verify_request_user(current_user, cli_request.user_id, "CLI")
+    return await _process_request_stream(cli_request, db)
+
+
+def _verify_request_user(
+    current_user: Optional[Dict[str, Any]], request_user_id: str, request_kind: str
+) -> None:
+    """Require an authenticated user matching the request's user_id."""
+    if not current_user or not current_user.get("user_id"):
+        logger.warning(
+            "Unauthenticated streaming request",
+            request_kind=request_kind,
+            request_user=request_user_id,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required"
+        )
+
+    if current_user["user_id"] != request_user_id:
+        logger.warning(
+            "User ID mismatch",
+            authenticated_user=current_user["user_id"],
+            request_user=request_user_id,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="User ID mismatch"
+        )
+
+
 @app.post("/api/v1/requests/tool")
 async def handle_tool_request(
     tool_request: ToolRequest,
@@ -532,6 +581,15 @@ async def handle_cloudevent(
             )
             return {"status": "ignored", "reason": "self-generated event"}
 
+        # Streamed response chunks are transient previews: no claiming or
+        # database writes, just hand them to a waiting SSE request
+        if event_type == EventTypes.AGENT_RESPONSE_CHUNK:
+            chunk_data = CloudEventHandler.extract_event_data(event_data)
+            delivered = publish_response_chunk(
+                chunk_data.get("request_id", ""), chunk_data
+            )
+            return {"status": "processed" if delivered else "ignored"}
+
         # ✅ ATOMIC EVENT CLAIMING: Use check-and-set pattern to prevent duplicate processing
         # This provides 100% guarantee - only one pod can claim and process an event
         if event_id:
@@ -632,6 +690,29 @@ async def _process_request_adaptive(
         )
 
 
+async def _process_request_stream(
+    request: Union[WebRequest, CLIRequest],
+    db: AsyncSession,
+    timeout: int = int(os.getenv("AGENT_TIMEOUT", "120")),
+) -> StreamingResponse:
+    """Process a request, streaming partial responses as server-sent events."""
+    if not unified_processor:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unified processor not initialized",
+        )
+
+    try:
+        events = await unified_processor.process_request_stream(request, db, timeout)
+    except Exception as e:
+        logger.error("Failed to process streaming request", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process request",
+        )
+    return LlamaStackStreamProcessor.create_sse_response(events)
+
+
 async def _handle_request_created_event_from_data(
     event_data: Dict[str, Any], db: AsyncSession
 ) -> Dict[str, Any]:
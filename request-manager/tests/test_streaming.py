@@ -0,0 +1,257 @@
+"""Tests for streamed (SSE) responses."""
+
+import asyncio
+import json
+from typing import Any, AsyncGenerator, Dict, List
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from cloudevents.http import CloudEvent, to_structured
+from fastapi.testclient import TestClient
+from request_manager.communication_strategy import (
+    UnifiedRequestProcessor,
+    _response_stream_registry,
+    publish_response_chunk,
+)
+from request_manager.main import app, get_current_user
+from request_manager.normalizer import RequestNormalizer
+from request_manager.schemas import WebRequest
+from shared_models import EventTypes
+
+
+class _FakeStrategy:
+    """Communication strategy whose response is completed by the test."""
+
+    def __init__(self) -> None:
+        self.response: asyncio.Future[Dict[str, Any]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self.sent: List[Any] = []
+        self.wait_cancelled = False
+
+    async def send_request(self, request: Any) -> bool:
+        self.sent.append(request)
+        return True
+
+    async def wait_for_response(
+        self, request_id: str, timeout: int, db: Any = None
+    ) -> Dict[str, Any]:
+        try:
+            return await self.response
+        except asyncio.CancelledError:
+            self.wait_cancelled = True
+            raise
+
+
+def _event(sse: str) -> Dict[str, Any]:
+    assert sse.startswith("data: ") and sse.endswith("\n\n")
+    result: Dict[str, Any] = json.loads(sse[len("data: ") :])
+    return result
+
+
+def _chunk(sequence: int, content: str) -> Dict[str, Any]:
+    return {"sequence": sequence, "delta": content[-1:], "content": content}
+
+
+class TestStreamResponse:
+    """Test cases for the SSE event generator."""
+
+    async def _start_stream(
+        self,
+    ) -> tuple[_FakeStrategy, str, AsyncGenerator[str, None]]:
+        strategy = _FakeStrategy()
+        processor = UnifiedRequestProcessor(strategy)  # type: ignore[arg-type]
+        web_request = WebRequest(
+            user_id="test-user",
+            content="Hello",
+            session_token=None,
+            client_ip=None,
+            user_agent=None,
+        )
+        normalized = RequestNormalizer().normalize_request(
+            web_request, "test-session-123"
+        )
+        with patch.object(
+            processor,
+            "_prepare_request",
+            AsyncMock(return_value=(normalized, "test-session-123", "routing")),
+        ):
+            events = await processor.process_request_stream(normalized, MagicMock())
+        return strategy, normalized.request_id, events
+
+    @pytest.mark.asyncio
+    async def test_event_order(self) -> None:
+        """Test start, chunk, response and complete events arrive in order."""
+        strategy, request_id, events = await self._start_stream()
+
+        start = _event(await anext(events))
+        assert start == {"type": "start", "request_id": request_id}
+
+        assert publish_response_chunk(request_id, _chunk(1, "Hel"))
+        chunk = _event(await anext(events))
+        assert chunk["type"] == "chunk"
+        assert chunk["sequence"] == 1
+        assert chunk["content"] == "Hel"
+
+        assert strategy.sent[0].integration_context["stream"] is True
+
+        strategy.response.set_result(
+            {
+                "request_id": request_id,
+                "response": {
+                    "content": "Hello!",
+                    "agent_id": "routing-agent",
+                    "processing_time_ms": 42,
+                },
+            }
+        )
+        rest = [_event(sse) async for sse in events]
+        assert [event["type"] for event in rest] == ["response", "complete"]
+        assert rest[0]["response"]["response"]["content"] == "Hello!"
+        assert rest[1] == {
+            "type": "complete",
+            "agent_id": "routing-agent",
+            "processing_time_ms": 42,
+        }
+        assert request_id not in _response_stream_registry
+
+    @pytest.mark.asyncio
+    async def test_stale_sequences_dropped(self) -> None:
+        """Test chunks with a sequence at or below the last one are skipped."""
+        strategy, request_id, events = await self._start_stream()
+        await anext(events)
+
+        publish_response_chunk(request_id, _chunk(2, "Hell"))
+        assert _event(await anext(events))["sequence"] == 2
+
+        # Late and duplicate chunks carry older text
+        publish_response_chunk(request_id, _chunk(1, "He"))
+        publish_response_chunk(request_id, _chunk(2, "Hell"))
+        publish_response_chunk(request_id, _chunk(3, "Hello"))
+        chunk = _event(await anext(events))
+        assert chunk["sequence"] == 3
+        assert chunk["content"] == "Hello"
+
+        strategy.response.set_result(
+            {"request_id": request_id, "response": {"content": "Hello"}}
+        )
+        assert [_event(sse)["type"] async for sse in events] == [
+            "response",
+            "complete",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cleanup(self) -> None:
+        """Test closing the stream unregisters it and stops waiting."""
+        strategy, request_id, events = await self._start_stream()
+        await anext(events)
+        publish_response_chunk(request_id, _chunk(1, "H"))
+        await anext(events)
+        assert request_id in _response_stream_registry
+
+        # Starlette closes the generator when the client goes away
+        await events.aclose()
+        await asyncio.sleep(0)
+
+        assert request_id not in _response_stream_registry
+        assert not publish_response_chunk(request_id, _chunk(2, "He"))
+        assert strategy.wait_cancelled
+
+    @pytest.mark.asyncio
+    async def test_send_failure(self) -> None:
+        """Test a request that can't be sent ends with an error event."""
+        strategy, request_id, events = await self._start_stream()
+        strategy.send_request = AsyncMock(return_value=False)  # type: ignore[method-assign]
+
+        assert [_event(sse)["type"] async for sse in events] == ["start", "error"]
+        assert request_id not in _response_stream_registry
+
+
+class TestResponseChunkEvents:
+    """Test cases for response chunk CloudEvents."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.client = TestClient(app)
+
+    def _post_chunk(self, chunk_data: Dict[str, Any]) -> Dict[str, Any]:
+        event = CloudEvent(
+            {
+                "type": EventTypes.AGENT_RESPONSE_CHUNK,
+                "source": "agent-service",
+                "requestid": chunk_data["request_id"],
+            },
+            chunk_data,
+        )
+        headers, body = to_structured(event)
+        response = self.client.post(
+            "/api/v1/events/cloudevents", headers=headers, content=body
+        )
+        assert response.status_code == 200
+        result: Dict[str, Any] = response.json()
+        return result
+
+    def test_chunk_for_waiting_stream(self) -> None:
+        """Test a chunk is handed to the SSE request streaming on this pod."""
+        queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+        _response_stream_registry["req-chunk-1"] = queue
+        try:
+            result = self._post_chunk(
+                {"request_id": "req-chunk-1", "sequence": 1, "content": "Hi"}
+            )
+        finally:
+            _response_stream_registry.pop("req-chunk-1", None)
+
+        assert result["status"] == "processed"
+        assert queue.get_nowait()["content"] == "Hi"
+
+    def test_chunk_without_stream(self) -> None:
+        """Test a chunk for a request not streaming on this pod is ignored."""
+        result = self._post_chunk(
+            {"request_id": "req-chunk-2", "sequence": 1, "content": "Hi"}
+        )
+        assert result["status"] == "ignored"
+
+
+class TestStreamEndpointAuthentication:
+    """Test cases for streaming endpoint authentication."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        self.client = TestClient(app)
+
+    def teardown_method(self) -> None:
+        """Clean up test fixtures."""
+        app.dependency_overrides.pop(get_current_user, None)
+
+    @pytest.mark.parametrize("kind", ["web", "cli"])
+    def test_stream_endpoint_no_authorization(self, kind: str) -> None:
+        """Test streaming endpoints with no authorization header."""
+        response = self.client.post(
+            f"/api/v1/requests/{kind}/stream",
+            json={"user_id": "test-user", "content": "Hello, I need help"},
+        )
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize("kind", ["web", "cli"])
+    def test_stream_endpoint_invalid_authorization(self, kind: str) -> None:
+        """Test streaming endpoints with invalid authorization."""
+        response = self.client.post(
+            f"/api/v1/requests/{kind}/stream",
+            headers={"Authorization": "Bearer invalid-token"},
+            json={"user_id": "test-user", "content": "Hello, I need help"},
+        )
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize("kind", ["web", "cli"])
+    def test_stream_endpoint_user_id_mismatch(self, kind: str) -> None:
+        """Test streaming endpoints with a user ID mismatch."""
+        app.dependency_overrides[get_current_user] = lambda: {
+            "user_id": "test@company.com"
+        }
+        response = self.client.post(
+            f"/api/v1/requests/{kind}/stream",
+            headers={"Authorization": "Bearer web-test-user"},
+            json={"user_id": "different-user", "content": "Hello, I need help"},
+        )
+        assert response.status_code == 403
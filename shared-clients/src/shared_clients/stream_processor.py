@@ -313,6 +313,22 @@ class LlamaStackStreamProcessor:
 
         return f"data: {json.dumps({'type': 'start', 'request_id': request_id})}\n\n"
 
+    @staticmethod
+    def create_sse_chunk_event(
+        sequence: int, delta: str, content: str, reset: bool = False
+    ) -> str:
+        """Create a standardized SSE event for a partial (streamed) response."""
+        import json
+
+        return f"data: {json.dumps({'type': 'chunk', 'sequence': sequence, 'delta': delta, 'content': content, 'reset': reset})}\n\n"
+
+    @staticmethod
+    def create_sse_response_event(response: Dict[str, Any]) -> str:
+        """Create a standardized SSE event carrying the final response."""
+        import json
+
+        return f"data: {json.dumps({'type': 'response', 'response': response})}\n\n"
+
     @staticmethod
     def create_sse_complete_event(agent_id: str, processing_time_ms: int) -> str:
         """Create a standardized SSE complete event."""
@@ -24,6 +24,7 @@ from .events import (
     CloudEventBuilder,
     CloudEventSender,
     EventTypes,
+    session_partition_key,
 )
 
 # Export FastAPI utilities
@@ -106,6 +107,7 @@ __all__ = [
     "CloudEventBuilder",
     "CloudEventSender",
     "EventTypes",
+    "session_partition_key",
     "BaseSessionManager",
     "SessionCreate",
     "SessionResponse",
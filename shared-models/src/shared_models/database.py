@@ -35,7 +35,13 @@ class DatabaseConfig:
 
         # Sync connection pool settings (for PostgresSaver/LangGraph)
         self.sync_pool_min_size = int(os.getenv("DB_SYNC_POOL_MIN_SIZE", "1"))
-        self.sync_pool_max_size = int(os.getenv("DB_SYNC_POOL_MAX_SIZE", "5"))
+        # Defaults to one connection per concurrent LangGraph turn plus one spare
+        self.sync_pool_max_size = int(
+            os.getenv(
+                "DB_SYNC_POOL_MAX_SIZE",
+                str(int(os.getenv("LANGGRAPH_MAX_WORKERS", "8")) + 1),
+            )
+        )
         self.sync_pool_timeout = int(os.getenv("DB_SYNC_POOL_TIMEOUT", "30"))
 
         # Debug settings
@@ -179,6 +185,38 @@ class DatabaseManager:
 
         return self._sync_pool
 
+    def get_sync_pool(self) -> psycopg_pool.ConnectionPool:
+        """Get the sync connection pool for LangGraph PostgresSaver.
+
+        PostgresSaver accepts a pool directly and borrows a connection per
+        checkpoint operation, so concurrent sessions don't share one socket.
+        """
+        return self._get_sync_pool()
+
+    def get_sync_pool_stats(self) -> dict[str, Any]:
+        """Get sync connection pool statistics (size, availability, wait times)."""
+        if self._sync_pool is None:
+            return {}
+
+        stats = self._sync_pool.get_stats()
+        requests_num = stats.get("requests_num", 0)
+        return {
+            "pool_min": stats.get("pool_min", 0),
+            "pool_max": stats.get("pool_max", 0),
+            "pool_size": stats.get("pool_size", 0),
+            "pool_available": stats.get("pool_available", 0),
+            "requests_waiting": stats.get("requests_waiting", 0),
+            "requests_num": requests_num,
+            "requests_queued": stats.get("requests_queued", 0),
+            "requests_errors": stats.get("requests_errors", 0),
+            "requests_wait_ms": stats.get("requests_wait_ms", 0),
+            "avg_wait_ms": (
+                round(stats.get("requests_wait_ms", 0) / requests_num, 2)
+                if requests_num
+                else 0.0
+            ),
+        }
+
     def get_sync_connection(self) -> psycopg.Connection[dict[str, Any]]:
         """Get a synchronous connection for LangGraph PostgresSaver.
 
@@ -247,7 +285,7 @@ class DatabaseManager:
 
         # Determine expected version from parameter, environment, or default
         if expected_version is None:
-            expected_version = os.getenv("EXPECTED_MIGRATION_VERSION", "003")
+            expected_version = os.getenv("EXPECTED_MIGRATION_VERSION", "004")
 
         start_time = time()
         logger.info(
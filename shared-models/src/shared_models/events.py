@@ -20,6 +20,7 @@ class EventTypes:
 
     # Response events
     AGENT_RESPONSE_READY = "com.self-service-agent.agent.response-ready"
+    AGENT_RESPONSE_CHUNK = "com.self-service-agent.agent.response-chunk"
 
     # Database update events
     DATABASE_UPDATE_REQUESTED = "com.self-service-agent.request.database-update"
@@ -29,6 +30,23 @@ class EventTypes:
     SESSION_READY = "com.self-service-agent.session.ready"
 
 
+def session_partition_key(
+    session_id: Optional[str], user_id: Optional[str] = None
+) -> Optional[str]:
+    """Partition key for events that belong to one conversation.
+
+    Set as the CloudEvents `partitionkey` extension: the Kafka broker uses it as
+    the record key, so all turns of a session go to the same partition (ordered
+    delivery), and the mock eventing service hashes it to pick a subscriber
+    replica. Falls back to the user when there is no session yet.
+    """
+    if session_id:
+        return f"session:{session_id}"
+    if user_id:
+        return f"user:{user_id}"
+    return None
+
+
 class CloudEventBuilder:
     """Builder for creating standardized CloudEvents."""
 
@@ -47,6 +65,7 @@ class CloudEventBuilder:
         request_id: Optional[str] = None,
         user_id: Optional[str] = None,
         session_id: Optional[str] = None,
+        partition_key: Optional[str] = None,
     ) -> CloudEvent:
         """Create a request created event."""
         event_id = request_id or str(uuid.uuid4())
@@ -63,6 +82,8 @@ class CloudEventBuilder:
             attributes["userid"] = user_id
         if session_id:
             attributes["sessionid"] = session_id
+        if partition_key:
+            attributes["partitionkey"] = partition_key
 
         return CloudEvent(attributes, request_data)
 
@@ -90,6 +111,26 @@ class CloudEventBuilder:
 
         return CloudEvent(attributes, response_data)
 
+    def create_response_chunk_event(
+        self,
+        chunk_data: Dict[str, Any],
+        request_id: str,
+        session_id: Optional[str] = None,
+    ) -> CloudEvent:
+        """Create an agent response chunk event (partial streamed response)."""
+        attributes = {
+            **self.base_attributes,
+            "type": EventTypes.AGENT_RESPONSE_CHUNK,
+            "id": str(uuid.uuid4()),
+            "time": datetime.now(timezone.utc).isoformat(),
+            "requestid": request_id,
+        }
+
+        if session_id:
+            attributes["sessionid"] = session_id
+
+        return CloudEvent(attributes, chunk_data)
+
     def create_session_create_or_get_event(
         self,
         session_data: Dict[str, Any],
@@ -153,11 +194,12 @@ class CloudEventSender:
         request_id: Optional[str] = None,
         user_id: Optional[str] = None,
         session_id: Optional[str] = None,
+        partition_key: Optional[str] = None,
     ) -> bool:
         """Send a request created event."""
         try:
             event = self.builder.create_request_event(
-                request_data, request_id, user_id, session_id
+                request_data, request_id, user_id, session_id, partition_key
             )
             return await self._send_event(event)
         except Exception as e:
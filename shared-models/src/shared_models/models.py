@@ -38,6 +38,7 @@ __all__ = [
     "IntegrationDefaultConfig",
     "DeliveryLog",
     "ProcessedEvent",
+    "LLMResponseCacheEntry",
     "IntegrationCredential",
     "UserIntegrationMapping",
     "AgentResponse",
@@ -354,6 +355,21 @@ class ProcessedEvent(Base, TimestampMixin):  # type: ignore[misc]
     )
 
 
+class LLMResponseCacheEntry(Base, TimestampMixin):  # type: ignore[misc]
+    """Shared tier of the agent service LLM response cache (`cache: true` states)."""
+
+    __tablename__ = "llm_response_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 of the request
+    model = Column(String(255), nullable=False)
+    state_name = Column(String(255), nullable=True)  # For debugging
+    response = Column(Text, nullable=False)
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+    # Index for expiring old entries
+    __table_args__ = (Index("ix_llm_response_cache_expires_at", "expires_at"),)
+
+
 class IntegrationCredential(Base, TimestampMixin):  # type: ignore[misc]
     """Secure storage for integration credentials."""
 
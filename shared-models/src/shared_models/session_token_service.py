@@ -1,7 +1,10 @@
 """Service layer for managing session token counts in the database."""
 
+from dataclasses import dataclass
+from typing import Sequence
+
 import structlog
-from sqlalchemy import func, select, update
+from sqlalchemy import Integer, String, column, func, select, update, values
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import RequestSession
@@ -9,6 +12,41 @@ from .models import RequestSession
 logger = structlog.get_logger()
 
 
+@dataclass
+class SessionTokenDelta:
+    """Token usage of one or more LLM calls to add to a session's counts."""
+
+    session_id: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    call_count: int = 0
+    max_input_tokens: int = 0
+    max_output_tokens: int = 0
+    max_total_tokens: int = 0
+
+    def add_call(self, input_tokens: int, output_tokens: int) -> None:
+        """Add the token usage of one LLM call."""
+        total_tokens = input_tokens + output_tokens
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.total_tokens += total_tokens
+        self.call_count += 1
+        self.max_input_tokens = max(self.max_input_tokens, input_tokens)
+        self.max_output_tokens = max(self.max_output_tokens, output_tokens)
+        self.max_total_tokens = max(self.max_total_tokens, total_tokens)
+
+    def merge(self, other: "SessionTokenDelta") -> None:
+        """Add another delta for the same session."""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.total_tokens += other.total_tokens
+        self.call_count += other.call_count
+        self.max_input_tokens = max(self.max_input_tokens, other.max_input_tokens)
+        self.max_output_tokens = max(self.max_output_tokens, other.max_output_tokens)
+        self.max_total_tokens = max(self.max_total_tokens, other.max_total_tokens)
+
+
 class SessionTokenService:
     """Service for managing token count persistence in sessions."""
 
@@ -84,6 +122,94 @@ class SessionTokenService:
             await db.rollback()
             return False
 
+    @staticmethod
+    async def apply_token_deltas(
+        db: AsyncSession, deltas: Sequence[SessionTokenDelta]
+    ) -> int:
+        """
+        Add aggregated token usage to several sessions in one UPDATE statement.
+
+        Args:
+            db: Database session
+            deltas: Token usage to add, at most one delta per session
+
+        Returns:
+            Number of sessions updated
+
+        Raises:
+            Exception: the update failed (the transaction is rolled back)
+        """
+        if not deltas:
+            return 0
+
+        delta_rows = values(
+            column("session_id", String),
+            column("input_tokens", Integer),
+            column("output_tokens", Integer),
+            column("total_tokens", Integer),
+            column("call_count", Integer),
+            column("max_input_tokens", Integer),
+            column("max_output_tokens", Integer),
+            column("max_total_tokens", Integer),
+            name="token_deltas",
+        ).data(
+            [
+                (
+                    delta.session_id,
+                    delta.input_tokens,
+                    delta.output_tokens,
+                    delta.total_tokens,
+                    delta.call_count,
+                    delta.max_input_tokens,
+                    delta.max_output_tokens,
+                    delta.max_total_tokens,
+                )
+                for delta in deltas
+            ]
+        )
+
+        stmt = (
+            update(RequestSession)
+            .where(RequestSession.session_id == delta_rows.c.session_id)
+            .values(
+                total_input_tokens=RequestSession.total_input_tokens
+                + delta_rows.c.input_tokens,
+                total_output_tokens=RequestSession.total_output_tokens
+                + delta_rows.c.output_tokens,
+                total_tokens=RequestSession.total_tokens + delta_rows.c.total_tokens,
+                llm_call_count=RequestSession.llm_call_count + delta_rows.c.call_count,
+                max_input_tokens_per_call=func.greatest(
+                    RequestSession.max_input_tokens_per_call,
+                    delta_rows.c.max_input_tokens,
+                ),
+                max_output_tokens_per_call=func.greatest(
+                    RequestSession.max_output_tokens_per_call,
+                    delta_rows.c.max_output_tokens,
+                ),
+                max_total_tokens_per_call=func.greatest(
+                    RequestSession.max_total_tokens_per_call,
+                    delta_rows.c.max_total_tokens,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        try:
+            result = await db.execute(stmt)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        updated = int(result.rowcount)  # type: ignore[attr-defined]
+        if updated < len(deltas):
+            logger.warning(
+                "Sessions not found when applying token counts",
+                sessions=len(deltas),
+                updated=updated,
+            )
+        return updated
+
     @staticmethod
     async def get_token_counts(
         db: AsyncSession, session_id: str